@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""Compare the fused column statistics kernel with the per-section scans it replaced.
+
+Counts how many full-length pandas scans each column goes through while
+building the basic, quality and insight sections, and times both paths.
+Row-level work both paths share (duplicate hashing, deep memory usage) is
+reported separately as frame passes. That both paths report the same
+figures is checked by tests/test_column_kernel.py.
+
+    python bench_column_stats.py --rows 200000 --text-cols 6 --numeric-cols 6
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+from pandas.core.strings.accessor import StringMethods
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'csv-analyzer'))
+from analyze_csv import CSVAnalyzer  # noqa: E402
+
+
+def make_frame(rows, text_cols, numeric_cols, seed=0):
+    """Build a reproducible mixed-type frame with nulls, case variants and duplicates"""
+    rng = np.random.default_rng(seed)
+    data = {'id': np.arange(rows)}
+    words = np.array(['alpha', 'Alpha', 'beta', 'BETA', 'gamma', 'delta', 'Delta', 'epsilon'])
+    for i in range(text_cols):
+        values = rng.choice(words, rows).astype(object)
+        values[rng.random(rows) < 0.05] = None
+        data[f'text_{i}'] = values
+    data['contact_email'] = rng.choice(['a@example.com', 'b@example.org', 'not-an-email'], rows)
+    data['phone'] = rng.choice(['+1 555 0100', '555-0199', 'n/a'], rows)
+    for i in range(numeric_cols):
+        values = rng.normal(size=rows)
+        values[rng.random(rows) < 0.05] = np.nan
+        data[f'num_{i}'] = values
+    df = pd.DataFrame(data)
+    return pd.concat([df, df.iloc[:rows // 100]], ignore_index=True)
+
+
+def legacy_report(df):
+    """The per-section scans CSVAnalyzer performed before the fused kernel"""
+    analysis = {
+        'shape': df.shape,
+        'null_counts': df.isnull().sum().to_dict(),
+        'duplicate_rows': df.duplicated().sum(),
+        'memory_usage': df.memory_usage(deep=True).sum()
+    }
+    numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
+    analysis['numeric_summary'] = df[numeric_cols].describe().to_dict()
+    analysis['string_summary'] = {}
+    for col in df.select_dtypes(include=['object']).columns:
+        analysis['string_summary'][col] = {
+            'unique_count': df[col].nunique(),
+            'most_common': df[col].value_counts().head(5).to_dict()
+        }
+
+    quality = {'completeness': {}, 'consistency': {}, 'validity': {}}
+    for col in df.columns:
+        quality['completeness'][col] = (len(df) - df[col].isnull().sum()) / len(df) * 100
+    for col in df.columns:
+        if df[col].dtype == 'object':
+            values = df[col].dropna().astype(str)
+            lower_values = values.str.lower()
+            quality['consistency'][col] = len(lower_values.unique()) / len(values.unique()) * 100
+    for col in df.columns:
+        if df[col].dtype == 'object':
+            values = df[col].dropna().astype(str)
+            if 'email' in col.lower() or 'mail' in col.lower():
+                valid = values.str.match(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$').sum()
+                quality['validity'][f'{col}_email_format'] = valid / len(values) * 100
+            if 'phone' in col.lower() or 'tel' in col.lower():
+                valid = values.str.match(r'^\+?[\d\s\-\(\)]{7,}$').sum()
+                quality['validity'][f'{col}_phone_format'] = valid / len(values) * 100
+
+    potential_ids = [col for col in df.columns if df[col].nunique() == len(df) and not df[col].isnull().any()]
+    return analysis, quality, potential_ids
+
+
+def kernel_report(df):
+    analyzer = CSVAnalyzer()
+    stats = analyzer.compute_stats(df, 'full')
+    return stats.basic_analysis(), stats.data_quality_check(), stats.potential_ids()
+
+
+@contextmanager
+def count_scans(df):
+    """Count full-length pandas scans per column while the block runs"""
+    rows = len(df)
+    columns = set(df.columns)
+    scans = Counter()
+    frame_scans = Counter()
+    patched = []
+
+    def patch(owner, name, key, counter):
+        original = getattr(owner, name)
+
+        def wrapper(obj, *args, **kwargs):
+            for column in key(obj):
+                counter[column] += 1
+            return original(obj, *args, **kwargs)
+
+        setattr(owner, name, wrapper)
+        patched.append((owner, name, original))
+
+    def series_key(series):
+        return [series.name] if len(series) >= rows and series.name in columns else []
+
+    def frame_key(frame):
+        return list(frame.columns) if len(frame) >= rows else []
+
+    def strings_key(accessor):
+        return series_key(accessor._orig)
+
+    for name in ['isnull', 'isna', 'notna', 'dropna', 'nunique', 'value_counts', 'unique', 'astype', 'to_numpy']:
+        patch(pd.Series, name, series_key, scans)
+    for name in ['isnull', 'isna', 'describe']:
+        patch(pd.DataFrame, name, frame_key, scans)
+    for name in ['lower', 'match']:
+        patch(StringMethods, name, strings_key, scans)
+    for name in ['duplicated', 'memory_usage']:
+        patch(pd.DataFrame, name, frame_key, frame_scans)
+
+    original_hash = pd.util.hash_pandas_object
+
+    def hash_wrapper(obj, *args, **kwargs):
+        if isinstance(obj, pd.DataFrame):
+            for column in frame_key(obj):
+                frame_scans[column] += 1
+        return original_hash(obj, *args, **kwargs)
+
+    pd.util.hash_pandas_object = hash_wrapper
+    try:
+        yield scans, frame_scans
+    finally:
+        pd.util.hash_pandas_object = original_hash
+        for owner, name, original in patched:
+            setattr(owner, name, original)
+
+
+def measure(report, df, repeat):
+    with count_scans(df) as (scans, frame_scans):
+        report(df)
+    passes = {col: scans.get(col, 0) for col in df.columns}
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        report(df)
+        timings.append(time.perf_counter() - start)
+
+    return {
+        'seconds': min(timings),
+        'passes_per_column': sum(passes.values()) / len(df.columns),
+        'max_passes_per_column': max(passes.values()),
+        'frame_passes_per_column': sum(frame_scans.values()) / len(df.columns),
+        'passes_by_column': passes
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--text-cols', type=int, default=6)
+    parser.add_argument('--numeric-cols', type=int, default=6)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    df = make_frame(args.rows, args.text_cols, args.numeric_cols)
+    legacy = measure(legacy_report, df, args.repeat)
+    kernel = measure(kernel_report, df, args.repeat)
+
+    print(json.dumps({
+        'benchmark': 'column_stats',
+        'rows': len(df),
+        'columns': len(df.columns),
+        'legacy': legacy,
+        'kernel': kernel,
+        'speedup': legacy['seconds'] / kernel['seconds']
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,456 @@
+#!/usr/bin/env python3
+"""Throughput of the CSV, PDF and image processors on a synthetic corpus.
+
+Generates a reproducible corpus (same seed, same bytes) and runs each file
+through the processor entry point a task would hit:
+
+    csv    CSVAnalyzer.analyze_csv on wide, tall, high-cardinality and
+           mixed-encoding files; it stops at max_rows, so the tall file
+           also goes through analyze_csv_file (the Docker-mode path), as
+           do the .xlsx and Parquet files
+    pdf    process_from_env on text-only, table-heavy, scanned and mixed
+           documents
+    image  convert_image on several sizes and formats
+
+The corpus is generated up front in its own interpreter, and every case
+runs in a fresh one, so import time is not counted as work and peak RSS
+is that case's alone: the case process's own high-water mark (VmHWM,
+which starts afresh at exec, unlike ru_maxrss on Linux) or that of any
+worker process it waited for. The report is JSON: wall seconds, peak RSS
+and rows/s, pages/s or megapixels/s per case.
+
+    python bench_processors.py --output before.json
+    python bench_processors.py --only csv --scale 4 --repeat 3
+
+Scanned pages go through OCR, which needs tesseract and poppler; without
+them those pages are reported as errors by the processor and still timed,
+and the all-scanned document fails (the processor fails a run in which
+every page failed).
+"""
+import argparse
+import contextlib
+import csv
+import io
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+SEED = 1729
+WORDS = ['alpha', 'beta', 'gamma', 'delta', 'epsilon', 'zeta', 'eta', 'theta', 'iota', 'kappa',
+         'lambda', 'omicron', 'sigma', 'omega', 'report', 'invoice', 'total', 'region', 'north', 'south']
+ACCENTED = ['café', 'crème brûlée', 'Zürich', 'São Paulo', 'naïve', 'Malmö', 'façade', 'Ångström']
+
+PAGE_WIDTH = 612
+PAGE_HEIGHT = 792
+SCAN_DPI = 150
+
+
+# --- CSV corpus ---
+
+def write_csv(path, header, rows, encoding='utf-8'):
+    with open(path, 'w', encoding=encoding, newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def csv_wide(path, rng, scale):
+    columns = 200
+    header = [f'col_{i}' for i in range(columns)]
+    rows = ([round(rng.gauss(0, 1), 4) if i % 2 else rng.choice(WORDS) for i in range(columns)]
+            for _ in range(int(2000 * scale)))
+    write_csv(path, header, rows)
+
+
+def csv_tall(path, rng, scale):
+    rows = ([i, round(rng.random() * 1000, 2), rng.choice(WORDS)] for i in range(int(400000 * scale)))
+    write_csv(path, ['id', 'amount', 'category'], rows)
+
+
+def csv_high_cardinality(path, rng, scale):
+    rows = ([f'user-{rng.getrandbits(48):012x}', f'{rng.choice(WORDS)}-{rng.randrange(10 ** 6)}',
+             f'{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(256)}']
+            for _ in range(int(150000 * scale)))
+    write_csv(path, ['user_id', 'tag', 'ip'], rows)
+
+
+def csv_mixed_encoding(path, rng, scale):
+    """cp1252 text with a minority of UTF-8 encoded rows, as left by concatenated exports"""
+    with open(path, 'wb') as f:
+        f.write(b'id,city,note,amount\r\n')
+        for i in range(int(100000 * scale)):
+            line = f'{i},{rng.choice(ACCENTED)},{rng.choice(WORDS)},{rng.randrange(10000)}\r\n'
+            f.write(line.encode('utf-8' if i % 10 == 0 else 'cp1252'))
+
+
+def csv_utf16(path, rng, scale):
+    rows = ([i, rng.choice(ACCENTED), rng.choice(WORDS), rng.randrange(10000)] for i in range(int(50000 * scale)))
+    write_csv(path, ['id', 'city', 'note', 'amount'], rows, encoding='utf-16')
+
+
+def csv_xlsx(path, rng, scale):
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('data')
+    sheet.append(['id', 'amount', 'category'])
+    for i in range(int(50000 * scale)):
+        sheet.append([i, round(rng.random() * 1000, 2), rng.choice(WORDS)])
+    workbook.save(path)
+
+
+def csv_parquet(path, rng, scale):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    count = int(400000 * scale)
+    table = pa.table({
+        'id': list(range(count)),
+        'amount': [round(rng.random() * 1000, 2) for _ in range(count)],
+        'category': [rng.choice(WORDS) for _ in range(count)]
+    })
+    pq.write_table(table, path, row_group_size=50000)
+
+
+# --- PDF corpus ---
+
+def pdf_string(text):
+    return '(' + text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)') + ')'
+
+
+def text_content(rng, lines=50):
+    parts = ['BT /F1 10 Tf 12 TL 56 740 Td']
+    for _ in range(lines):
+        parts.append(pdf_string(' '.join(rng.choice(WORDS) for _ in range(12))) + " Tj T*")
+    parts.append('ET')
+    return '\n'.join(parts).encode('latin-1')
+
+
+def table_content(rng, rows=25, columns=5):
+    """A ruled grid with a value in every cell, as drawn by report generators"""
+    cell_width, cell_height = 100, 24
+    left, top = 56, 720
+    parts = ['0.5 w']
+    for row in range(rows):
+        for column in range(columns):
+            x = left + column * cell_width
+            y = top - (row + 1) * cell_height
+            parts.append(f'{x} {y} {cell_width} {cell_height} re S')
+    parts.append('BT /F1 9 Tf')
+    for row in range(rows):
+        for column in range(columns):
+            value = rng.choice(WORDS) if column == 0 or row == 0 else str(rng.randrange(100000))
+            x = left + column * cell_width + 4
+            y = top - (row + 1) * cell_height + 8
+            parts.append(f'1 0 0 1 {x} {y} Tm {pdf_string(value)} Tj')
+    parts.append('ET')
+    return '\n'.join(parts).encode('latin-1')
+
+
+def scanned_image(rng):
+    """A page of text rendered to a grayscale JPEG, like a 150 dpi scan"""
+    from PIL import Image, ImageDraw
+
+    width, height = PAGE_WIDTH * SCAN_DPI // 72, PAGE_HEIGHT * SCAN_DPI // 72
+    img = Image.new('L', (width, height), 245)
+    draw = ImageDraw.Draw(img)
+    for line in range(60):
+        draw.text((100, 120 + line * 26), ' '.join(rng.choice(WORDS) for _ in range(10)), fill=20)
+    buffer = io.BytesIO()
+    img.save(buffer, 'JPEG', quality=75)
+    return width, height, buffer.getvalue()
+
+
+def write_pdf(path, pages):
+    """Write a PDF from (content stream, scanned image or None) pages"""
+    objects = [None, None, b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>']
+    page_refs = []
+    for content, image in pages:
+        resources = '/Font << /F1 3 0 R >>'
+        if image:
+            width, height, data = image
+            objects.append(b'<< /Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace /DeviceGray '
+                           b'/BitsPerComponent 8 /Filter /DCTDecode /Length %d >>\nstream\n%s\nendstream'
+                           % (width, height, len(data), data))
+            resources += f' /XObject << /Im1 {len(objects)} 0 R >>'
+            content = b'q %d 0 0 %d 0 0 cm /Im1 Do Q\n' % (PAGE_WIDTH, PAGE_HEIGHT) + content
+        objects.append(b'<< /Length %d >>\nstream\n%s\nendstream' % (len(content), content))
+        content_ref = len(objects)
+        objects.append(f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] '
+                       f'/Resources << {resources} >> /Contents {content_ref} 0 R >>'.encode('latin-1'))
+        page_refs.append(len(objects))
+    objects[0] = b'<< /Type /Catalog /Pages 2 0 R >>'
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(f'{ref} 0 R' for ref in page_refs)}] /Count {len(page_refs)} >>".encode('latin-1')
+
+    with open(path, 'wb') as f:
+        f.write(b'%PDF-1.4\n')
+        offsets = []
+        for number, body in enumerate(objects, 1):
+            offsets.append(f.tell())
+            f.write(b'%d 0 obj\n%s\nendobj\n' % (number, body))
+        xref = f.tell()
+        f.write(b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1))
+        for offset in offsets:
+            f.write(b'%010d 00000 n \n' % offset)
+        f.write(b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref))
+
+
+def pdf_text(path, rng, scale):
+    write_pdf(path, [(text_content(rng), None) for _ in range(int(40 * scale))])
+
+
+def pdf_tables(path, rng, scale):
+    write_pdf(path, [(table_content(rng), None) for _ in range(int(20 * scale))])
+
+
+def pdf_scanned(path, rng, scale):
+    write_pdf(path, [(b'', scanned_image(rng)) for _ in range(max(1, int(4 * scale)))])
+
+
+def pdf_mixed(path, rng, scale):
+    kinds = [lambda: (text_content(rng), None), lambda: (table_content(rng), None), lambda: (b'', scanned_image(rng))]
+    write_pdf(path, [kinds[page % 3]() for page in range(int(12 * scale))])
+
+
+# --- Image corpus ---
+
+def synthetic_image(rng, size, mode):
+    """Gradients with mild noise: compresses like a photo rather than like noise or a flat fill"""
+    from PIL import Image
+
+    width, height = size
+    gradient = Image.linear_gradient('L').resize(size)
+    radial = Image.radial_gradient('L').resize(size)
+    noise = Image.frombytes('L', size, rng.randbytes(width * height))
+    img = Image.merge('RGB', (gradient, radial, Image.blend(gradient, noise, 0.25)))
+    return img.convert(mode) if mode != 'RGB' else img
+
+
+def image_case(size, mode, format_name, **save_kwargs):
+    def generate(path, rng, scale):
+        scaled = tuple(max(1, int(side * scale ** 0.5)) for side in size)
+        synthetic_image(rng, scaled, mode).save(path, format_name, **save_kwargs)
+    return generate
+
+
+# name: (kind, file name, generator, processor options)
+CORPUS = {
+    'csv_wide': ('csv', 'wide.csv', csv_wide, {}),
+    'csv_tall': ('csv', 'tall.csv', csv_tall, {}),
+    'csv_tall_file': ('csv', 'tall.csv', csv_tall, {'entry': 'analyze_csv_file'}),
+    'csv_tall_charts': ('csv', 'tall.csv', csv_tall, {'entry': 'analyze_csv_file', 'generate_charts': True}),
+    'csv_high_cardinality': ('csv', 'high_cardinality.csv', csv_high_cardinality, {}),
+    'csv_mixed_encoding': ('csv', 'mixed_encoding.csv', csv_mixed_encoding, {}),
+    'csv_utf16': ('csv', 'utf16.csv', csv_utf16, {}),
+    'csv_xlsx': ('csv', 'tall.xlsx', csv_xlsx, {'entry': 'analyze_csv_file'}),
+    'csv_parquet': ('csv', 'tall.parquet', csv_parquet, {'entry': 'analyze_csv_file'}),
+    'csv_parquet_filtered': ('csv', 'tall.parquet', csv_parquet, {
+        'entry': 'analyze_csv_file',
+        'filters': [['id', '<', 50000]]
+    }),
+    'pdf_text': ('pdf', 'text.pdf', pdf_text, {}),
+    'pdf_tables': ('pdf', 'tables.pdf', pdf_tables, {'EXTRACT_TABLES': 'true'}),
+    'pdf_scanned': ('pdf', 'scanned.pdf', pdf_scanned, {}),
+    'pdf_mixed': ('pdf', 'mixed.pdf', pdf_mixed, {'EXTRACT_TABLES': 'true'}),
+    'image_small_png': ('image', 'small.png', image_case((640, 480), 'RGBA', 'PNG'), {'FORMAT': 'jpg'}),
+    'image_photo_jpg': ('image', 'photo.jpg', image_case((4000, 3000), 'RGB', 'JPEG', quality=90),
+                        {'FORMAT': 'jpg', 'WIDTH': '1024'}),
+    'image_photo_webp': ('image', 'photo.webp', image_case((4000, 3000), 'RGB', 'WEBP', quality=90),
+                         {'FORMAT': 'png', 'WIDTH': '1024'}),
+    'image_scan_tiff': ('image', 'scan.tif', image_case((5100, 6600), 'L', 'TIFF'), {'FORMAT': 'webp', 'WIDTH': '1700'}),
+    'image_palette_gif': ('image', 'palette.gif', image_case((1920, 1080), 'P', 'GIF'), {'FORMAT': 'png'})
+}
+
+
+def corpus_path(directory, name, scale):
+    return os.path.join(directory, f'{scale:g}x-{CORPUS[name][1]}')
+
+
+def build_corpus(directory, names, scale):
+    """Generate missing corpus files (each from its own seeded generator, so order does not matter)"""
+    os.makedirs(directory, exist_ok=True)
+    for name in names:
+        path = corpus_path(directory, name, scale)
+        if not os.path.exists(path):
+            temp_path = os.path.join(directory, f'.{os.path.basename(path)}')
+            CORPUS[name][2](temp_path, random.Random(f'{SEED}-{name}'), scale)
+            os.replace(temp_path, path)
+
+
+# --- Cases (run in a child interpreter) ---
+
+def high_water_kb():
+    """VmHWM of this process in kB (None without /proc)"""
+    try:
+        with open('/proc/self/status', encoding='ascii') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def peak_rss_mb():
+    """Peak RSS of this case's process or any worker it waited for, in MB"""
+    # ru_maxrss is kilobytes on Linux, bytes on macOS
+    unit = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    own = high_water_kb()
+    # Linux carries ru_maxrss over exec (it would include the harness); VmHWM starts afresh
+    own = own / 1024 if own is not None else resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / unit
+    return round(max(own, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / unit), 1)
+
+
+def run_csv(path, output_dir, options):
+    sys.path.insert(0, os.path.join(ROOT, 'csv-analyzer'))
+    from analyze_csv import CSVAnalyzer
+
+    analyzer = CSVAnalyzer()
+    options = dict(options)
+    entry = options.pop('entry', 'analyze_csv')
+    # The in-memory entry point refuses payloads above its size cap
+    if entry == 'analyze_csv' and os.path.getsize(path) <= analyzer.max_file_size:
+        with open(path, 'rb') as f:
+            csv_data = f.read()
+        start = time.perf_counter()
+        result = analyzer.analyze_csv(csv_data, options)
+    else:
+        entry = 'analyze_csv_file'
+        start = time.perf_counter()
+        result = analyzer.analyze_csv_file(path, options)
+    seconds = time.perf_counter() - start
+
+    if not result.get('success'):
+        raise Exception(result.get('error') or 'analysis failed')
+    rows = result['analysis']['shape'][0]
+    return {'entry': entry, 'seconds': seconds, 'rows': rows, 'rows_per_second': rows / seconds}
+
+
+def run_pdf(path, output_dir, options):
+    sys.path.insert(0, os.path.join(ROOT, 'pdf-processor'))
+    from extract_pdf import process_from_env
+    from pdf_document import PDFDocument
+
+    os.environ.update(options, INPUT_FILE=path, OUTPUT_FILE=os.path.join(output_dir, 'result'))
+    os.environ.setdefault('OUTPUT_FORMAT', 'json')
+    start = time.perf_counter()
+    output_path = process_from_env()
+    seconds = time.perf_counter() - start
+
+    with PDFDocument(path) as document:
+        pages = document.num_pages
+    return {'entry': 'process_from_env', 'seconds': seconds, 'pages': pages, 'pages_per_second': pages / seconds,
+            'output_bytes': os.path.getsize(output_path)}
+
+
+def run_image(path, output_dir, options):
+    sys.path.insert(0, os.path.join(ROOT, 'image-processor'))
+    from PIL import Image
+    from process_image import convert_image
+
+    with Image.open(path) as img:
+        megapixels = img.width * img.height / 1e6
+    output_file = os.path.join(output_dir, 'result')
+    os.environ.update(options, INPUT_FILE=path, OUTPUT_FILE=output_file)
+    start = time.perf_counter()
+    try:
+        convert_image()
+    except SystemExit:
+        raise Exception('convert_image exited with an error')
+    seconds = time.perf_counter() - start
+    return {'entry': 'convert_image', 'seconds': seconds, 'megapixels': megapixels,
+            'megapixels_per_second': megapixels / seconds,
+            'output_bytes': os.path.getsize(f"{output_file}.{options.get('FORMAT', 'jpg')}")}
+
+
+RUNNERS = {'csv': run_csv, 'pdf': run_pdf, 'image': run_image}
+
+
+def run_case(name, path):
+    """Child side: run one case and print its measurements as one JSON line"""
+    kind, _, _, options = CORPUS[name]
+    # Measure the processor, not the cache in front of it
+    os.environ['RESULT_CACHE'] = 'false'
+    with tempfile.TemporaryDirectory() as output_dir:
+        try:
+            # Processor logging must not mix with the report on stdout
+            with contextlib.redirect_stdout(sys.stderr):
+                result = RUNNERS[kind](path, output_dir, options)
+        except Exception as e:
+            result = {'error': str(e)}
+    result['peak_rss_mb'] = peak_rss_mb()
+    print(json.dumps(result))
+
+
+def measure(name, path, repeat, verbose):
+    """Parent side: run a case ``repeat`` times in fresh interpreters, keep the fastest run"""
+    runs = []
+    for _ in range(repeat):
+        completed = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--case', name, path],
+            stdout=subprocess.PIPE,
+            stderr=None if verbose else subprocess.PIPE
+        )
+        try:
+            runs.append(json.loads(completed.stdout.decode('utf-8').splitlines()[-1]))
+        except (IndexError, ValueError):
+            log = (completed.stderr or b'').decode('utf-8', 'replace')
+            runs.append({'error': f'case exited with code {completed.returncode}: {log[-2000:]}'})
+
+    timed = [run for run in runs if 'seconds' in run]
+    if not timed:
+        return dict(runs[-1], file_bytes=os.path.getsize(path))
+    best = min(timed, key=lambda run: run['seconds'])
+    return dict(best, file_bytes=os.path.getsize(path), runs=[run['seconds'] for run in timed],
+                peak_rss_mb=max(run['peak_rss_mb'] for run in timed))
+
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == '--case':
+        run_case(sys.argv[2], sys.argv[3])
+        return
+    if len(sys.argv) >= 4 and sys.argv[1] == '--build':
+        build_corpus(sys.argv[2], sys.argv[4:], float(sys.argv[3]))
+        return
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--corpus', default=os.path.join(tempfile.gettempdir(), 'processor-bench-corpus'),
+                        help='Directory the synthetic corpus is generated into and reused from')
+    parser.add_argument('--scale', type=float, default=1.0, help='Multiplies rows, pages and pixels')
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--only', action='append', help='Run only cases whose name starts with this (repeatable)')
+    parser.add_argument('--output', help='Also write the JSON report to this file')
+    parser.add_argument('--verbose', action='store_true', help='Show processor logs')
+    args = parser.parse_args()
+
+    names = [name for name in CORPUS if not args.only or any(name.startswith(prefix) for prefix in args.only)]
+    # Generating the corpus grows a process by hundreds of MB; keep that out of the harness the cases fork from
+    subprocess.run([sys.executable, os.path.abspath(__file__), '--build', args.corpus, f'{args.scale:g}', *names], check=True)
+    results = {}
+    for name in names:
+        path = corpus_path(args.corpus, name, args.scale)
+        results[name] = measure(name, path, args.repeat, args.verbose)
+        print(f"{name}: {results[name].get('seconds', results[name].get('error'))}", file=sys.stderr)
+
+    report = json.dumps({
+        'benchmark': 'processors',
+        'python': sys.version.split()[0],
+        'scale': args.scale,
+        'seed': SEED,
+        'cases': results
+    }, indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(report + '\n')
+
+
+if __name__ == '__main__':
+    main()
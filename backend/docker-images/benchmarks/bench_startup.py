@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""Measure cold-start time of the processor scripts.
+
+Each processor is started in a fresh interpreter on its cheapest path (no
+input on stdin, which it answers with an error) and timed end to end. A
+second run under ``python -X importtime`` breaks the start-up down by
+imported module, so a heavy dependency that creeps back onto the start-up
+path shows up by name.
+
+    python bench_startup.py --runs 5 --output startup.json
+    python bench_startup.py --baseline startup.json --threshold 0.25
+
+With ``--baseline`` the run exits with status 1 when a processor's median
+start-up time grew by more than ``--threshold`` (a fraction) over the
+baseline's.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+PROCESSORS = {
+    'csv-analyzer': 'analyze_csv.py',
+    'pdf-processor': 'extract_pdf.py',
+    'image-processor': 'process_image.py'
+}
+
+# Modules that must not be imported before a processor has work to do
+HEAVY_MODULES = ['pandas', 'numpy', 'pyarrow', 'pdfplumber', 'PyPDF2', 'pytesseract', 'pdf2image']
+
+
+def processor_env(processor):
+    """Environment of a bare container run: no INPUT_FILE/OUTPUT_FILE, no worker spool"""
+    env = {key: value for key, value in os.environ.items()
+           if key not in ('INPUT_FILE', 'OUTPUT_FILE', 'WORKER_SPOOL', 'MANIFEST')}
+    env['PYTHONDONTWRITEBYTECODE'] = '1'
+    return env
+
+
+def run_script(processor, extra_args=()):
+    script = os.path.join(ROOT, processor, PROCESSORS[processor])
+    return subprocess.run(
+        [sys.executable, *extra_args, script],
+        stdin=subprocess.DEVNULL,
+        capture_output=True,
+        cwd=os.path.join(ROOT, processor),
+        env=processor_env(processor)
+    )
+
+
+def cold_start(processor, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        run_script(processor)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def import_profile(processor, top):
+    """Cumulative import time per top-level module from ``-X importtime``"""
+    completed = run_script(processor, ['-X', 'importtime'])
+    modules = {}
+    for line in completed.stderr.decode('utf-8', 'replace').splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Top-level entries are the ones without indentation under the name column
+        if name.startswith(' ') and not name.startswith('  '):
+            modules[name.strip()] = int(cumulative) / 1e6
+
+    heaviest = sorted(modules.items(), key=lambda item: item[1], reverse=True)[:top]
+    return {
+        'import_seconds': sum(modules.values()),
+        'heavy_modules': sorted(set(modules) & set(HEAVY_MODULES)),
+        'heaviest': [{'module': name, 'seconds': seconds} for name, seconds in heaviest]
+    }
+
+
+def compare(results, baseline, threshold):
+    """Processors whose median start-up regressed by more than ``threshold``"""
+    regressions = []
+    for processor, result in results.items():
+        previous = baseline.get('processors', {}).get(processor)
+        if not previous:
+            continue
+        ratio = result['median_seconds'] / previous['median_seconds'] - 1
+        result['change'] = ratio
+        if ratio > threshold:
+            regressions.append(processor)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10, help='Heaviest imports to list per processor')
+    parser.add_argument('--processor', action='append', choices=sorted(PROCESSORS),
+                        help='Processor to measure (repeatable, default: all)')
+    parser.add_argument('--output', help='Also write the JSON report to this file')
+    parser.add_argument('--baseline', help='Previous JSON report to compare against')
+    parser.add_argument('--threshold', type=float, default=0.25)
+    args = parser.parse_args()
+
+    results = {}
+    for processor in args.processor or sorted(PROCESSORS):
+        timings = cold_start(processor, args.runs)
+        results[processor] = dict({
+            'min_seconds': min(timings),
+            'median_seconds': statistics.median(timings),
+            'runs': timings
+        }, **import_profile(processor, args.top))
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.threshold)
+
+    report = json.dumps({
+        'benchmark': 'startup',
+        'python': sys.version.split()[0],
+        'processors': results,
+        'regressions': regressions
+    }, indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(report + '\n')
+
+    if regressions:
+        print(f"Start-up regressed for: {', '.join(regressions)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+# Bump when the on-disk layout or key derivation changes
+CACHE_FORMAT_VERSION = 1
+
+
+class ResultCache:
+    """Content-addressed cache of processor output files.
+
+    Entries are keyed on the input file's content hash, the processor name
+    and version, and the normalized options that affect the output. Each
+    entry is a single file under ``directory`` (written atomically, so
+    concurrent containers sharing the volume never see partial entries).
+    A hit refreshes the entry's mtime and the least recently used entries
+    are evicted once the cache grows past ``max_bytes``.
+    """
+
+    def __init__(self, directory, max_bytes=512 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    @classmethod
+    def from_env(cls, default_directory='/output/.cache'):
+        """Build the cache from RESULT_CACHE* env vars (None when disabled)"""
+        if os.getenv('RESULT_CACHE', 'true').lower() == 'false':
+            return None
+        directory = os.getenv('RESULT_CACHE_DIR') or default_directory
+        max_mb = os.getenv('RESULT_CACHE_MAX_MB')
+        max_bytes = int(float(max_mb) * 1024 * 1024) if max_mb else 512 * 1024 * 1024
+        try:
+            os.makedirs(directory, exist_ok=True)
+        except OSError as e:
+            print(f"Result cache disabled ({directory}: {e})", file=sys.stderr)
+            return None
+        return cls(directory, max_bytes)
+
+    def hash_file(self, path, block_size=1024 * 1024):
+        """BLAKE2b digest of a file's content, read in fixed-size blocks"""
+        digest = hashlib.blake2b(digest_size=20)
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(block_size), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def key(self, input_path, processor, version, options):
+        """Cache key for an input file processed with the given options"""
+        identity = json.dumps({
+            'format': CACHE_FORMAT_VERSION,
+            'content': self.hash_file(input_path),
+            'processor': processor,
+            'version': version,
+            'options': options
+        }, sort_keys=True, default=str)
+        return hashlib.blake2b(identity.encode('utf-8'), digest_size=20).hexdigest()
+
+    def entry_path(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def fetch(self, key, output_path):
+        """Copy a cached result to output_path; returns False on a miss"""
+        entry = self.entry_path(key)
+        try:
+            shutil.copyfile(entry, output_path)
+            os.utime(entry)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def store(self, key, output_path):
+        """Add a finished output file to the cache, then enforce the size bound"""
+        entry = self.entry_path(key)
+        try:
+            os.makedirs(os.path.dirname(entry), exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(entry), prefix='.tmp-')
+            os.close(fd)
+            shutil.copyfile(output_path, temp_path)
+            os.replace(temp_path, entry)
+            self.evict()
+        except OSError as e:
+            # The cache is an optimization; a full or read-only volume must not fail the task
+            print(f"Result cache store failed: {e}", file=sys.stderr)
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits in max_bytes"""
+        entries = []
+        total = 0
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.startswith('.tmp-'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
@@ -0,0 +1,130 @@
+import contextlib
+import os
+import resource
+import sys
+import time
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+class StageTimer:
+    """Wall time, CPU time and peak RSS per processing stage.
+
+    A stage entered more than once (a per-chunk parse, a per-page engine)
+    accumulates its times and counts its calls. Peak RSS is the process
+    high-water mark when the stage last ended, so the first stage whose
+    peak jumps is the one that allocated. With ``log`` set, each logged
+    stage is also printed as it ends: a job killed by its timeout still
+    leaves the stages it got through in the container log.
+    """
+
+    def __init__(self, log=None):
+        self.log = log
+        self.stages = {}
+        self.started = time.perf_counter()
+        self.cpu_started = time.process_time()
+
+    @contextlib.contextmanager
+    def stage(self, name, log=True):
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield
+        finally:
+            entry = self.add(name, time.perf_counter() - wall, time.process_time() - cpu)
+            if log and self.log:
+                print(f"Stage {name}: {entry['wall_seconds']:.3f}s wall, {entry['cpu_seconds']:.3f}s CPU, "
+                      f"peak RSS {entry['peak_rss_mb']} MB", file=self.log, flush=True)
+
+    def add(self, name, wall_seconds, cpu_seconds, rss_mb=None):
+        """Account one run of a stage (also for work timed elsewhere, such as a worker process)"""
+        entry = self.stages.setdefault(name, {'wall_seconds': 0.0, 'cpu_seconds': 0.0, 'calls': 0, 'peak_rss_mb': 0.0})
+        entry['wall_seconds'] += wall_seconds
+        entry['cpu_seconds'] += cpu_seconds
+        entry['calls'] += 1
+        entry['peak_rss_mb'] = max(entry['peak_rss_mb'], rss_mb if rss_mb is not None else peak_rss_mb())
+        return entry
+
+    def iterate(self, name, iterable):
+        """Yield from ``iterable``, timing the production of each item as the named stage"""
+        iterator = iter(iterable)
+        while True:
+            wall = time.perf_counter()
+            cpu = time.process_time()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            self.add(name, time.perf_counter() - wall, time.process_time() - cpu)
+            yield item
+
+    def report(self):
+        """The ``timings`` block of a result: totals so far and every stage, rounded"""
+        return {
+            'wall_seconds': round(time.perf_counter() - self.started, 4),
+            'cpu_seconds': round(time.process_time() - self.cpu_started, 4),
+            'peak_rss_mb': peak_rss_mb(),
+            'stages': {
+                name: dict(entry, wall_seconds=round(entry['wall_seconds'], 4), cpu_seconds=round(entry['cpu_seconds'], 4))
+                for name, entry in self.stages.items()
+            }
+        }
+
+
+def profile_mode():
+    """What PROFILE asks for: (cProfile, tracemalloc)"""
+    mode = os.getenv('PROFILE', '').strip().lower()
+    return mode in ('1', 'true', 'cpu', 'all'), mode in ('memory', 'all')
+
+
+@contextlib.contextmanager
+def profiled(output_file, top=40):
+    """Profile the block when PROFILE is set, dumping the results next to ``output_file``.
+
+    PROFILE=1 (or cpu) runs cProfile and writes ``<output_file>.prof``
+    (load with pstats or snakeviz) and ``<output_file>.profile.txt`` (the
+    top functions by cumulative time). PROFILE=memory runs tracemalloc and
+    writes ``<output_file>.memory.txt`` (the traced peak and the allocation
+    sites holding the most memory when the block ends); PROFILE=all does
+    both. Only this process is profiled, not the worker processes it
+    starts. The dumps are written even if the block fails, which is when
+    they are most wanted.
+    """
+    cpu, memory = profile_mode()
+    if not (cpu or memory):
+        yield
+        return
+
+    import cProfile
+    import pstats
+    import tracemalloc
+
+    profiler = cProfile.Profile() if cpu else None
+    if memory:
+        tracemalloc.start(25)
+    if profiler:
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(f"{output_file}.prof")
+            with open(f"{output_file}.profile.txt", 'w', encoding='utf-8') as f:
+                pstats.Stats(profiler, stream=f).sort_stats('cumulative').print_stats(top)
+            print(f"CPU profile saved to: {output_file}.prof", file=sys.stderr)
+        if memory:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            with open(f"{output_file}.memory.txt", 'w', encoding='utf-8') as f:
+                f.write(f"Traced memory: {current / 1e6:.1f} MB current, {peak / 1e6:.1f} MB peak\n\n")
+                for stat in snapshot.statistics('traceback')[:top]:
+                    f.write(f"{stat.size / 1e6:.2f} MB in {stat.count} blocks\n")
+                    f.write('\n'.join(stat.traceback.format(limit=8)) + '\n\n')
+            print(f"Memory profile saved to: {output_file}.memory.txt", file=sys.stderr)
@@ -0,0 +1,298 @@
+import contextlib
+import importlib
+import io
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import tempfile
+import time
+import traceback
+
+
+class SpoolWorker:
+    """Serves processor jobs from a spool directory in warm, long-lived processes.
+
+    A job is a JSON file ``<id>.json`` holding ``{"env": {...}}`` and,
+    optionally, ``"deadline"`` (Unix time after which the submitter no
+    longer waits), placed in ``<spool>/incoming`` by renaming it in so it
+    is never read half written. A worker claims a job by renaming it into
+    ``<spool>/working/<id>@<host>:<pid>.json`` (only one process can win
+    the rename, and the name records the owner), runs the processor's
+    env-mode entry point with the job's variables laid over its own
+    environment (the same INPUT_FILE/OUTPUT_FILE contract as a fresh
+    container), and writes ``<spool>/done/<id>.json`` with the exit code,
+    timing and the captured log.
+
+    Heavy modules are imported once in the supervisor before it forks the
+    workers. Each worker exits after ``max_jobs`` jobs and is replaced, so
+    leaked memory cannot build up. A worker still running a job at its
+    deadline is killed and replaced; results nobody is waiting for any
+    more are deleted. SIGTERM lets running jobs finish.
+    """
+
+    def __init__(self, spool, handler, processes=1, max_jobs=100, poll_interval=0.2, preload=(),
+                 sweep_interval=60, abandon_grace=60):
+        self.spool = spool
+        self.handler = handler
+        self.processes = processes
+        self.max_jobs = max_jobs
+        self.poll_interval = poll_interval
+        self.preload = preload
+        self.sweep_interval = sweep_interval  # Seconds between sweeps of abandoned files
+        self.abandon_grace = abandon_grace  # Seconds past a deadline before its files are abandoned
+        self.incoming = os.path.join(spool, 'incoming')
+        self.working = os.path.join(spool, 'working')
+        self.done = os.path.join(spool, 'done')
+        self.host = socket.gethostname()
+        self.deadlines = {}
+        self.stopping = False
+
+    @classmethod
+    def from_env(cls, handler, preload=()):
+        """Build the worker from WORKER_* env vars"""
+        return cls(
+            os.getenv('WORKER_SPOOL'),
+            handler,
+            processes=int(os.getenv('WORKER_PROCESSES') or 1),
+            max_jobs=int(os.getenv('WORKER_MAX_JOBS') or 100),
+            poll_interval=float(os.getenv('WORKER_POLL_SECONDS') or 0.2),
+            preload=preload
+        )
+
+    def serve(self):
+        """Run the supervisor: keep ``processes`` workers alive until SIGTERM/SIGINT"""
+        for directory in (self.incoming, self.working, self.done):
+            os.makedirs(directory, exist_ok=True)
+        self.requeue_abandoned()
+
+        for module in self.preload:
+            try:
+                importlib.import_module(module)
+            except ImportError:
+                # Optional dependency; the job that needs it reports the error
+                pass
+
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        # Forked workers start with everything the supervisor has imported
+        context = multiprocessing.get_context('fork')
+        workers = []
+        swept = time.monotonic()
+        print(f"Warm worker serving {self.spool} with {self.processes} processes", file=sys.stderr)
+        while not self.stopping:
+            self.kill_overdue(workers)
+            # A worker that died mid-job (killed above, or crashed) leaves its job behind
+            dead = {worker.pid for worker in workers if not worker.is_alive()}
+            if dead:
+                self.requeue_abandoned(dead)
+            workers = [worker for worker in workers if worker.is_alive()]
+            while len(workers) < self.processes and not self.stopping:
+                worker = context.Process(target=self.work)
+                worker.start()
+                workers.append(worker)
+            if time.monotonic() - swept >= self.sweep_interval:
+                self.sweep_abandoned()
+                swept = time.monotonic()
+            time.sleep(self.poll_interval)
+
+        for worker in workers:
+            if worker.is_alive():
+                os.kill(worker.pid, signal.SIGTERM)
+        for worker in workers:
+            worker.join()
+
+    def stop(self, signum=None, frame=None):
+        self.stopping = True
+
+    def owner(self, name):
+        """(job id, host, pid) of a working/ file name; pid is None for an unowned name"""
+        job_id, _, owner = name[:-len('.json')].rpartition('@')
+        host, _, pid = owner.rpartition(':')
+        if not job_id or not pid.isdigit():
+            return name[:-len('.json')], None, None
+        return job_id, host, int(pid)
+
+    def job_deadline(self, path):
+        """Deadline of a job or result file, None when it has none or cannot be read"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                deadline = json.load(f).get('deadline')
+        except (OSError, ValueError, AttributeError):
+            return None
+        return float(deadline) if deadline else None
+
+    def overdue(self, path, grace=0):
+        deadline = self.job_deadline(path)
+        return deadline is not None and time.time() > deadline + grace
+
+    def discard(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def requeue(self, name):
+        """Move a working/ job back to incoming/, or drop it once its deadline has passed"""
+        path = os.path.join(self.working, name)
+        if self.overdue(path):
+            self.discard(path)
+            return
+        job_id, _, _ = self.owner(name)
+        try:
+            os.replace(path, os.path.join(self.incoming, f"{job_id}.json"))
+        except FileNotFoundError:
+            pass
+
+    def requeue_abandoned(self, pids=None):
+        """Requeue jobs whose worker on this host has died (only those of ``pids`` when given).
+
+        Jobs owned by live processes, or by other hosts sharing the spool,
+        are left to their owners.
+        """
+        for name in os.listdir(self.working):
+            if name.startswith('.') or not name.endswith('.json'):
+                continue
+            _, host, pid = self.owner(name)
+            if pids is not None:
+                if host == self.host and pid in pids:
+                    self.requeue(name)
+            elif pid is None or (host == self.host and not pid_alive(pid)):
+                self.requeue(name)
+
+    def kill_overdue(self, workers):
+        """Kill workers still running a job past its deadline; the serve loop replaces them"""
+        running = {worker.pid: worker for worker in workers if worker.is_alive()}
+        names = set()
+        for name in os.listdir(self.working):
+            job_id, host, pid = self.owner(name)
+            if host != self.host or pid not in running:
+                continue
+            names.add(name)
+            path = os.path.join(self.working, name)
+            if name not in self.deadlines:
+                self.deadlines[name] = self.job_deadline(path)
+            deadline = self.deadlines[name]
+            if deadline is None or time.time() <= deadline:
+                continue
+
+            worker = running[pid]
+            print(f"Job {job_id} passed its deadline, killing worker {pid}", file=sys.stderr)
+            os.kill(pid, signal.SIGKILL)
+            worker.join()
+            # The submitter has stopped waiting: no result is published
+            self.discard(path)
+        # Forget deadlines of jobs that have finished
+        self.deadlines = {name: deadline for name, deadline in self.deadlines.items() if name in names}
+
+    def sweep_abandoned(self):
+        """Delete results and orphaned jobs whose deadline passed more than abandon_grace ago"""
+        for directory in (self.done, self.working):
+            for name in os.listdir(directory):
+                if name.startswith('.') or not name.endswith('.json'):
+                    continue
+                path = os.path.join(directory, name)
+                if self.overdue(path, self.abandon_grace):
+                    self.discard(path)
+
+    def claim(self):
+        """Path of the next job, now owned by this process (None when the spool is empty)"""
+        for name in sorted(os.listdir(self.incoming)):
+            if name.startswith('.') or not name.endswith('.json'):
+                continue
+            claimed = os.path.join(self.working, f"{name[:-len('.json')]}@{self.host}:{os.getpid()}.json")
+            try:
+                os.rename(os.path.join(self.incoming, name), claimed)
+            except FileNotFoundError:
+                # Another worker won this one
+                continue
+            return claimed
+        return None
+
+    def work(self):
+        """Worker process loop: run jobs until max_jobs, then exit to be replaced"""
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+        jobs = 0
+        while jobs < self.max_jobs and not self.stopping:
+            path = self.claim()
+            if path is None:
+                time.sleep(self.poll_interval)
+                continue
+            self.run(path)
+            jobs += 1
+
+    def run(self, path):
+        """Run one claimed job and publish its result as done/<job file name>"""
+        started = time.perf_counter()
+        job_id, _, _ = self.owner(os.path.basename(path))
+        log = io.StringIO()
+        exit_code = 0
+        deadline = None
+        saved_env = dict(os.environ)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                job = json.load(f)
+            deadline = job.get('deadline')
+            os.environ.update({key: str(value) for key, value in (job.get('env') or {}).items()})
+
+            with contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+                try:
+                    self.handler()
+                except SystemExit as e:
+                    # Entry points report failure with sys.exit(1), as they would in a container
+                    if e.code is None or isinstance(e.code, int):
+                        exit_code = e.code or 0
+                    else:
+                        print(e.code)
+                        exit_code = 1
+                except Exception:
+                    exit_code = 1
+                    traceback.print_exc()
+        except (OSError, ValueError, AttributeError) as e:
+            exit_code = 1
+            log.write(f"Invalid job file {path}: {e}\n")
+        finally:
+            os.environ.clear()
+            os.environ.update(saved_env)
+
+        result = {
+            'id': job_id,
+            'exit_code': exit_code,
+            'success': exit_code == 0,
+            'seconds': round(time.perf_counter() - started, 4),
+            'worker': os.getpid(),
+            'deadline': deadline,
+            'log': log.getvalue()
+        }
+        # The captured log also goes to the container's own output
+        sys.stderr.write(result['log'])
+        sys.stderr.flush()
+
+        if deadline and time.time() > float(deadline):
+            # Finished after the submitter gave up: nobody will collect the result
+            self.discard(path)
+            return result
+
+        fd, temp_path = tempfile.mkstemp(dir=self.done, prefix='.tmp-')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(result, f)
+        os.replace(temp_path, os.path.join(self.done, f"{job_id}.json"))
+        self.discard(path)
+        return result
+
+
+def pid_alive(pid):
+    """Whether a process with this pid exists on this host"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
@@ -2,126 +2,210 @@
 import sys
 import json
 import traceback
-import tempfile
 import os
-import pandas as pd
-import numpy as np
-from io import StringIO
+from io import BytesIO
 import base64
+from sniffer import CSVSniffer
+from table_sources import SOURCE_ENGINES, detect_format, read_source
+
+# Modules shared by the processor images (copied next to this script in the image)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+from result_cache import ResultCache
+from stage_timer import StageTimer, profiled
+from warm_worker import SpoolWorker
+
+# Part of every result cache key; bump whenever the analysis output changes
+PROCESSOR_VERSION = '2.4'
+
+# pandas/numpy (and the stats kernel built on them) are imported by the
+# methods that read or analyze data, so the stdin error path starts fast; a
+# warm worker imports them before it forks, so no job pays for them
+WARM_MODULES = ['pandas', 'numpy', 'column_stats', 'chart_data', 'pyarrow.csv', 'chardet', 'pyarrow.dataset', 'openpyxl', 'xlrd']
+
+# What each ANALYSIS_TYPE computes. Skipped passes are the expensive ones:
+# per-column regex validity/consistency scans, row hashing for duplicates
+# and distinct-value tracking on numeric columns (unique identifier detection).
+ANALYSIS_TIERS = {
+    'basic': {'quality': False, 'duplicates': False, 'identifiers': False},
+    'quality': {'quality': True, 'duplicates': True, 'identifiers': False},
+    'full': {'quality': True, 'duplicates': True, 'identifiers': True}
+}
+
+# Every section, as the analyzer produced before tiers existed
+DEFAULT_ANALYSIS_TYPE = 'full'
+
+# Values accepted by the API validation schema
+ANALYSIS_TYPE_ALIASES = {
+    'detailed': 'quality',
+    'statistical': 'full'
+}
 
 class CSVAnalyzer:
     def __init__(self):
         self.max_file_size = 10 * 1024 * 1024  
         self.max_rows = 50000  # Maximum rows to process
+        self.chunk_size = 100000  # Rows per chunk in streaming mode
+        self.sniff_bytes = 64 * 1024  # Bytes read for encoding/delimiter detection
+        self.dtype_sample_rows = 10000  # Rows used to infer parse dtypes
+        self.category_max_unique = 1000  # Max distinct strings for 'category' parsing
+        self.arrow_block_size = 16 * 1024 * 1024  # Bytes per pyarrow record batch
+        self.sniffer = CSVSniffer()
         
     def detect_encoding(self, csv_data):
-        """Detect CSV encoding"""
-        encodings = ['utf-8', 'latin-1', 'iso-8859-1', 'cp1252']
-        
-        for encoding in encodings:
-            try:
-                csv_data.decode(encoding)
-                return encoding
-            except UnicodeDecodeError:
-                continue
-        
-        return 'utf-8'  # Default fallback
+        """Detect CSV encoding from the first sniff_bytes of the data"""
+        sample = csv_data[:self.sniff_bytes]
+        encoding, _, _ = self.sniffer.detect_encoding(sample, truncated=len(csv_data) > len(sample))
+        return encoding
     
     def detect_delimiter(self, csv_sample):
         """Detect CSV delimiter"""
-        delimiters = [',', ';', '\t', '|']
-        delimiter_counts = {}
-        
-        for delimiter in delimiters:
-            count = csv_sample.count(delimiter)
-            if count > 0:
-                delimiter_counts[delimiter] = count
-        
-        if delimiter_counts:
-            return max(delimiter_counts, key=delimiter_counts.get)
-        
-        return ','  # Default
+        delimiter, _ = self.sniffer.detect_delimiter(csv_sample)
+        return delimiter
+    
+    def sniff(self, sample, truncated, options):
+        """Resolve encoding and delimiter from options, detecting whatever is missing"""
+        encoding = options.get('encoding')
+        delimiter = options.get('delimiter')
+        detection = {}
+        
+        if not encoding:
+            detection = self.sniffer.sniff(sample, truncated)
+            encoding = detection['encoding']
+            if delimiter:
+                del detection['delimiter_confidence']
+            delimiter = delimiter or detection['delimiter']
+            del detection['encoding'], detection['delimiter']
+        elif not delimiter:
+            text = sample.decode(encoding, errors='ignore')
+            delimiter, confidence = self.sniffer.detect_delimiter(text, truncated)
+            detection = {'delimiter_confidence': round(confidence, 3)}
+        
+        return encoding, delimiter, detection
+    
+    def with_encoding_fallback(self, parse, read_kwargs, detection, fallback=True):
+        """Run parse(), retrying with a fallback encoding while the file fails to decode past the sniffed sample"""
+        fallbacks = self.sniffer.fallback_encodings(read_kwargs['encoding']) if fallback else []
+        while True:
+            try:
+                return parse()
+            except UnicodeDecodeError as e:
+                if not fallbacks:
+                    raise
+                print(f"Decoding as {read_kwargs['encoding']} failed ({e}), retrying as {fallbacks[0]}", file=sys.stderr)
+                detection.setdefault('rejected_encodings', []).append(read_kwargs['encoding'])
+                detection['encoding_confidence'] = 0.5
+                read_kwargs['encoding'] = fallbacks.pop(0)
+    
+    def resolve_analysis_type(self, analysis_type):
+        """Normalize ANALYSIS_TYPE to one of ANALYSIS_TIERS (default: full)"""
+        name = (analysis_type or DEFAULT_ANALYSIS_TYPE).strip().lower()
+        name = ANALYSIS_TYPE_ALIASES.get(name, name)
+        if name not in ANALYSIS_TIERS:
+            raise Exception(f"Unknown analysis type: {analysis_type}. Use one of: {', '.join(ANALYSIS_TIERS)}")
+        return name
+    
+    def resolve_columns(self, columns, has_header=True):
+        """Turn a COLUMNS list or comma-separated string into read_csv usecols"""
+        if not columns:
+            return None
+        if isinstance(columns, str):
+            columns = columns.split(',')
+        columns = [str(col).strip() for col in columns if str(col).strip()]
+        if not columns:
+            return None
+        
+        if has_header:
+            return columns
+        
+        # Headerless files expose generated names column_1..column_N
+        positions = []
+        for col in columns:
+            if not col.startswith('column_') or not col[len('column_'):].isdigit():
+                raise Exception(f"Column '{col}' not found; headerless files use column_1, column_2, ...")
+            positions.append(int(col[len('column_'):]) - 1)
+        return positions
+    
+    def infer_dtypes(self, sample):
+        """Infer compact parse dtypes from a sample DataFrame.
+        
+        Low-cardinality strings become 'category' and floats that survive a
+        float32 round trip become float32. Integers are left to the parser
+        because read_csv silently wraps values that overflow a narrow dtype.
+        """
+        import numpy as np
+        import pandas as pd
+        
+        dtypes = {}
+        for col in sample.columns:
+            series = sample[col]
+            if series.dtype == object:
+                values = series.dropna()
+                unique = values.nunique()
+                if len(values) > 0 and unique <= self.category_max_unique and unique <= len(values) // 2:
+                    dtypes[col] = 'category'
+            elif pd.api.types.is_float_dtype(series.dtype):
+                values = series.dropna().to_numpy()
+                if len(values) > 0 and np.array_equal(values.astype(np.float32).astype(np.float64), values):
+                    dtypes[col] = 'float32'
+        return dtypes
+    
+    def downcast_integers(self, df):
+        """Shrink int64 columns to the narrowest integer type holding their values"""
+        import pandas as pd
+        for col in df.select_dtypes(include=['int64']).columns:
+            df[col] = pd.to_numeric(df[col], downcast='integer')
+        return df
+    
+    def name_columns(self, df, has_header):
+        """Give headerless frames stable column_N names"""
+        if not has_header:
+            df.columns = [f'column_{i + 1}' for i in df.columns]
+        return df
+    
+    def compute_stats(self, df, analysis_type='full', generate_charts=False):
+        """Run the fused statistics kernel over an in-memory DataFrame.
+        
+        Every column is scanned once; basic_analysis, data_quality_check,
+        generate_insights and the chart data all read from the returned
+        DatasetStats.
+        """
+        from column_stats import DatasetStats
+        
+        tier = ANALYSIS_TIERS[self.resolve_analysis_type(analysis_type)]
+        stats = DatasetStats(
+            quantile_sample_size=max(len(df), 1),
+            track_duplicates=tier['duplicates'],
+            check_quality=tier['quality'],
+            track_numeric_cardinality=tier['identifiers'],
+            generate_charts=generate_charts
+        )
+        stats.update(df)
+        return stats
     
-    def basic_analysis(self, df):
+    def basic_analysis(self, df, stats=None):
         """Perform basic statistical analysis"""
-        analysis = {
-            'shape': df.shape,
-            'columns': list(df.columns),
-            'dtypes': df.dtypes.astype(str).to_dict(),
-            'memory_usage': df.memory_usage(deep=True).sum(),
-            'null_counts': df.isnull().sum().to_dict(),
-            'duplicate_rows': df.duplicated().sum()
-        }
-        
-        # Basic statistics for numeric columns
-        numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
-        if numeric_cols:
-            analysis['numeric_summary'] = df[numeric_cols].describe().to_dict()
-        
-        # Basic statistics for string columns
-        string_cols = df.select_dtypes(include=['object']).columns.tolist()
-        if string_cols:
-            analysis['string_summary'] = {}
-            for col in string_cols:
-                analysis['string_summary'][col] = {
-                    'unique_count': df[col].nunique(),
-                    'most_common': df[col].value_counts().head(5).to_dict() if not df[col].empty else {}
-                }
-        
-        return analysis
+        if stats is None:
+            stats = self.compute_stats(df)
+        return stats.basic_analysis()
     
-    def data_quality_check(self, df):
+    def data_quality_check(self, df, stats=None):
         """Perform data quality analysis"""
-        quality = {
-            'completeness': {},
-            'consistency': {},
-            'validity': {}
-        }
-        
-        # Completeness check
-        total_cells = df.shape[0] * df.shape[1]
-        null_cells = df.isnull().sum().sum()
-        quality['completeness']['overall_completeness'] = (total_cells - null_cells) / total_cells * 100
-        
-        for col in df.columns:
-            null_count = df[col].isnull().sum()
-            quality['completeness'][col] = (len(df) - null_count) / len(df) * 100
-        
-        # Consistency checks
-        for col in df.columns:
-            if df[col].dtype == 'object':
-                # Check for mixed case variations
-                if not df[col].empty:
-                    values = df[col].dropna().astype(str)
-                    lower_values = values.str.lower()
-                    consistency_ratio = len(lower_values.unique()) / len(values.unique()) if len(values.unique()) > 0 else 1
-                    quality['consistency'][col] = consistency_ratio * 100
-        
-        # Validity checks (basic patterns)
-        for col in df.columns:
-            if df[col].dtype == 'object' and not df[col].empty:
-                values = df[col].dropna().astype(str)
-                
-                # Email pattern check
-                if 'email' in col.lower() or 'mail' in col.lower():
-                    email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-                    valid_emails = values.str.match(email_pattern).sum()
-                    quality['validity'][f'{col}_email_format'] = valid_emails / len(values) * 100
-                
-                # Phone pattern check (basic)
-                if 'phone' in col.lower() or 'tel' in col.lower():
-                    phone_pattern = r'^\+?[\d\s\-\(\)]{7,}$'
-                    valid_phones = values.str.match(phone_pattern).sum()
-                    quality['validity'][f'{col}_phone_format'] = valid_phones / len(values) * 100
-        
-        return quality
+        if stats is None:
+            stats = self.compute_stats(df)
+        return stats.data_quality_check()
     
-    def generate_insights(self, df, analysis):
+    def generate_insights(self, df, analysis, stats=None):
         """Generate insights and recommendations"""
+        if stats is None:
+            stats = self.compute_stats(df)
+        return self.summarize_insights(df.shape, analysis, stats.potential_ids())
+    
+    def summarize_insights(self, shape, analysis, potential_ids):
+        """Build insights and recommendations from computed statistics"""
         insights = []
         
         # Data size insights
-        rows, cols = df.shape
+        rows, cols = shape
         insights.append(f"Dataset contains {rows:,} rows and {cols} columns")
         
         # Missing data insights
@@ -130,8 +214,9 @@ class CSVAnalyzer:
             insights.append(f"Missing data found in {len(null_cols)} columns: {', '.join(null_cols[:5])}")
         
         # Duplicate data insights
-        if analysis['duplicate_rows'] > 0:
-            insights.append(f"Found {analysis['duplicate_rows']} duplicate rows ({analysis['duplicate_rows']/rows*100:.1f}%)")
+        duplicate_rows = analysis.get('duplicate_rows') or 0
+        if duplicate_rows > 0:
+            insights.append(f"Found {duplicate_rows} duplicate rows ({duplicate_rows/rows*100:.1f}%)")
         
         # Data type insights
         numeric_count = len([col for col, dtype in analysis['dtypes'].items() if 'int' in str(dtype) or 'float' in str(dtype)])
@@ -145,20 +230,25 @@ class CSVAnalyzer:
         # Recommendations
         recommendations = []
         
-        if analysis['duplicate_rows'] > 0:
+        if duplicate_rows > 0:
             recommendations.append("Consider removing duplicate rows to improve data quality")
         
         if len(null_cols) > 0:
             recommendations.append("Address missing data through imputation or removal")
         
-        # Check for potential ID columns
-        potential_ids = []
-        for col in df.columns:
-            if df[col].nunique() == len(df) and not df[col].isnull().any():
-                potential_ids.append(col)
-        
         if potential_ids:
-            recommendations.append(f"Columns {', '.join(potential_ids)} appear to be unique identifiers")
+            error_bounds = analysis.get('error_bounds')
+            if error_bounds:
+                # Approximate mode: a distinct count within the estimate's error
+                # of the row count does not rule out a few duplicates
+                error = max(error_bounds[col]['unique_count']['relative_std_error'] for col in potential_ids)
+                recommendations.append(
+                    f"Columns {', '.join(potential_ids)} are likely unique identifiers "
+                    f"(estimated distinct counts are within ±{3 * error:.1%} of the row count; "
+                    f"duplicates within that margin are not ruled out)"
+                )
+            else:
+                recommendations.append(f"Columns {', '.join(potential_ids)} appear to be unique identifiers")
         
         return {
             'insights': insights,
@@ -184,31 +274,87 @@ class CSVAnalyzer:
             result['error'] = f'File too large. Maximum size is {self.max_file_size // (1024*1024)}MB'
             return result
         
+        import pandas as pd
+        
+        timer = StageTimer(log=sys.stderr)
         try:
-            # Detect encoding
-            encoding = options.get('encoding', self.detect_encoding(csv_data))
-            csv_text = csv_data.decode(encoding)
+            # Detect encoding and delimiter from a bounded sample; the
+            # payload itself is decoded once, by the parser
+            sample = csv_data[:self.sniff_bytes]
+            with timer.stage('sniff'):
+                encoding, delimiter, detection = self.sniff(sample, len(csv_data) > len(sample), options)
+            
+            analysis_type = self.resolve_analysis_type(options.get('analysis_type'))
+            tier = ANALYSIS_TIERS[analysis_type]
+            has_header = options.get('has_header', True)
+            read_kwargs = {
+                'delimiter': delimiter,
+                'encoding': encoding,
+                'header': 0 if has_header else None,
+                'usecols': self.resolve_columns(options.get('columns'), has_header)
+            }
             
-            # Detect delimiter
-            delimiter = options.get('delimiter', self.detect_delimiter(csv_text[:1000]))
+            def parse():
+                # Infer compact dtypes from a sample before the full parse
+                dtypes = None
+                if options.get('optimize_dtypes', True):
+                    with timer.stage('dtype_inference'):
+                        sample = pd.read_csv(BytesIO(csv_data), nrows=self.dtype_sample_rows, **read_kwargs)
+                        dtypes = self.infer_dtypes(sample) or None
+                
+                # Read CSV
+                with timer.stage('parse'):
+                    try:
+                        df = pd.read_csv(
+                            BytesIO(csv_data),
+                            dtype=dtypes,
+                            nrows=self.max_rows,
+                            low_memory=False,
+                            **read_kwargs
+                        )
+                    except UnicodeDecodeError:
+                        raise
+                    except (ValueError, TypeError):
+                        if not dtypes:
+                            raise
+                        # A value outside the sample broke a typed column; parse untyped
+                        df = pd.read_csv(
+                            BytesIO(csv_data),
+                            nrows=self.max_rows,
+                            low_memory=False,
+                            **read_kwargs
+                        )
+                    df = self.name_columns(df, has_header)
+                    if options.get('optimize_dtypes', True):
+                        df = self.downcast_integers(df)
+                return df
+            
+            # The sample can be valid UTF-8 while a later byte is not: an
+            # encoding that was detected rather than given is retried
+            df = self.with_encoding_fallback(parse, read_kwargs, detection, not options.get('encoding'))
+            encoding = read_kwargs['encoding']
             
-            # Read CSV
-            df = pd.read_csv(
-                StringIO(csv_text),
-                delimiter=delimiter,
-                encoding=encoding,
-                nrows=self.max_rows,
-                low_memory=False
-            )
+            # Single pass over every column shared by all report sections
+            with timer.stage('column_stats'):
+                stats = self.compute_stats(df, analysis_type, options.get('generate_charts', False))
             
             # Basic analysis
-            result['analysis'] = self.basic_analysis(df)
+            with timer.stage('basic_analysis'):
+                result['analysis'] = self.basic_analysis(df, stats)
             
             # Data quality analysis
-            result['quality'] = self.data_quality_check(df)
+            if tier['quality']:
+                with timer.stage('data_quality_check'):
+                    result['quality'] = self.data_quality_check(df, stats)
             
             # Generate insights
-            result['insights'] = self.generate_insights(df, result['analysis'])
+            with timer.stage('insights'):
+                result['insights'] = self.generate_insights(df, result['analysis'], stats)
+            
+            # Chart-ready aggregates (histograms, correlation, bars, time series)
+            if options.get('generate_charts', False):
+                with timer.stage('charts'):
+                    result['charts'] = stats.chart_data(options.get('chart_bins'), options.get('chart_points'))
             
             # Sample data (first few rows)
             sample_size = min(5, len(df))
@@ -222,8 +368,11 @@ class CSVAnalyzer:
             result['metadata'] = {
                 'encoding_used': encoding,
                 'delimiter_used': delimiter,
+                'detection': detection,
                 'rows_processed': len(df),
-                'total_file_size': len(csv_data)
+                'total_file_size': len(csv_data),
+                'analysis_type': analysis_type,
+                'timings': timer.report()
             }
             
             result['success'] = True
@@ -234,33 +383,384 @@ class CSVAnalyzer:
         
         return result
 
-def main():
-    try:
-        # Read input from stdin
-        input_data = sys.stdin.buffer.read()
+    def read_sample(self, file_path):
+        """Read the start of a file for encoding and delimiter detection"""
+        with open(file_path, 'rb') as f:
+            sample = f.read(self.sniff_bytes)
         
-        if not input_data:
-            print(json.dumps({'error': 'No input provided'}))
+        return sample
+    
+    def read_chunks(self, file_path, read_kwargs, dtypes, chunk_size, engine='c', memory_map=False):
+        """Yield DataFrame chunks of a CSV file using the pandas C or pyarrow reader"""
+        if engine == 'pyarrow':
+            yield from self.read_chunks_pyarrow(file_path, read_kwargs, dtypes)
             return
+        if engine != 'c':
+            raise Exception(f"Unsupported CSV engine: {engine}")
+        
+        import pandas as pd
+        reader = pd.read_csv(
+            file_path,
+            dtype=dtypes,
+            chunksize=chunk_size,
+            memory_map=memory_map,
+            **read_kwargs
+        )
+        with reader:
+            for chunk in reader:
+                yield chunk
+    
+    def read_chunks_pyarrow(self, file_path, read_kwargs, dtypes):
+        """Yield DataFrame chunks from pyarrow's streaming CSV reader"""
+        try:
+            import pyarrow as pa
+            from pyarrow import csv as pa_csv
+        except ImportError:
+            raise Exception("The pyarrow engine requires the pyarrow package")
+        
+        has_header = read_kwargs['header'] is not None
+        usecols = read_kwargs['usecols']
+        if usecols and not has_header:
+            usecols = [f'f{position}' for position in usecols]
+        
+        column_types = {}
+        for col, dtype in (dtypes or {}).items():
+            name = col if has_header else f'f{col}'
+            if dtype == 'category':
+                column_types[name] = pa.dictionary(pa.int32(), pa.string())
+            elif dtype == 'float32':
+                column_types[name] = pa.float32()
+        
+        read_options = pa_csv.ReadOptions(
+            encoding=read_kwargs['encoding'],
+            block_size=self.arrow_block_size,
+            autogenerate_column_names=not has_header
+        )
+        parse_options = pa_csv.ParseOptions(delimiter=read_kwargs['delimiter'])
+        convert_options = pa_csv.ConvertOptions(
+            include_columns=usecols,
+            column_types=column_types,
+            strings_can_be_null=True
+        )
         
-        # Parse input (expect base64 encoded CSV data and options)
         try:
-            # First try to parse as JSON
-            text_input = input_data.decode('utf-8')
-            data = json.loads(text_input)
+            with pa_csv.open_csv(file_path, read_options, parse_options, convert_options) as reader:
+                for batch in reader:
+                    chunk = batch.to_pandas()
+                    if not has_header:
+                        chunk.columns = [int(name[1:]) for name in chunk.columns]
+                    yield chunk
+        except pa.ArrowInvalid as e:
+            raise ValueError(str(e))
+    
+    def analyze_csv_file(self, file_path, options=None):
+        """Analyze a CSV, Excel, Parquet or Arrow file in chunks with bounded memory (no size or row cap)"""
+        if options is None:
+            options = {}
+        
+        result = {
+            'success': False,
+            'analysis': {},
+            'quality': {},
+            'insights': {},
+            'sample_data': {},
+            'error': ''
+        }
+        
+        import pandas as pd
+        from column_stats import DatasetStats
+        
+        timer = StageTimer(log=sys.stderr)
+        try:
+            source_format = detect_format(file_path, options.get('input_format'))
+            chunk_size = int(options.get('chunk_size') or self.chunk_size)
+            has_header = options.get('has_header', True)
+            analysis_type = self.resolve_analysis_type(options.get('analysis_type'))
+            tier = ANALYSIS_TIERS[analysis_type]
+            approximate = bool(options.get('approximate', False))
+            generate_charts = bool(options.get('generate_charts', False))
+            filters = options.get('filters')
+            if filters and source_format not in ('parquet', 'arrow'):
+                raise Exception("ROW_FILTERS is only supported for Parquet and Arrow input")
             
-            # Decode base64 CSV data
-            csv_data = base64.b64decode(data['csv_data'])
-            options = data.get('options', {})
+            def new_stats():
+                return DatasetStats(
+                    track_duplicates=tier['duplicates'],
+                    check_quality=tier['quality'],
+                    track_numeric_cardinality=tier['identifiers'],
+                    approximate=approximate,
+                    generate_charts=generate_charts
+                )
             
-        except (json.JSONDecodeError, UnicodeDecodeError):
-            # Assume raw CSV data
-            csv_data = input_data
-            options = {}
+            if source_format != 'csv':
+                # Spreadsheet and columnar cells arrive typed: no sniffing or dtype inference
+                encoding = delimiter = None
+                detection = {}
+                engine = SOURCE_ENGINES[source_format]
+                usecols = self.resolve_columns(options.get('columns'), has_header or source_format in ('parquet', 'arrow'))
+                chunks, source_info = read_source(
+                    file_path,
+                    source_format,
+                    has_header,
+                    usecols,
+                    options.get('sheet'),
+                    filters,
+                    chunk_size
+                )
+                stats = new_stats()
+                for chunk in timer.iterate('parse', chunks):
+                    with timer.stage('column_stats', log=False):
+                        stats.update(chunk)
+            else:
+                source_info = {'source_format': source_format}
+                with timer.stage('sniff'):
+                    sample = self.read_sample(file_path)
+                    truncated = len(sample) < os.path.getsize(file_path)
+                    encoding, delimiter, detection = self.sniff(sample, truncated, options)
+                engine = (options.get('engine') or 'c').lower()
+                read_kwargs = {
+                    'delimiter': delimiter,
+                    'encoding': encoding,
+                    'header': 0 if has_header else None,
+                    'usecols': self.resolve_columns(options.get('columns'), has_header)
+                }
+                
+                def parse():
+                    # Infer compact dtypes from a sample before the full parse
+                    dtypes = None
+                    if options.get('optimize_dtypes', True):
+                        with timer.stage('dtype_inference'):
+                            sample_df = pd.read_csv(file_path, nrows=self.dtype_sample_rows, **read_kwargs)
+                            dtypes = self.infer_dtypes(sample_df) or None
+                    
+                    # Typed parsing can fail on values the sample never saw (and the
+                    # pyarrow reader fixes column types from its first block), so the
+                    # untyped C parser is the fallback
+                    attempts = [(engine, dtypes)]
+                    if engine != 'c' or dtypes:
+                        attempts.append(('c', None))
+                    
+                    for attempt, (attempt_engine, attempt_dtypes) in enumerate(attempts):
+                        stats = new_stats()
+                        try:
+                            chunks = self.read_chunks(
+                                file_path,
+                                read_kwargs,
+                                attempt_dtypes,
+                                chunk_size,
+                                attempt_engine,
+                                options.get('memory_map', False)
+                            )
+                            # Parsing and the stats kernel interleave chunk by chunk; each is summed
+                            for chunk in timer.iterate('parse', chunks):
+                                with timer.stage('column_stats', log=False):
+                                    stats.update(self.name_columns(chunk, has_header))
+                            return stats, attempt_engine
+                        except UnicodeDecodeError:
+                            raise
+                        except (ValueError, TypeError) as e:
+                            if attempt == len(attempts) - 1:
+                                raise
+                            print(f"Typed parse with {attempt_engine} engine failed ({e}), retrying untyped", file=sys.stderr)
+                
+                # The sample can be valid UTF-8 while a later byte is not: an
+                # encoding that was detected rather than given is retried
+                stats, engine = self.with_encoding_fallback(parse, read_kwargs, detection, not options.get('encoding'))
+                encoding = read_kwargs['encoding']
+            
+            if stats.rows == 0:
+                raise Exception("CSV file contains no data rows" if source_format == 'csv' else "Input file contains no data rows")
+            
+            with timer.stage('basic_analysis'):
+                result['analysis'] = stats.basic_analysis()
+            if tier['quality']:
+                with timer.stage('data_quality_check'):
+                    result['quality'] = stats.data_quality_check()
+            with timer.stage('insights'):
+                result['insights'] = self.summarize_insights(
+                    result['analysis']['shape'],
+                    result['analysis'],
+                    stats.potential_ids()
+                )
+            if generate_charts:
+                with timer.stage('charts'):
+                    result['charts'] = stats.chart_data(options.get('chart_bins'), options.get('chart_points'))
+            
+            result['sample_data'] = {
+                'head': stats.head.to_dict('records'),
+                'columns': list(stats.head.columns)
+            }
+            
+            result['metadata'] = {
+                **source_info,
+                'encoding_used': encoding,
+                'delimiter_used': delimiter,
+                'detection': detection,
+                'rows_processed': stats.rows,
+                'total_file_size': os.path.getsize(file_path),
+                'mode': 'approximate' if approximate else 'stream',
+                'analysis_type': analysis_type,
+                'engine': engine,
+                'chunks_processed': stats.chunks,
+                'approximations': stats.approximations(),
+                'timings': timer.report()
+            }
+            
+            result['success'] = True
+            
+        except Exception as e:
+            result['error'] = str(e)
+            result['traceback'] = traceback.format_exc()
         
-        # Analyze the CSV
-        analyzer = CSVAnalyzer()
-        result = analyzer.analyze_csv(csv_data, options)
+        return result
+
+def process_from_env():
+    """Analyze a mounted CSV file using environment variables (Docker mode)"""
+    
+    # Get environment variables
+    input_file = os.getenv('INPUT_FILE')
+    output_file = os.getenv('OUTPUT_FILE')
+    delimiter = os.getenv('DELIMITER', '')
+    has_header = os.getenv('HAS_HEADER', 'true').lower() != 'false'
+    analysis_type = os.getenv('ANALYSIS_TYPE') or DEFAULT_ANALYSIS_TYPE
+    columns = os.getenv('COLUMNS', '')
+    engine = os.getenv('CSV_ENGINE', 'c')
+    approximate = os.getenv('APPROXIMATE', 'false').lower() == 'true'
+    input_format = os.getenv('INPUT_FORMAT', '')
+    sheet = os.getenv('SHEET', '')
+    row_filters = os.getenv('ROW_FILTERS', '')
+    generate_charts = os.getenv('GENERATE_CHARTS', 'false').lower() == 'true'
+    chart_bins = int(os.getenv('CHART_BINS') or 0) or None
+    chart_points = int(os.getenv('CHART_POINTS') or 0) or None
+    
+    print(f"Processing: {input_file}", file=sys.stderr)
+    print(f"Output: {output_file}", file=sys.stderr)
+    print(f"Analysis type: {analysis_type}", file=sys.stderr)
+    
+    if not input_file or not output_file:
+        raise Exception("INPUT_FILE and OUTPUT_FILE environment variables are required")
+    
+    if not os.path.exists(input_file):
+        raise Exception(f"Input file not found: {input_file}")
+    
+    # [[column, op, value], ...] pushed down into Parquet/Arrow scans
+    filters = None
+    if row_filters.strip():
+        try:
+            filters = json.loads(row_filters)
+        except json.JSONDecodeError as e:
+            raise Exception(f"ROW_FILTERS must be a JSON list of [column, op, value] filters: {str(e)}")
+    
+    options = {
+        'delimiter': delimiter,
+        'has_header': has_header,
+        'analysis_type': analysis_type,
+        'columns': columns,
+        'engine': engine,
+        'approximate': approximate,
+        'memory_map': engine == 'c',
+        'input_format': input_format,
+        'sheet': sheet,
+        'filters': filters,
+        'generate_charts': generate_charts,
+        'chart_bins': chart_bins,
+        'chart_points': chart_points
+    }
+    analyzer = CSVAnalyzer()
+    output_path = f"{output_file}.json"
+    
+    # Identical file + options: reuse the stored analysis
+    cache = ResultCache.from_env()
+    if cache:
+        cache_key = cache.key(input_file, 'csv-analyzer', PROCESSOR_VERSION, {
+            'delimiter': delimiter or None,
+            'has_header': has_header,
+            'analysis_type': analyzer.resolve_analysis_type(analysis_type),
+            'columns': [column.strip() for column in columns.split(',') if column.strip()],
+            'engine': engine.lower(),
+            'approximate': approximate,
+            'input_format': input_format.strip().lower() or None,
+            'sheet': sheet.strip() or None,
+            'filters': filters,
+            'generate_charts': generate_charts,
+            'chart_bins': chart_bins,
+            'chart_points': chart_points
+        })
+        if cache.fetch(cache_key, output_path):
+            print(f"Cache hit. Output saved to: {output_path}", file=sys.stderr)
+            return output_path
+    
+    # Stream the file straight from the mount; nothing goes through stdin/stdout
+    with profiled(output_path):
+        result = analyzer.analyze_csv_file(input_file, options)
+    
+    if not result['success']:
+        raise Exception(result['error'])
+    
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2, default=str)
+    
+    if cache:
+        cache.store(cache_key, output_path)
+    
+    print(f"Analysis completed successfully. Output saved to: {output_path}", file=sys.stderr)
+    print(f"Analyzed {result['metadata']['rows_processed']:,} rows", file=sys.stderr)
+    
+    return output_path
+
+def process_from_stdin():
+    """Analyze CSV data from stdin (original mode)"""
+    # Read input from stdin
+    input_data = sys.stdin.buffer.read()
+    
+    if not input_data:
+        return {'error': 'No input provided'}
+    
+    # Parse input (expect base64 encoded CSV data and options)
+    try:
+        # First try to parse as JSON
+        text_input = input_data.decode('utf-8')
+        data = json.loads(text_input)
+        
+        # Decode base64 CSV data
+        csv_data = base64.b64decode(data['csv_data'])
+        options = data.get('options', {})
+        
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        # Assume raw CSV data
+        csv_data = input_data
+        options = {}
+    
+    # Analyze the CSV
+    analyzer = CSVAnalyzer()
+    return analyzer.analyze_csv(csv_data, options)
+
+def run_from_env():
+    """Docker mode: failures are printed as a JSON error and exit with code 1"""
+    try:
+        process_from_env()
+    except Exception as e:
+        error_result = {
+            'success': False,
+            'error': f'Analysis error: {str(e)}',
+            'traceback': traceback.format_exc()
+        }
+        print(json.dumps(error_result), file=sys.stderr)
+        sys.exit(1)
+
+def main():
+    # Warm worker mode: spooled jobs run in this process, already imported
+    if os.getenv('WORKER_SPOOL'):
+        SpoolWorker.from_env(run_from_env, preload=WARM_MODULES).serve()
+        return
+    
+    # Check if running in Docker environment mode (with env vars)
+    if os.getenv('INPUT_FILE') and os.getenv('OUTPUT_FILE'):
+        run_from_env()
+        return
+    
+    try:
+        result = process_from_stdin()
         
         # Output result as JSON
         print(json.dumps(result, ensure_ascii=False, indent=2, default=str))
@@ -274,4 +774,4 @@ def main():
         print(json.dumps(error_result))
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,381 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+try:
+    from pandas.tseries.api import guess_datetime_format
+except ImportError:  # pandas < 2.2
+    from pandas._libs.tslibs.parsing import guess_datetime_format
+
+# Shape of the GENERATE_CHARTS output
+HISTOGRAM_BINS = 20
+MAX_AUTO_BINS = 200
+SERIES_POINTS = 200
+CATEGORY_BARS = 20
+MAX_CORRELATION_COLUMNS = 50
+MAX_TIME_COLUMNS = 5
+MAX_SERIES_COLUMNS = 10
+
+# Fine bins held while streaming; reported bins are merged from these, so a
+# reported bin edge is off by at most one fine bin
+RESOLUTION = 4096
+
+# Text columns are charted as time when this share of a sample parses as dates
+TIME_SAMPLE_ROWS = 200
+TIME_PARSE_RATIO = 0.9
+
+NAT = np.iinfo(np.int64).min
+
+
+def compact(values, digits=None):
+    """A float array as a JSON-ready list, NaN as None"""
+    values = np.asarray(values, dtype=np.float64)
+    if digits is not None:
+        values = np.round(values, digits)
+    return [None if math.isnan(value) else value for value in values.tolist()]
+
+
+class StreamingBins:
+    """Equal-width bins over a range that is not known in advance.
+
+    The grid starts at the first batch's range with a power-of-two width.
+    A value outside it moves the grid's origin and, when the range no
+    longer fits, doubles the width until it does, merging whole bins; no
+    count is lost and no data is read twice. Besides the count, each bin can keep the min and max of
+    named companion arrays (a min/max series downsampled over the grid).
+    """
+
+    def __init__(self, resolution=RESOLUTION):
+        self.resolution = resolution
+        self.width = None
+        self.origin = None
+        self.low = None
+        self.high = None
+        self.counts = np.zeros(resolution, dtype=np.int64)
+        self.extrema = {}
+
+    def _start(self, low, high):
+        span = high - low
+        if span > 0:
+            exponent = math.floor(math.log2(span / self.resolution)) + 1
+        else:
+            # A single value so far: start narrow, the grid widens as needed
+            exponent = math.frexp(low)[1] - 30 if low else -30
+        self.width = math.ldexp(1.0, exponent)
+        self.origin = low
+
+    def _cover(self, low, high):
+        if self.width is None:
+            self._start(low, high)
+            return
+        if low >= self.origin and high < self.origin + self.width * self.resolution:
+            return
+
+        # Keep what is already counted: the new grid starts on an old bin
+        # edge and its width is a power-of-two multiple, so old bins merge
+        # whole into new ones
+        occupied = np.flatnonzero(self.counts)
+        low = min(low, self.origin + occupied[0] * self.width)
+        high = max(high, self.origin + occupied[-1] * self.width)
+        shift = math.floor((low - self.origin) / self.width)
+        factor = 1
+        while high >= self.origin + (shift + self.resolution * factor) * self.width:
+            factor *= 2
+
+        index = np.clip((np.arange(self.resolution) - shift) // factor, 0, self.resolution - 1)
+        self.origin += shift * self.width
+        self.width *= factor
+        self.counts = np.bincount(index, weights=self.counts, minlength=self.resolution).astype(np.int64)
+        for name, (mins, maxs) in self.extrema.items():
+            merged_min = np.full(self.resolution, np.nan)
+            merged_max = np.full(self.resolution, np.nan)
+            np.fmin.at(merged_min, index, mins)
+            np.fmax.at(merged_max, index, maxs)
+            self.extrema[name] = (merged_min, merged_max)
+
+    def add(self, positions, series=None):
+        """Count finite ``positions``; ``series`` maps names to arrays aligned with them"""
+        finite = np.isfinite(positions)
+        if not finite.all():
+            positions = positions[finite]
+            series = {name: values[finite] for name, values in (series or {}).items()}
+        if len(positions) == 0:
+            return
+
+        low = float(positions.min())
+        high = float(positions.max())
+        self._cover(low, high)
+        self.low = low if self.low is None else min(self.low, low)
+        self.high = high if self.high is None else max(self.high, high)
+        index = ((positions - self.origin) / self.width).astype(np.int64)
+        np.clip(index, 0, self.resolution - 1, out=index)
+        self.counts += np.bincount(index, minlength=self.resolution)
+        if not series:
+            return
+
+        # One sort per batch, then every series reduces over the same runs
+        order = np.argsort(index, kind='stable')
+        ordered = index[order]
+        starts = np.flatnonzero(np.r_[True, ordered[1:] != ordered[:-1]])
+        bins = ordered[starts]
+        for name, values in series.items():
+            values = values[order]
+            if name not in self.extrema:
+                self.extrema[name] = (np.full(self.resolution, np.nan), np.full(self.resolution, np.nan))
+            mins, maxs = self.extrema[name]
+            mins[bins] = np.fmin(mins[bins], np.fmin.reduceat(values, starts))
+            maxs[bins] = np.fmax(maxs[bins], np.fmax.reduceat(values, starts))
+
+    def span(self):
+        """(min, max) of the values added so far, or None before the first"""
+        if self.low is None:
+            return None
+        return self.low, self.high
+
+    def rebin(self, low, high, bins):
+        """(edges, counts, {name: (mins, maxs)}) for ``bins`` equal-width bins over [low, high]"""
+        span = high - low
+        if span <= 0 or bins < 1:
+            bins = 1
+            target = np.zeros(self.resolution, dtype=np.int64)
+        else:
+            # A fine bin goes where its left edge falls: every value in it is
+            # at least that, which keeps discrete values on the right side of
+            # an edge they sit exactly on
+            starts = self.origin + np.arange(self.resolution) * self.width
+            target = np.floor((starts - low) / span * bins + 1e-9).astype(np.int64)
+            np.clip(target, 0, bins - 1, out=target)
+        edges = np.linspace(low, high, bins + 1)
+        counts = np.bincount(target, weights=self.counts, minlength=bins).astype(np.int64)
+        extrema = {}
+        for name, (mins, maxs) in self.extrema.items():
+            merged_min = np.full(bins, np.nan)
+            merged_max = np.full(bins, np.nan)
+            np.fmin.at(merged_min, target, mins)
+            np.fmax.at(merged_max, target, maxs)
+            extrema[name] = (merged_min, merged_max)
+        return edges, counts, extrema
+
+
+def auto_bin_count(count, low, high, q25, q75):
+    """Bin count of numpy's 'auto' rule: the narrower of Freedman-Diaconis and Sturges"""
+    span = high - low
+    if count < 2 or span <= 0:
+        return 1, 'sturges'
+    sturges = span / (math.log2(count) + 1)
+    iqr = q75 - q25
+    fd = 2 * iqr * count ** (-1 / 3) if iqr > 0 else 0
+    rule, width = ('fd', fd) if 0 < fd < sturges else ('sturges', sturges)
+    return min(int(math.ceil(span / width)), MAX_AUTO_BINS), rule
+
+
+def histogram(bins, count, low, high, size, q25=None, q75=None):
+    """A fixed ``size`` histogram, or the 'auto' rule's when quartiles are given"""
+    if not (math.isfinite(low) and math.isfinite(high)):
+        # Infinities are not binned; fall back to the finite values' range
+        low, high = bins.span()
+    rule = 'fixed'
+    if q25 is not None:
+        size, rule = auto_bin_count(count, low, high, q25, q75)
+    edges, counts, _ = bins.rebin(low, high, size)
+    return {
+        'rule': rule,
+        'edges': compact(edges),
+        'counts': counts.tolist(),
+        # Values within this distance of an edge may be counted in the neighbouring bin
+        'edge_tolerance': bins.width
+    }
+
+
+def time_format(series):
+    """strptime format of a text column whose sampled values parse as dates, else None"""
+    values = series.dropna()
+    if values.empty:
+        return None
+    # Spread over the chunk: the first rows alone rarely tell 01/03 from 03/01
+    step = max(len(values) // TIME_SAMPLE_ROWS, 1)
+    sample = values.iloc[::step].head(TIME_SAMPLE_ROWS).astype(str)
+
+    best, best_ratio = None, 0.0
+    for dayfirst in (False, True):
+        fmt = guess_datetime_format(sample.iloc[0], dayfirst=dayfirst)
+        # Bare years and times read as numbers or labels, not as a time axis
+        if not fmt or fmt == best or not any(code in fmt for code in ('%d', '%m', '%b', '%B')):
+            continue
+        ratio = pd.to_datetime(sample, format=fmt, errors='coerce', utc=True).notna().mean()
+        if ratio > best_ratio:
+            best, best_ratio = fmt, ratio
+    return best if best_ratio >= TIME_PARSE_RATIO else None
+
+
+def to_nanoseconds(series, fmt=None):
+    """int64 UTC nanoseconds of a datetime (or ``fmt`` formatted text) column, NaT as NAT"""
+    if fmt is not None:
+        series = pd.to_datetime(series, format=fmt, errors='coerce', utc=True)
+    elif not pd.api.types.is_datetime64_any_dtype(series.dtype):
+        return np.full(len(series), NAT, dtype=np.int64)
+    if isinstance(series.dtype, pd.DatetimeTZDtype):
+        series = series.dt.tz_convert(None)
+    return series.to_numpy(dtype='datetime64[ns]').view(np.int64)
+
+
+def is_plain_numeric(dtype):
+    return pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+
+
+class ChartAccumulator:
+    """Chart aggregates that need more than one column at a time.
+
+    Folds each chunk's numeric columns into pairwise correlation moments
+    and each time column into a downsampled min/max series of those
+    numeric columns. Per-column histograms live on the column
+    accumulators, which already hold every numeric chunk as float64.
+    """
+
+    def __init__(self):
+        self.numeric = None
+        self.time_columns = {}
+        self.series = {}
+        self.shift = None
+        self.pairs = None
+        self.sums = None
+        self.squares = None
+        self.products = None
+
+    def _start(self, chunk):
+        self.numeric = [col for col in chunk.columns if is_plain_numeric(chunk[col].dtype)][:MAX_CORRELATION_COLUMNS]
+        for col in chunk.columns:
+            if len(self.time_columns) >= MAX_TIME_COLUMNS:
+                break
+            dtype = chunk[col].dtype
+            if pd.api.types.is_datetime64_any_dtype(dtype):
+                self.time_columns[col] = None
+            elif dtype == object or isinstance(dtype, pd.CategoricalDtype):
+                fmt = time_format(chunk[col])
+                if fmt:
+                    self.time_columns[col] = fmt
+        self.series = {col: StreamingBins() for col in self.time_columns}
+        k = len(self.numeric)
+        self.pairs = np.zeros((k, k))
+        self.sums = np.zeros((k, k))
+        self.squares = np.zeros((k, k))
+        self.products = np.zeros((k, k))
+
+    def update(self, chunk):
+        """Fold one DataFrame chunk into the correlation moments and time series"""
+        if self.numeric is None:
+            self._start(chunk)
+
+        matrix = np.full((len(chunk), len(self.numeric)), np.nan)
+        for i, col in enumerate(self.numeric):
+            # A column that turns to text later is dropped from the report
+            if col in chunk and is_plain_numeric(chunk[col].dtype):
+                matrix[:, i] = chunk[col].to_numpy(dtype=np.float64, na_value=np.nan)
+        matrix[~np.isfinite(matrix)] = np.nan
+
+        if self.numeric and len(chunk):
+            self._update_moments(matrix)
+
+        plotted = {col: matrix[:, i] for i, col in enumerate(self.numeric[:MAX_SERIES_COLUMNS])}
+        for col, fmt in self.time_columns.items():
+            if col not in chunk:
+                continue
+            ns = to_nanoseconds(chunk[col], fmt)
+            valid = ns != NAT
+            if valid.any():
+                self.series[col].add(
+                    ns[valid].astype(np.float64),
+                    {name: values[valid] for name, values in plotted.items()}
+                )
+
+    def _update_moments(self, matrix):
+        if self.shift is None:
+            # Moments about the first chunk's means, so the sums stay small
+            present = (~np.isnan(matrix)).sum(axis=0)
+            self.shift = np.nansum(matrix, axis=0) / np.maximum(present, 1)
+        x = matrix - self.shift
+        present = ~np.isnan(x)
+        if present.all():
+            self.pairs += len(x)
+            self.sums += x.sum(axis=0)[:, None]
+            self.squares += (x * x).sum(axis=0)[:, None]
+        else:
+            # Pairwise-complete: each pair counts only rows where both are present
+            x = np.where(present, x, 0.0)
+            weights = present.astype(np.float64)
+            self.pairs += weights.T @ weights
+            self.sums += x.T @ weights
+            self.squares += (x * x).T @ weights
+        self.products += x.T @ x
+
+    def correlation(self, columns):
+        """Pearson correlation matrix (as ``DataFrame.corr()``) of the columns still numeric"""
+        keep = [i for i, col in enumerate(self.numeric or []) if columns[col].is_numeric]
+        if len(keep) < 2:
+            return None
+        index = np.ix_(keep, keep)
+        n = self.pairs[index]
+        sx = self.sums[index]
+        sxx = self.squares[index]
+        covariance = n * self.products[index] - sx * sx.T
+        with np.errstate(all='ignore'):
+            r = covariance / np.sqrt((n * sxx - sx * sx) * (n * sxx.T - sx.T * sx.T))
+        r[n < 2] = np.nan
+        np.clip(r, -1, 1, out=r)
+        return {
+            'columns': [self.numeric[i] for i in keep],
+            'matrix': [compact(row, 6) for row in r]
+        }
+
+    def time_series(self, col, columns, points):
+        """Non-empty buckets of one time column: row counts and the min/max of numeric columns"""
+        bins = self.series[col]
+        if bins.span() is None:
+            return None
+        start, end = bins.span()
+        edges, counts, extrema = bins.rebin(start, end, points)
+        nonempty = counts > 0
+        timestamps = pd.to_datetime(edges[:-1][nonempty].astype(np.int64), unit='ns')
+        return {
+            'format': self.time_columns[col],
+            'bucket_seconds': (end - start) / len(counts) / 1e9,
+            'timestamps': [stamp.isoformat() for stamp in timestamps],
+            'counts': counts[nonempty].tolist(),
+            'series': {
+                name: {'min': compact(mins[nonempty]), 'max': compact(maxs[nonempty])}
+                for name, (mins, maxs) in extrema.items()
+                if columns[name].is_numeric
+            }
+        }
+
+    def report(self, columns, bins=HISTOGRAM_BINS, points=SERIES_POINTS, bars=CATEGORY_BARS):
+        """The ``charts`` section from these aggregates and the column accumulators"""
+        charts = {
+            'histograms': {},
+            'correlation': self.correlation(columns),
+            'categories': {},
+            'time_series': {}
+        }
+        for col, acc in columns.items():
+            if acc.is_numeric and acc.histogram is not None and acc.histogram.span() is not None:
+                q25, q75 = acc.reservoir.quantiles([0.25, 0.75])
+                charts['histograms'][col] = {
+                    'fixed': histogram(acc.histogram, acc.count, acc.min, acc.max, bins),
+                    'auto': histogram(acc.histogram, acc.count, acc.min, acc.max, bins, q25, q75)
+                }
+            elif acc.is_text and col not in self.time_columns:
+                non_null = acc.rows - acc.nulls
+                # Identifier-like columns (mostly distinct) make no useful bar chart
+                if non_null and acc.unique_count <= max(bars, non_null // 2):
+                    top = acc.most_common(bars)
+                    charts['categories'][col] = {
+                        'values': [str(value) for value in top],
+                        'counts': [int(count) for count in top.values()],
+                        'other': max(non_null - int(sum(top.values())), 0)
+                    }
+        for col in self.time_columns:
+            series = self.time_series(col, columns, points)
+            if series:
+                charts['time_series'][col] = series
+        return charts
@@ -0,0 +1,507 @@
+import numpy as np
+import pandas as pd
+from collections import Counter
+
+from chart_data import ChartAccumulator, StreamingBins
+from sketches import CountMinTopK, DuplicateSketch, HyperLogLog, QuantileSketch
+from validators import VALIDATORS, select
+
+
+def hash_values(values):
+    """Hash an array of values to uint64 using pandas' stable hashing"""
+    if len(values) == 0:
+        return np.empty(0, dtype=np.uint64)
+    return pd.util.hash_array(np.asarray(values), categorize=False)
+
+
+def is_numeric_dtype(dtype):
+    """True for int/float dtypes (bool is reported as text, like ``describe()``)"""
+    return pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+
+
+def logical_dtype(dtype):
+    """Map a parsed dtype to the dtype plain ``read_csv`` would have produced.
+
+    Downcast storage types (int8, float32, category) are an implementation
+    detail of the parser and are reported as int64, float64 and object.
+    """
+    if isinstance(dtype, pd.CategoricalDtype):
+        return np.dtype(object)
+    if pd.api.types.is_bool_dtype(dtype):
+        return np.dtype(bool)
+    if pd.api.types.is_integer_dtype(dtype):
+        return np.dtype(np.int64)
+    if pd.api.types.is_float_dtype(dtype):
+        return np.dtype(np.float64)
+    return np.dtype(object)
+
+
+def widen_dtype(current, incoming):
+    """Return the dtype a single ``read_csv`` would give two differing chunks"""
+    incoming = logical_dtype(incoming)
+    if current is None or current == incoming:
+        return incoming
+    if is_numeric_dtype(current) and is_numeric_dtype(incoming):
+        return np.result_type(current, incoming)
+    return np.dtype(object)
+
+
+class HashSet:
+    """Set of uint64 hashes kept as sorted numpy arrays (8 bytes per entry)"""
+
+    def __init__(self, min_merge_size=65536):
+        self.min_merge_size = min_merge_size
+        self._merged = np.empty(0, dtype=np.uint64)
+        self._pending = []
+        self._pending_size = 0
+
+    def add(self, hashes):
+        """Add a batch of hashes"""
+        if len(hashes) == 0:
+            return
+        batch = np.unique(hashes)
+        self._pending.append(batch)
+        self._pending_size += len(batch)
+
+        # Merge geometrically so every hash is only re-sorted O(log n) times
+        if self._pending_size >= max(len(self._merged), self.min_merge_size):
+            self._compact()
+
+    def _compact(self):
+        if not self._pending:
+            return
+        merged = np.concatenate([self._merged] + self._pending)
+        merged.sort(kind='stable')
+        keep = np.empty(len(merged), dtype=bool)
+        keep[:1] = True
+        np.not_equal(merged[1:], merged[:-1], out=keep[1:])
+        self._merged = merged[keep]
+        self._pending = []
+        self._pending_size = 0
+
+    def __len__(self):
+        self._compact()
+        return len(self._merged)
+
+
+class Reservoir:
+    """Uniform fixed-size sample of a numeric stream (used for quantiles)"""
+
+    def __init__(self, size, seed=0):
+        self.size = size
+        self.values = None
+        self.filled = 0
+        self.seen = 0
+        self.rng = np.random.default_rng(seed)
+
+    def add(self, values):
+        """Add a batch of non-null float values"""
+        n = len(values)
+        if n == 0:
+            return
+        if self.values is None:
+            self.values = np.empty(self.size, dtype=np.float64)
+
+        # Fill the reservoir first
+        take = min(self.size - self.filled, n)
+        if take > 0:
+            self.values[self.filled:self.filled + take] = values[:take]
+            self.filled += take
+            self.seen += take
+            values = values[take:]
+            n -= take
+        if n == 0:
+            return
+
+        # Vectorized Algorithm R: item t is kept with probability size / t
+        positions = self.seen + np.arange(1, n + 1, dtype=np.float64)
+        accepted = self.rng.random(n) < (self.size / positions)
+        count = int(accepted.sum())
+        if count:
+            slots = self.rng.integers(0, self.size, size=count)
+            self.values[slots] = values[accepted]
+        self.seen += n
+
+    def quantiles(self, qs):
+        """Return linearly interpolated quantiles of the sample"""
+        if self.filled == 0:
+            return [np.nan for _ in qs]
+        return list(np.percentile(self.values[:self.filled], [q * 100 for q in qs]))
+
+    @property
+    def exact(self):
+        return self.seen <= self.size
+
+
+class ColumnAccumulator:
+    """Mergeable per-column statistics fed one chunk at a time.
+
+    Columns whose inferred dtype changes between chunks (e.g. a numeric
+    column that later contains text) are reported with the widened dtype,
+    like a single ``read_csv`` call would do.
+    """
+
+    def __init__(self, name, top_k_capacity=100000, quantile_sample_size=50000,
+                 check_quality=True, track_numeric_cardinality=True, track_histogram=False,
+                 validators=None):
+        self.name = name
+        self.check_quality = check_quality
+        self.track_numeric_cardinality = track_numeric_cardinality
+        self.dtype = None
+        self.rows = 0
+        self.nulls = 0
+
+        # Cardinality
+        self.distinct = self._make_distinct()
+        self.folded = self._make_distinct()
+
+        # Most common values (text columns only)
+        self.top_k_capacity = top_k_capacity
+        self.value_counts = Counter()
+        self.top_k_exact = True
+
+        # Numeric moments (Chan et al. parallel variance)
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+        self.reservoir = self._make_quantiles(quantile_sample_size)
+        self.histogram = StreamingBins() if track_histogram else None
+
+        # Format validity: validators are chosen from the name and the
+        # first text chunk's distinct values, then run on every chunk's
+        self.registry = VALIDATORS if validators is None else validators
+        self.validators = None if check_quality else {}
+        self.validity_total = 0
+        self.valid_counts = Counter()
+
+    def _make_distinct(self):
+        return HashSet()
+
+    def _make_quantiles(self, sample_size):
+        return Reservoir(sample_size)
+
+    @property
+    def is_numeric(self):
+        return self.dtype is not None and is_numeric_dtype(self.dtype)
+
+    @property
+    def is_text(self):
+        return self.dtype is not None and self.dtype == np.dtype(object)
+
+    def update(self, series):
+        """Fold one chunk of the column into the running statistics.
+
+        Each chunk is scanned once: numeric columns through a single float64
+        view, everything else through one ``value_counts()`` whose distinct
+        values feed cardinality, case folding, top-k and validity checks.
+        """
+        self.dtype = widen_dtype(self.dtype, series.dtype)
+        total = len(series)
+        self.rows += total
+
+        if is_numeric_dtype(series.dtype):
+            if isinstance(series.dtype, np.dtype):
+                arr = np.asarray(series.to_numpy(), dtype=np.float64)
+            else:
+                # Nullable extension types need their NA mapped to NaN
+                arr = series.to_numpy(dtype=np.float64, na_value=np.nan)
+            arr = arr[~np.isnan(arr)]
+            self.nulls += total - len(arr)
+            if len(arr):
+                self._update_numeric(arr)
+        else:
+            counts = series.value_counts()
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                counts = counts[counts > 0]
+            self.nulls += total - int(counts.sum())
+            if len(counts):
+                self._update_text(counts)
+
+    def _update_numeric(self, arr):
+        if self.track_numeric_cardinality:
+            self.distinct.add(hash_values(arr))
+        self.reservoir.add(arr)
+        if self.histogram is not None:
+            self.histogram.add(arr)
+
+        n_b = len(arr)
+        mean_b = float(arr.mean())
+        m2_b = float(((arr - mean_b) ** 2).sum())
+        n_a = self.count
+        n = n_a + n_b
+        delta = mean_b - self.mean
+        self.mean += delta * n_b / n
+        self.m2 += m2_b + delta * delta * n_a * n_b / n
+        self.count = n
+
+        chunk_min = float(arr.min())
+        chunk_max = float(arr.max())
+        self.min = chunk_min if self.min is None else min(self.min, chunk_min)
+        self.max = chunk_max if self.max is None else max(self.max, chunk_max)
+
+    def _update_text(self, counts):
+        # Typed cells (Excel dates, Parquet timestamps, mixed numbers and
+        # text) are profiled as the strings a CSV would hold
+        keys = counts.index.astype(str)
+        counts = counts.set_axis(keys)
+        if not keys.is_unique:
+            counts = counts.groupby(level=0, sort=False).sum()
+            keys = counts.index
+        weights = counts.to_numpy()
+        values = keys.to_numpy(dtype=object)
+        hashes = hash_values(values)
+        self.distinct.add(hashes)
+        if self.check_quality:
+            self.folded.add(hash_values(keys.str.lower().to_numpy(dtype=object)))
+
+        # Validators run on distinct values, weighted by their counts
+        if self.validators is None:
+            self.validators = select(self.name, values, weights, self.registry)
+        if self.validators:
+            self.validity_total += int(weights.sum())
+            for name, (validator, _) in self.validators.items():
+                self.valid_counts[name] += int(weights[validator.matches(values)].sum())
+
+        self._update_top_k(counts, hashes)
+
+    def _update_top_k(self, counts, hashes):
+        self.value_counts.update(dict(zip(counts.index, counts.tolist())))
+        if len(self.value_counts) > self.top_k_capacity:
+            # Keep the heaviest half; counts of evicted values are lost
+            self.value_counts = Counter(dict(self.value_counts.most_common(self.top_k_capacity // 2)))
+            self.top_k_exact = False
+
+    @property
+    def unique_count(self):
+        return len(self.distinct)
+
+    def numeric_summary(self):
+        """Return the same keys as ``DataFrame.describe()`` for this column"""
+        q25, q50, q75 = self.reservoir.quantiles([0.25, 0.5, 0.75])
+        std = float(np.sqrt(self.m2 / (self.count - 1))) if self.count > 1 else np.nan
+        return {
+            'count': float(self.count),
+            'mean': self.mean if self.count else np.nan,
+            'std': std,
+            'min': self.min if self.min is not None else np.nan,
+            '25%': q25,
+            '50%': q50,
+            '75%': q75,
+            'max': self.max if self.max is not None else np.nan
+        }
+
+    def most_common(self, k=5):
+        return dict(self.value_counts.most_common(k))
+
+    def consistency_ratio(self):
+        distinct = len(self.distinct)
+        return len(self.folded) / distinct if distinct > 0 else 1
+
+
+class ApproximateColumnAccumulator(ColumnAccumulator):
+    """ColumnAccumulator whose memory does not grow with rows or cardinality.
+
+    Distinct counts use HyperLogLog, quantiles a compactor sketch and most
+    common values a Count-Min sketch with a bounded candidate table. Every
+    estimate comes with an error bound (see ``error_bounds``).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.value_counts = CountMinTopK()
+        self.top_k_exact = False
+
+    def _make_distinct(self):
+        return HyperLogLog()
+
+    def _make_quantiles(self, sample_size):
+        return QuantileSketch()
+
+    def _update_top_k(self, counts, hashes):
+        self.value_counts.update(counts.index, hashes, counts.to_numpy())
+
+    def most_common(self, k=5):
+        return self.value_counts.most_common(k)
+
+    def error_bounds(self):
+        """Error bounds for this column's estimated figures"""
+        bounds = {}
+        if self.is_text or self.track_numeric_cardinality:
+            bounds['unique_count'] = {'relative_std_error': self.distinct.relative_error}
+        if self.is_numeric:
+            bounds['quantiles'] = {'max_rank_error': self.reservoir.rank_error}
+        if self.is_text:
+            bounds['most_common'] = {
+                'max_overcount': self.value_counts.count_error,
+                'confidence': self.value_counts.confidence
+            }
+        if self.is_text and self.check_quality:
+            # Ratio of two HLL estimates; errors add in quadrature
+            bounds['consistency'] = {'relative_std_error': self.distinct.relative_error * np.sqrt(2)}
+        return bounds
+
+
+class DatasetStats:
+    """Chunk-mergeable dataset statistics matching CSVAnalyzer's report sections"""
+
+    def __init__(self, top_k_capacity=100000, quantile_sample_size=50000, sample_rows=5,
+                 track_duplicates=True, check_quality=True, track_numeric_cardinality=True,
+                 approximate=False, generate_charts=False):
+        self.approximate = approximate
+        self.top_k_capacity = top_k_capacity
+        self.quantile_sample_size = quantile_sample_size
+        self.track_duplicates = track_duplicates
+        self.check_quality = check_quality
+        self.track_numeric_cardinality = track_numeric_cardinality
+        self.sample_rows = sample_rows
+        self.columns = {}
+        self.rows = 0
+        self.chunks = 0
+        self.memory_usage = 0
+        self.row_hashes = DuplicateSketch() if approximate else HashSet()
+        self.head = None
+        self.charts = ChartAccumulator() if generate_charts else None
+
+    def update(self, chunk):
+        """Fold one DataFrame chunk into the statistics"""
+        if self.head is None:
+            self.head = chunk.head(self.sample_rows)
+
+        for col in chunk.columns:
+            acc = self.columns.get(col)
+            if acc is None:
+                accumulator_class = ApproximateColumnAccumulator if self.approximate else ColumnAccumulator
+                acc = accumulator_class(
+                    col,
+                    self.top_k_capacity,
+                    self.quantile_sample_size,
+                    check_quality=self.check_quality,
+                    track_numeric_cardinality=self.track_numeric_cardinality,
+                    track_histogram=self.charts is not None
+                )
+                self.columns[col] = acc
+            acc.update(chunk[col])
+        if self.charts is not None:
+            self.charts.update(chunk)
+
+        if self.track_duplicates:
+            self.row_hashes.add(pd.util.hash_pandas_object(chunk, index=False).to_numpy())
+        self.memory_usage += int(chunk.memory_usage(index=False, deep=True).sum())
+        self.rows += len(chunk)
+        self.chunks += 1
+
+    @property
+    def duplicate_rows(self):
+        if not self.track_duplicates:
+            return None
+        return max(self.rows - len(self.row_hashes), 0)
+
+    def basic_analysis(self):
+        """Build the ``basic_analysis`` section from accumulated statistics"""
+        analysis = {
+            'shape': (self.rows, len(self.columns)),
+            'columns': list(self.columns),
+            'dtypes': {col: str(acc.dtype) for col, acc in self.columns.items()},
+            'memory_usage': self.memory_usage,
+            'null_counts': {col: acc.nulls for col, acc in self.columns.items()}
+        }
+        if self.track_duplicates:
+            analysis['duplicate_rows'] = self.duplicate_rows
+
+        numeric = {col: acc for col, acc in self.columns.items() if acc.is_numeric}
+        if numeric:
+            analysis['numeric_summary'] = {col: acc.numeric_summary() for col, acc in numeric.items()}
+
+        text = {col: acc for col, acc in self.columns.items() if acc.is_text}
+        if text:
+            analysis['string_summary'] = {}
+            for col, acc in text.items():
+                analysis['string_summary'][col] = {
+                    'unique_count': acc.unique_count,
+                    'most_common': acc.most_common(5)
+                }
+
+        if self.approximate:
+            analysis['error_bounds'] = self.error_bounds()
+
+        return analysis
+
+    def chart_data(self, bins=None, points=None):
+        """Build the ``charts`` section: histograms, correlation, category bars and time series"""
+        if self.charts is None:
+            return None
+        options = {key: value for key, value in (('bins', bins), ('points', points)) if value}
+        return self.charts.report(self.columns, **options)
+
+    def error_bounds(self):
+        """Error bounds of approximate-mode estimates, per column and for duplicates"""
+        bounds = {col: acc.error_bounds() for col, acc in self.columns.items()}
+        if self.track_duplicates:
+            bounds['duplicate_rows'] = {'std_error_rows': self.row_hashes.std_error_rows()}
+        return bounds
+
+    def data_quality_check(self):
+        """Build the ``data_quality_check`` section from accumulated statistics"""
+        quality = {
+            'completeness': {},
+            'consistency': {},
+            'validity': {},
+            'formats': {}
+        }
+
+        total_cells = self.rows * len(self.columns)
+        null_cells = sum(acc.nulls for acc in self.columns.values())
+        quality['completeness']['overall_completeness'] = (total_cells - null_cells) / total_cells * 100
+
+        for col, acc in self.columns.items():
+            quality['completeness'][col] = (self.rows - acc.nulls) / self.rows * 100
+
+        for col, acc in self.columns.items():
+            if acc.is_text and self.rows:
+                quality['consistency'][col] = acc.consistency_ratio() * 100
+
+        for col, acc in self.columns.items():
+            if acc.is_text and acc.validity_total:
+                for name in acc.validators:
+                    quality['validity'][f'{col}_{name}_format'] = acc.valid_counts[name] / acc.validity_total * 100
+                # How each checked format was chosen: 'name' or 'content'
+                quality['formats'][col] = {
+                    name: source for name, (_, source) in acc.validators.items()
+                }
+
+        return quality
+
+    def potential_ids(self):
+        """Columns with no nulls whose values are all distinct.
+
+        In approximate mode the distinct count is an estimate, so a column
+        whose estimate is within three standard errors of the row count is
+        listed too; such columns are only likely unique (a few duplicates
+        are within the error) and are reported with the error bound.
+        """
+        ids = []
+        for col, acc in self.columns.items():
+            if acc.nulls or (acc.is_numeric and not self.track_numeric_cardinality):
+                continue
+            required = self.rows
+            if self.approximate:
+                required = self.rows * (1 - 3 * acc.distinct.relative_error)
+            if acc.unique_count >= required:
+                ids.append(col)
+        return ids
+
+    def approximations(self):
+        """Describe which reported figures are estimates rather than exact"""
+        notes = {}
+        if self.approximate:
+            for col in self.columns:
+                notes[col] = ['unique counts, quantiles and most_common are sketch estimates (see analysis.error_bounds)']
+            return notes
+        for col, acc in self.columns.items():
+            if acc.is_numeric and not acc.reservoir.exact:
+                notes.setdefault(col, []).append(f'quantiles estimated from a {acc.reservoir.size:,}-value sample')
+            if acc.is_text and not acc.top_k_exact:
+                notes.setdefault(col, []).append('most_common counts may omit values evicted from the top-k table')
+        return notes
@@ -0,0 +1,258 @@
+import math
+
+import numpy as np
+
+
+def bit_length(values):
+    """Exact bit length of each value in a uint64 array"""
+    values = values.astype(np.uint64, copy=True)
+    lengths = np.zeros(len(values), dtype=np.int64)
+    for shift in (32, 16, 8, 4, 2, 1):
+        high = values >= np.uint64(1 << shift)
+        lengths[high] += shift
+        values[high] >>= np.uint64(shift)
+    lengths += (values > 0)
+    return lengths
+
+
+class HyperLogLog:
+    """Fixed-memory distinct counter over uint64 hashes (2**precision bytes)"""
+
+    def __init__(self, precision=14):
+        self.precision = precision
+        self.m = 1 << precision
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    def add(self, hashes):
+        """Add a batch of uint64 hashes"""
+        if len(hashes) == 0:
+            return
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        p = np.uint64(self.precision)
+        index = (hashes >> (np.uint64(64) - p)).astype(np.int64)
+        remainder = hashes & np.uint64((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - bit_length(remainder) + 1
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self):
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / float(np.sum(np.ldexp(1.0, -self.registers.astype(np.int64))))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            # Linear counting is more accurate for small cardinalities
+            return m * math.log(m / zeros)
+        return raw
+
+    def __len__(self):
+        return int(round(self.estimate()))
+
+    @property
+    def relative_error(self):
+        """Standard error of the estimate relative to the true count"""
+        return 1.04 / math.sqrt(self.m)
+
+
+class QuantileSketch:
+    """Mergeable compactor sketch (KLL-style with equal level capacities).
+
+    Level ``h`` holds values of weight ``2**h``. A level that reaches
+    ``2 * k`` values is sorted and every other value (random offset) is
+    promoted to the next level. Each compaction shifts any rank by at most
+    the level weight, so the normalized rank error is at most
+    ``levels / (2 * k)`` while memory stays at ``levels * 2 * k`` floats.
+    """
+
+    def __init__(self, k=1024, seed=0):
+        self.k = k
+        self.levels = [np.empty(0, dtype=np.float64)]
+        self.count = 0
+        self.compacted_levels = 0
+        self.rng = np.random.default_rng(seed)
+
+    def add(self, values):
+        """Add a batch of non-null float values"""
+        if len(values) == 0:
+            return
+        self.count += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], np.asarray(values, dtype=np.float64)])
+        self._compact()
+
+    def _compact(self):
+        level = 0
+        while level < len(self.levels):
+            buffer = self.levels[level]
+            if len(buffer) >= 2 * self.k:
+                buffer = np.sort(buffer)
+                # Keep one value back when the buffer length is odd
+                keep = buffer[-1:] if len(buffer) % 2 else buffer[:0]
+                even = buffer[:len(buffer) - len(keep)]
+                promoted = even[int(self.rng.integers(0, 2))::2]
+                self.levels[level] = keep
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0, dtype=np.float64))
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+                self.compacted_levels = max(self.compacted_levels, level + 1)
+            level += 1
+
+    def quantiles(self, qs):
+        """Return the values at the requested quantiles"""
+        if self.count == 0:
+            return [np.nan for _ in qs]
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([
+            np.full(len(buffer), 1 << level, dtype=np.float64)
+            for level, buffer in enumerate(self.levels)
+        ])
+        order = np.argsort(values, kind='stable')
+        values = values[order]
+        cumulative = np.cumsum(weights[order])
+        total = cumulative[-1]
+        positions = np.searchsorted(cumulative, [q * total for q in qs], side='left')
+        return [float(values[min(pos, len(values) - 1)]) for pos in positions]
+
+    @property
+    def exact(self):
+        return self.compacted_levels == 0
+
+    @property
+    def rank_error(self):
+        """Worst-case normalized rank error of any reported quantile"""
+        return self.compacted_levels / (2 * self.k)
+
+
+class CountMinTopK:
+    """Count-Min sketch plus a bounded candidate table for most common values.
+
+    Estimates never undercount; with probability ``1 - exp(-depth)`` they
+    overcount by at most ``e / width`` of the total count.
+    """
+
+    def __init__(self, width=4096, depth=4, capacity=64):
+        self.width = width
+        self.depth = depth
+        self.capacity = capacity
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        self.total = 0
+        self.candidates = {}
+
+    def _indexes(self, hashes):
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        low = hashes & np.uint64(0xFFFFFFFF)
+        high = hashes >> np.uint64(32)
+        # Kirsch-Mitzenmacher: derive depth hash functions from two halves
+        return [((low + np.uint64(i) * high) % np.uint64(self.width)).astype(np.int64) for i in range(self.depth)]
+
+    def _estimate(self, hashes):
+        indexes = self._indexes(hashes)
+        estimates = self.table[0][indexes[0]]
+        for row in range(1, self.depth):
+            estimates = np.minimum(estimates, self.table[row][indexes[row]])
+        return estimates
+
+    def update(self, keys, hashes, counts):
+        """Add distinct keys with their (chunk) counts"""
+        if len(keys) == 0:
+            return
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        counts = np.asarray(counts, dtype=np.int64)
+        for row, index in enumerate(self._indexes(hashes)):
+            np.add.at(self.table[row], index, counts)
+        self.total += int(counts.sum())
+
+        # Only the chunk's heaviest keys can enter the candidate table
+        estimates = self._estimate(hashes)
+        if len(keys) > self.capacity:
+            heaviest = np.argpartition(estimates, -self.capacity)[-self.capacity:]
+        else:
+            heaviest = np.arange(len(keys))
+        for position in heaviest.tolist():
+            self.candidates[keys[position]] = hashes[position]
+
+        if len(self.candidates) > self.capacity:
+            ranked = self._ranked()
+            self.candidates = {key: self.candidates[key] for key, _ in ranked[:self.capacity]}
+
+    def _ranked(self):
+        keys = list(self.candidates)
+        estimates = self._estimate(np.array([self.candidates[key] for key in keys], dtype=np.uint64))
+        order = np.argsort(-estimates, kind='stable')
+        return [(keys[i], int(estimates[i])) for i in order]
+
+    def most_common(self, k=5):
+        if not self.candidates:
+            return {}
+        return dict(self._ranked()[:k])
+
+    @property
+    def count_error(self):
+        """Maximum overcount of any estimate (holds with probability ``confidence``)"""
+        return int(math.ceil(math.e / self.width * self.total))
+
+    @property
+    def confidence(self):
+        return 1 - math.exp(-self.depth)
+
+
+class DuplicateSketch:
+    """Fixed-memory duplicate-row estimator using hash-based distinct sampling.
+
+    Every row whose hash falls below a threshold is kept together with its
+    multiplicity. Identical rows share a hash, so a sampled row brings all
+    of its duplicates with it and the duplicate ratio of the sample
+    estimates that of the file. The threshold halves whenever more than
+    ``capacity`` distinct hashes are held.
+    """
+
+    def __init__(self, capacity=65536):
+        self.capacity = capacity
+        self.level = 0
+        self.keys = np.empty(0, dtype=np.uint64)
+        self.counts = np.empty(0, dtype=np.int64)
+        self.seen = 0
+
+    @property
+    def threshold(self):
+        return np.uint64((1 << (64 - self.level)) - 1)
+
+    def add(self, hashes):
+        """Add a batch of row hashes"""
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        self.seen += len(hashes)
+        sampled = hashes[hashes <= self.threshold]
+        if len(sampled) == 0:
+            return
+        keys, counts = np.unique(sampled, return_counts=True)
+        merged = np.concatenate([self.keys, keys])
+        merged_counts = np.concatenate([self.counts, counts])
+        self.keys, inverse = np.unique(merged, return_inverse=True)
+        self.counts = np.bincount(inverse, weights=merged_counts).astype(np.int64)
+
+        while len(self.keys) > self.capacity:
+            self.level += 1
+            keep = self.keys <= self.threshold
+            self.keys = self.keys[keep]
+            self.counts = self.counts[keep]
+
+    def _duplicate_ratio(self):
+        sampled_rows = int(self.counts.sum())
+        if sampled_rows == 0:
+            return 0.0
+        return 1 - len(self.keys) / sampled_rows
+
+    def __len__(self):
+        """Estimated number of distinct rows"""
+        return int(round(self.seen * (1 - self._duplicate_ratio())))
+
+    def std_error_rows(self):
+        """Standard error of the duplicate row estimate (0 while nothing was dropped)"""
+        if self.level == 0 or len(self.keys) < 2:
+            return 0
+        # Delta method for the ratio sum(c - 1) / sum(c) over sampled keys
+        ratio = self._duplicate_ratio()
+        residuals = (self.counts - 1) - ratio * self.counts
+        std_error = np.sqrt(residuals.var(ddof=1) / len(self.keys)) / self.counts.mean()
+        return int(round(self.seen * std_error))
@@ -0,0 +1,154 @@
+import codecs
+import csv
+import hashlib
+import io
+from collections import Counter, OrderedDict
+
+
+class CSVSniffer:
+    """Detect encoding and delimiter from a bounded byte sample.
+
+    The sample is decoded once, incrementally (a multi-byte character cut
+    off at the end of the sample is not an error). Delimiters are scored by
+    parsing the sample with the csv module, so quoted delimiters and quoted
+    newlines are handled, and by how consistent the per-record field count
+    is (records left with stray quotes count as inconsistent). Results are
+    cached by the sample's content hash.
+    """
+
+    # UTF-32 LE must be checked before UTF-16 LE (its BOM starts with FF FE)
+    BOMS = [
+        (codecs.BOM_UTF8, 'utf-8-sig'),
+        (codecs.BOM_UTF32_LE, 'utf-32'),
+        (codecs.BOM_UTF32_BE, 'utf-32'),
+        (codecs.BOM_UTF16_LE, 'utf-16'),
+        (codecs.BOM_UTF16_BE, 'utf-16')
+    ]
+    DELIMITERS = [',', ';', '\t', '|']
+    FALLBACK_ENCODINGS = ['cp1252', 'latin-1']
+
+    def __init__(self, max_records=200, cache_size=256):
+        self.max_records = max_records
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+
+    def content_hash(self, sample):
+        return hashlib.blake2b(sample, digest_size=16).hexdigest()
+
+    def sniff(self, sample, truncated=True):
+        """Return encoding, delimiter and their confidences for a byte sample"""
+        key = (self.content_hash(sample), truncated)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return dict(cached)
+
+        encoding, encoding_confidence, text = self.detect_encoding(sample, truncated)
+        delimiter, delimiter_confidence = self.detect_delimiter(text, truncated)
+        result = {
+            'encoding': encoding,
+            'encoding_confidence': round(encoding_confidence, 3),
+            'delimiter': delimiter,
+            'delimiter_confidence': round(delimiter_confidence, 3),
+            'has_bom': any(sample.startswith(bom) for bom, _ in self.BOMS),
+            'content_hash': key[0]
+        }
+
+        self._cache[key] = result
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return dict(result)
+
+    def _decode(self, sample, encoding, truncated):
+        decoder = codecs.getincrementaldecoder(encoding)(errors='strict')
+        return decoder.decode(sample, final=not truncated)
+
+    def detect_encoding(self, sample, truncated=True):
+        """Return (encoding, confidence, decoded sample)"""
+        for bom, encoding in self.BOMS:
+            if sample.startswith(bom):
+                return encoding, 1.0, self._decode(sample, encoding, truncated)
+
+        try:
+            text = self._decode(sample, 'utf-8', truncated)
+            # Pure ASCII is valid in every candidate; non-ASCII UTF-8 is
+            # very unlikely to be valid by accident. Only a sample that is
+            # the whole file rules out a legacy-encoded byte further on
+            if text.isascii():
+                return 'utf-8', 0.9 if truncated else 1.0, text
+            return 'utf-8', 0.99, text
+        except UnicodeDecodeError:
+            pass
+
+        try:
+            import chardet
+            guess = chardet.detect(sample)
+        except ImportError:
+            guess = {'encoding': None, 'confidence': 0.0}
+
+        candidates = []
+        if guess.get('encoding'):
+            candidates.append((codecs.lookup(guess['encoding']).name, guess.get('confidence') or 0.0))
+        candidates.extend((encoding, 0.5) for encoding in self.FALLBACK_ENCODINGS)
+
+        for encoding, confidence in candidates:
+            try:
+                return encoding, confidence, self._decode(sample, encoding, truncated)
+            except (UnicodeDecodeError, LookupError):
+                continue
+
+        # latin-1 decodes any byte sequence, so this is unreachable in practice
+        return 'latin-1', 0.0, sample.decode('latin-1')
+
+    def fallback_encodings(self, encoding):
+        """Encodings to retry with when ``encoding`` fails on bytes past the sample"""
+        try:
+            failed = codecs.lookup(encoding).name
+        except LookupError:
+            failed = encoding
+        return [candidate for candidate in self.FALLBACK_ENCODINGS if codecs.lookup(candidate).name != failed]
+
+    def detect_delimiter(self, text, truncated=True):
+        """Return (delimiter, confidence) from quote-aware field counts"""
+        lines = text.splitlines(keepends=True)
+        if truncated and len(lines) > 1:
+            # The last line of a truncated sample is probably incomplete
+            lines = lines[:-1]
+        sample = ''.join(lines)
+
+        scores = {}
+        for delimiter in self.DELIMITERS:
+            counts = []
+            try:
+                reader = csv.reader(io.StringIO(sample), delimiter=delimiter, quotechar='"', strict=True)
+                for record in reader:
+                    if record:
+                        # A quote left inside a parsed field means the quoting
+                        # does not line up with this delimiter
+                        clean = not any('"' in field for field in record)
+                        counts.append(len(record) if clean else 0)
+                    if len(counts) >= self.max_records:
+                        break
+            except csv.Error:
+                # Malformed quoting (or a quoted field cut off by the sample
+                # boundary): score the records parsed so far
+                pass
+            if not counts:
+                continue
+
+            fields, frequency = Counter(counts).most_common(1)[0]
+            if fields < 2:
+                continue
+            consistency = frequency / len(counts)
+            scores[delimiter] = (consistency, fields)
+
+        if not scores:
+            return ',', 0.0
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        delimiter, (consistency, _) = ranked[0]
+        confidence = consistency
+        if len(ranked) > 1:
+            # A second delimiter that also splits lines consistently makes the choice less certain
+            confidence = consistency * (1 - ranked[1][1][0] / 2)
+        return delimiter, confidence
@@ -0,0 +1,235 @@
+import os
+
+# Leading bytes of the binary formats; anything else is read as delimited text
+SIGNATURES = [
+    (b'PK\x03\x04', 'xlsx'),
+    (b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', 'xls'),
+    (b'PAR1', 'parquet'),
+    (b'ARROW1', 'arrow')
+]
+EXTENSIONS = {
+    '.csv': 'csv',
+    '.tsv': 'csv',
+    '.txt': 'csv',
+    '.xlsx': 'xlsx',
+    '.xlsm': 'xlsx',
+    '.xls': 'xls',
+    '.parquet': 'parquet',
+    '.pq': 'parquet',
+    '.arrow': 'arrow',
+    '.feather': 'arrow'
+}
+SOURCE_FORMATS = ('csv', 'xlsx', 'xls', 'parquet', 'arrow')
+
+# Library that reads each non-CSV format (reported as the engine)
+SOURCE_ENGINES = {
+    'xlsx': 'openpyxl',
+    'xls': 'xlrd',
+    'parquet': 'pyarrow',
+    'arrow': 'pyarrow'
+}
+
+
+def detect_format(file_path, declared=None):
+    """Input format from INPUT_FORMAT, else the file's leading bytes, else its extension (default csv)"""
+    if declared and declared.strip():
+        source_format = declared.strip().lower()
+        source_format = EXTENSIONS.get(f'.{source_format}', source_format)
+        if source_format not in SOURCE_FORMATS:
+            raise Exception(f"Unknown input format: {declared}. Use one of: {', '.join(SOURCE_FORMATS)}")
+        return source_format
+
+    with open(file_path, 'rb') as f:
+        head = f.read(8)
+    for signature, source_format in SIGNATURES:
+        if head.startswith(signature):
+            return source_format
+    return EXTENSIONS.get(os.path.splitext(file_path)[1].lower(), 'csv')
+
+
+def pick_sheet(names, sheet=None):
+    """Sheet name for SHEET: a name, a 0-based index, or the first sheet when unset"""
+    if not names:
+        raise Exception("Workbook has no sheets")
+    if sheet is None or str(sheet).strip() == '':
+        return names[0]
+    sheet = str(sheet).strip()
+    if sheet in names:
+        return sheet
+    if sheet.isdigit() and int(sheet) < len(names):
+        return names[int(sheet)]
+    raise Exception(f"Sheet '{sheet}' not found. Available sheets: {', '.join(names)}")
+
+
+def xlsx_rows(file_path, sheet=None):
+    """(sheet name, row tuples) of an .xlsx sheet, streamed by openpyxl's read-only reader"""
+    from openpyxl import load_workbook
+
+    # read_only parses the sheet XML as it is iterated instead of building every cell
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        name = pick_sheet(workbook.sheetnames, sheet)
+    except Exception:
+        workbook.close()
+        raise
+
+    def rows():
+        try:
+            yield from workbook[name].iter_rows(values_only=True)
+        finally:
+            workbook.close()
+
+    return name, rows()
+
+
+def xls_rows(file_path, sheet=None):
+    """(sheet name, row tuples) of a legacy .xls sheet read with xlrd"""
+    import xlrd
+
+    # on_demand loads only the selected sheet
+    book = xlrd.open_workbook(file_path, on_demand=True)
+    try:
+        name = pick_sheet(book.sheet_names(), sheet)
+    except Exception:
+        book.release_resources()
+        raise
+
+    def value(cell):
+        if cell.ctype in (xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_BLANK, xlrd.XL_CELL_ERROR):
+            return None
+        if cell.ctype == xlrd.XL_CELL_DATE:
+            return xlrd.xldate_as_datetime(cell.value, book.datemode)
+        if cell.ctype == xlrd.XL_CELL_BOOLEAN:
+            return bool(cell.value)
+        if cell.ctype == xlrd.XL_CELL_NUMBER and cell.value.is_integer():
+            # xls stores every number as a float; whole numbers read as ints, as openpyxl does
+            return int(cell.value)
+        return cell.value
+
+    def rows():
+        try:
+            worksheet = book.sheet_by_name(name)
+            for index in range(worksheet.nrows):
+                yield tuple(value(cell) for cell in worksheet.row(index))
+        finally:
+            book.release_resources()
+
+    return name, rows()
+
+
+def unique_names(names):
+    """Header cells as column names: blanks become column_N, repeats get .1, .2 (as pandas does)"""
+    seen = {}
+    result = []
+    for position, name in enumerate(names):
+        name = f'column_{position + 1}' if name is None or str(name).strip() == '' else str(name)
+        if name in seen:
+            seen[name] += 1
+            name = f'{name}.{seen[name]}'
+        else:
+            seen[name] = 0
+        result.append(name)
+    return result
+
+
+def sheet_frames(rows, has_header=True, usecols=None, chunk_size=100000):
+    """DataFrame chunks of ``chunk_size`` rows from an iterator of row tuples.
+
+    Only the requested columns are kept from each row, and rows with no
+    values at all (Excel reports trailing formatted rows) are dropped.
+    """
+    import pandas as pd
+
+    rows = iter(rows)
+    first = next(rows, None)
+    if first is None:
+        return
+    if has_header:
+        names = unique_names(first)
+    else:
+        names = [f'column_{position + 1}' for position in range(len(first))]
+        rows = _prepend(first, rows)
+
+    positions = list(range(len(names)))
+    if usecols:
+        if has_header:
+            missing = [col for col in usecols if col not in names]
+            if missing:
+                raise Exception(f"Columns not found: {', '.join(missing)}")
+            positions = [names.index(col) for col in usecols]
+        else:
+            positions = [position for position in usecols if position < len(names)]
+        names = [names[position] for position in positions]
+
+    width = max(positions) + 1 if positions else 0
+    chunk = []
+    for row in rows:
+        if len(row) < width:
+            row = tuple(row) + (None,) * (width - len(row))
+        values = tuple(row[position] for position in positions)
+        if all(value is None for value in values):
+            continue
+        chunk.append(values)
+        if len(chunk) >= chunk_size:
+            yield pd.DataFrame.from_records(chunk, columns=names)
+            chunk = []
+    if chunk:
+        yield pd.DataFrame.from_records(chunk, columns=names)
+
+
+def _prepend(first, rows):
+    yield first
+    yield from rows
+
+
+def arrow_dataset(file_path, source_format):
+    import pyarrow.dataset as ds
+
+    return ds.dataset(file_path, format='parquet' if source_format == 'parquet' else 'ipc')
+
+
+def arrow_frames(dataset, columns=None, expression=None, chunk_size=100000):
+    """DataFrame chunks of a Parquet or Arrow dataset, reading only the requested columns"""
+    for batch in dataset.to_batches(columns=columns, filter=expression, batch_size=chunk_size):
+        if batch.num_rows:
+            yield batch.to_pandas()
+
+
+def read_source(file_path, source_format, has_header=True, usecols=None, sheet=None, filters=None, chunk_size=100000):
+    """(DataFrame chunk iterator, source info) for an Excel, Parquet or Arrow file.
+
+    Parquet and Arrow are read column-projected. ``filters`` (pyarrow's
+    [[column, op, value], ...] form) is pushed down into the scan: Parquet
+    row groups whose min/max statistics rule the filter out are never read.
+    """
+    info = {'source_format': source_format}
+    if source_format in ('xlsx', 'xls'):
+        name, rows = (xlsx_rows if source_format == 'xlsx' else xls_rows)(file_path, sheet)
+        info['sheet'] = name
+        return sheet_frames(rows, has_header, usecols, chunk_size), info
+
+    if source_format not in ('parquet', 'arrow'):
+        raise Exception(f"Unsupported input format: {source_format}")
+
+    dataset = arrow_dataset(file_path, source_format)
+    if usecols:
+        missing = [col for col in usecols if col not in dataset.schema.names]
+        if missing:
+            raise Exception(f"Columns not found: {', '.join(missing)}")
+
+    expression = None
+    if filters:
+        import pyarrow.parquet as pq
+        try:
+            expression = pq.filters_to_expression(filters)
+        except Exception as e:
+            raise Exception(f"Invalid ROW_FILTERS: {str(e)}")
+
+    if source_format == 'parquet':
+        fragments = list(dataset.get_fragments())
+        total = sum(fragment.num_row_groups for fragment in fragments)
+        # Row groups the statistics cannot rule out (metadata only, nothing is decoded)
+        scanned = sum(len(fragment.split_by_row_group(expression)) for fragment in fragments) if expression is not None else total
+        info['row_groups'] = {'total': total, 'scanned': scanned, 'skipped': total - scanned}
+
+    return arrow_frames(dataset, list(usecols) if usecols else None, expression, chunk_size), info
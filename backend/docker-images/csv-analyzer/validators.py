@@ -0,0 +1,112 @@
+import ipaddress
+import re
+
+import numpy as np
+
+# A format is checked on a column when its name suggests it, or when this
+# share of the rows behind its sampled distinct values already has that format
+DETECT_RATIO = 0.8
+DETECT_SAMPLE = 200
+
+MONTH = r'(?:0?[1-9]|1[0-2])'
+DAY = r'(?:0?[1-9]|[12]\d|3[01])'
+TIME = r'(?:[ T](?:[01]\d|2[0-3]):[0-5]\d(?::[0-5]\d(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?)?'
+
+# Words of a column name: runs of letters or digits, split at camelCase boundaries
+NAME_TOKEN = re.compile(r'[A-Z]?[a-z]+|[A-Z]+(?![a-z])|\d+')
+
+
+def name_tokens(name):
+    """Lower-cased words of a column name ('clientIPAddress' -> ['client', 'ip', 'address'])"""
+    return [token.lower() for token in NAME_TOKEN.findall(str(name))]
+
+
+class Validator:
+    """A named value format, checked on a text column's distinct values.
+
+    The pattern is compiled once; ``matches`` runs it over the distinct
+    values of a chunk, and their counts turn that into a share of rows.
+    ``check``, when given, is applied to the values the pattern lets
+    through, for formats a pattern can only pre-filter.
+    """
+
+    def __init__(self, name, pattern, name_hints=(), detect=True, flags=0, check=None):
+        self.name = name
+        self.regex = re.compile(pattern, flags)
+        self.check = check
+        self.name_hints = tuple(name_hints)
+        self.hint_tokens = [name_tokens(hint) for hint in self.name_hints]
+        # Formats too loose to recognise by content alone (phone numbers
+        # look like any digit string) are only checked on named columns
+        self.detect = detect
+
+    def named_for(self, column):
+        """Whether the column's name has one of the hints as whole words (a plural counts)"""
+        tokens = name_tokens(column)
+        for hint in self.hint_tokens:
+            size = len(hint)
+            for start in range(len(tokens) - size + 1):
+                words = tokens[start:start + size]
+                if words[:-1] == hint[:-1] and words[-1] in (hint[-1], hint[-1] + 's'):
+                    return True
+        return False
+
+    def matches(self, values):
+        """Boolean array marking which of ``values`` (strings) have this format"""
+        match = self.regex.match
+        if self.check is None:
+            return np.fromiter((match(value) is not None for value in values), dtype=bool, count=len(values))
+        check = self.check
+        return np.fromiter((match(value) is not None and check(value) for value in values), dtype=bool, count=len(values))
+
+
+def is_ip_address(value):
+    try:
+        ipaddress.ip_address(value)
+    except ValueError:
+        return False
+    return True
+
+
+VALIDATORS = {}
+
+
+def register(validator):
+    """Add a validator to the registry data_quality_check draws on (replacing one of the same name)"""
+    VALIDATORS[validator.name] = validator
+    return validator
+
+
+register(Validator('email', r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$', name_hints=('email', 'mail')))
+register(Validator('phone', r'^\+?[\d\s\-\(\)]{7,}$', name_hints=('phone', 'tel', 'telephone'), detect=False))
+register(Validator('url', r'^(?:https?|ftp)://[^\s/$.?#][^\s]*$', name_hints=('url', 'website'), flags=re.IGNORECASE))
+register(Validator('uuid', r'^[0-9a-f]{8}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{12}$',
+                   name_hints=('uuid', 'guid'), flags=re.IGNORECASE))
+register(Validator('ip', r'^[0-9a-f.:]{2,39}$', name_hints=('ip_address', 'ipaddress', 'ip_addr'),
+                   flags=re.IGNORECASE, check=is_ip_address))
+register(Validator('date', rf'^(?:\d{{4}}-{MONTH}-{DAY}{TIME}|{DAY}[/.-]{MONTH}[/.-]\d{{2,4}}|{MONTH}[/.-]{DAY}[/.-]\d{{2,4}})$',
+                   name_hints=('date',)))
+# Numbers held as text: thousands separators, stray spaces or a few non-numeric cells
+register(Validator('numeric', r'^\s*[-+]?(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?(?:e[-+]?\d+)?\s*$|^\s*[-+]?\.\d+\s*$',
+                   flags=re.IGNORECASE))
+
+
+def select(column, values, counts, registry=None):
+    """Validators to run on a column, as {name: (validator, 'name' or 'content')}.
+
+    ``values`` are a chunk's distinct values and ``counts`` their rows; a
+    validator applies when the column's name carries one of its hints or
+    when enough rows of an evenly spaced sample of the values match.
+    """
+    registry = VALIDATORS if registry is None else registry
+    step = max(len(values) // DETECT_SAMPLE, 1)
+    sample = values[::step][:DETECT_SAMPLE]
+    weights = counts[::step][:DETECT_SAMPLE]
+    total = weights.sum()
+    selected = {}
+    for name, validator in registry.items():
+        if validator.named_for(column):
+            selected[name] = (validator, 'name')
+        elif validator.detect and total and weights[validator.matches(sample)].sum() >= DETECT_RATIO * total:
+            selected[name] = (validator, 'content')
+    return selected
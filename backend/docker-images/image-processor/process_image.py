@@ -84,8 +84,513 @@
 
 import os
 import sys
+import io
+import json
+import re
+import time
+import struct
+import zlib
+from functools import partial
+from itertools import groupby
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from PIL import Image
 
+# Modules shared by the processor images (copied next to this script in the image)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+from result_cache import ResultCache
+from stage_timer import StageTimer, profiled
+from warm_worker import SpoolWorker
+
+# Part of every result cache key; bump whenever the conversion output changes
+PROCESSOR_VERSION = '1.1'
+
+# Imported by a warm worker before it forks, so no job pays for them
+WARM_MODULES = ['PIL.JpegImagePlugin', 'PIL.PngImagePlugin', 'PIL.WebPImagePlugin', 'PIL.TiffImagePlugin']
+
+# FIT=stretch resizes to exactly WIDTH x HEIGHT; FIT=contain fits inside that
+# box keeping the aspect ratio and never upscales (Image.thumbnail semantics)
+FIT_MODES = ['stretch', 'contain']
+
+# Rendition names become part of the output file name
+RENDITION_NAME = re.compile(r'^[A-Za-z0-9_-]+$')
+
+# Encoder effort per ENCODE_PROFILE; 'smallest' is the original maximum-compression setup
+ENCODE_PROFILES = {
+    'fast': {
+        'JPEG': {'optimize': False, 'progressive': False},
+        'PNG': {'compress_level': 1},
+        'WEBP': {'method': 0}
+    },
+    'balanced': {
+        'JPEG': {'optimize': True, 'progressive': False},
+        'PNG': {'compress_level': 6},
+        'WEBP': {'method': 4}
+    },
+    'smallest': {
+        'JPEG': {'optimize': True, 'progressive': True},  # Better compression for web
+        'PNG': {'optimize': True},
+        'WEBP': {'method': 6}  # Better compression
+    }
+}
+
+# resize() first shrinks by an integer factor with reduce() until it is within
+# this factor of the target, then resamples; at 3 the result is visually
+# identical to a full LANCZOS pass at a fraction of the cost
+REDUCING_GAP = 3.0
+
+# Decoded pixels held at once (MAX_IMAGE_PIXELS separately guards against
+# decompression bombs; 0 disables that check)
+DEFAULT_MEMORY_MB = 1024
+DEFAULT_MAX_IMAGE_PIXELS = Image.MAX_IMAGE_PIXELS
+
+# Bits per pixel of the uncompressed layouts that can be split into row bands
+RAW_BITS = {
+    '1': 1, 'L': 8, 'P': 8, 'LA': 16, 'I;16': 16, 'I;16B': 16, 'I;16L': 16,
+    'RGB': 24, 'BGR': 24, 'RGBA': 32, 'RGBX': 32, 'BGRA': 32, 'BGRX': 32, 'CMYK': 32
+}
+BAND_ROWS = 16
+
+# TIFF tags a single strip or tile needs to be decoded on its own
+TIFF_DECODE_TAGS = (258, 259, 262, 266, 277, 284, 317, 320, 338, 339, 347, 529, 530, 531, 532)
+
+# PNG rows are unfiltered by Pillow's PNG decoder in a mode with the same
+# bytes per pixel (1 for sub-byte depths), then unpacked to the real mode
+PNG_CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+PNG_CARRIER_MODES = {1: 'L', 2: 'LA', 3: 'RGB', 4: 'RGBA'}
+
+# Layouts reduce_in_bands can read a part at a time (named in its error)
+BANDED_LAYOUTS = (
+    "uncompressed BMP/PPM/TIFF, single-plane TIFF in strips or tiles (any compression), "
+    "and non-interlaced PNG up to 8 bits per channel (16-bit grayscale included)"
+)
+
+def available_cpus():
+    """CPUs this process may run on (respects container cpusets)"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+def target_size(size, width=None, height=None, fit='stretch'):
+    """Output size for width x height, keeping the aspect ratio when only one is given"""
+    src_width, src_height = size
+    # Early dimension validation: missing or non-positive values are ignored
+    w = int(width) if width else 0
+    h = int(height) if height else 0
+    if width and height:
+        if w > 0 and h > 0 and fit == 'contain':
+            scale = min(w / src_width, h / src_height, 1.0)
+            return max(1, round(src_width * scale)), max(1, round(src_height * scale))
+        if w > 0 and h > 0:
+            return w, h
+    elif width:
+        if w > 0:
+            return w, int(src_height * (w / src_width))
+    elif height:
+        if h > 0:
+            return int(src_width * (h / src_height)), h
+    return size
+
+def resize_to(img, size):
+    """LANCZOS resize, pre-shrinking with reduce() when the scale factor is large"""
+    if size == img.size:
+        return img
+    return img.resize(size, Image.Resampling.LANCZOS, reducing_gap=REDUCING_GAP)
+
+def memory_budget():
+    """Bytes of decoded pixels an image may occupy (IMAGE_MEMORY_MB)"""
+    return int(float(os.environ.get('IMAGE_MEMORY_MB') or DEFAULT_MEMORY_MB) * 1024 * 1024)
+
+def open_image(input_file):
+    """Open an image lazily (header only), applying the MAX_IMAGE_PIXELS limit"""
+    max_pixels = os.environ.get('MAX_IMAGE_PIXELS')
+    # Set on every call: a warm worker must not keep one job's limit for the next
+    Image.MAX_IMAGE_PIXELS = (int(max_pixels) or None) if max_pixels else DEFAULT_MAX_IMAGE_PIXELS
+    return Image.open(input_file)
+
+def decoded_bytes(img):
+    """Memory Pillow needs for the image's pixels at its current size"""
+    if img.mode in ('1', 'L', 'P'):
+        pixel_size = 1
+    elif img.mode.startswith('I;16'):
+        pixel_size = 2
+    else:
+        # Everything else, RGB included, is stored as 4 bytes per pixel
+        pixel_size = 4
+    return img.width * img.height * pixel_size
+
+def decode_for_size(img, size):
+    """Decode an opened image at no more than the resolution needed for size.
+
+    JPEGs are decoded with DCT scaling (1/2, 1/4 or 1/8, never below
+    size). Inputs that would still exceed the memory budget are reduced
+    band by band when their layout can be read in parts (BANDED_LAYOUTS).
+    """
+    if img.format == 'JPEG' and size[0] < img.width and size[1] < img.height:
+        img.draft(img.mode, size)
+    
+    if decoded_bytes(img) <= memory_budget():
+        img.load()
+        return img
+    return reduce_in_bands(img, size)
+
+def read_raw(img, box, offset, rawmode, stride, orientation):
+    """Decode one uncompressed piece of an image straight from its bytes in the file"""
+    x0, y0, x1, y1 = box
+    with open(img.filename, 'rb') as f:
+        f.seek(offset)
+        data = f.read(stride * (y1 - y0))
+    return Image.frombytes(img.mode, (x1 - x0, y1 - y0), data, 'raw', rawmode, stride, orientation)
+
+def raw_pieces(img):
+    """(box, load) pieces of an uncompressed image, a single tile split into row strips"""
+    tiles = []
+    for decoder, (x0, y0, x1, y1), offset, args in img.tile:
+        rawmode, stride, orientation = (args, 0, 1) if isinstance(args, str) else (tuple(args) + (0, 1))[:3]
+        if decoder != 'raw' or rawmode not in RAW_BITS:
+            return None
+        stride = stride or (RAW_BITS[rawmode] * (x1 - x0) + 7) // 8
+        tiles.append(((x0, y0, x1, y1), offset, rawmode, stride, orientation))
+    
+    if len(tiles) == 1:
+        (x0, y0, x1, y1), offset, rawmode, stride, orientation = tiles[0]
+        height = y1 - y0
+        tiles = []
+        for top in range(0, height, BAND_ROWS):
+            rows = min(BAND_ROWS, height - top)
+            # Bottom-up layouts (orientation -1, e.g. BMP) store the last row first
+            row_offset = height - top - rows if orientation < 0 else top
+            tiles.append(((x0, y0 + top, x1, y0 + top + rows), offset + row_offset * stride, rawmode, stride, orientation))
+    return [(tile[0], partial(read_raw, img, *tile)) for tile in tiles]
+
+def read_tiff_piece(img, offset, count, width, rows):
+    """Decode one strip or tile of a TIFF by wrapping it in a TIFF of its own"""
+    from PIL import TiffImagePlugin
+    
+    with open(img.filename, 'rb') as f:
+        f.seek(offset)
+        data = f.read(count)
+    
+    # Same byte order as the source: uncompressed or predicted samples depend on it
+    tags = img.tag_v2
+    endian = '<' if tags.prefix == b'II' else '>'
+    header = tags.prefix + struct.pack(f'{endian}HI', 42, 8)
+    ifd = TiffImagePlugin.ImageFileDirectory_v2(header)
+    for tag in TIFF_DECODE_TAGS:
+        if tag in tags:
+            ifd.tagtype[tag] = tags.tagtype[tag]
+            ifd[tag] = tags[tag]
+    ifd[256] = width
+    ifd[257] = rows
+    ifd[278] = rows
+    # tobytes() makes strip offsets relative to the end of the directory, where the data goes
+    ifd[273] = (0,)
+    ifd[279] = (len(data),)
+    with Image.open(io.BytesIO(header + ifd.tobytes(8) + data)) as piece:
+        piece.load()
+    return piece
+
+def tiff_pieces(img):
+    """(box, load) pieces of a TIFF, one per strip or tile; None for planar layouts"""
+    tags = img.tag_v2
+    if tags.get(284, 1) != 1:
+        return None
+    if 322 in tags:
+        width, rows = tags[322], tags[323]
+        offsets, counts = tags[324], tags[325]
+    elif 273 in tags:
+        width, rows = img.width, min(tags.get(278, img.height), img.height)
+        offsets, counts = tags[273], tags[279]
+    else:
+        return None
+    
+    across = -(-img.width // width)
+    pieces = []
+    for index, (offset, count) in enumerate(zip(offsets, counts)):
+        x0 = index % across * width
+        y0 = index // across * rows
+        # Tiles are stored padded to full size; the last strip holds only the rows left
+        piece_rows = rows if 322 in tags else min(rows, img.height - y0)
+        pieces.append(((x0, y0, x0 + width, y0 + piece_rows), partial(read_tiff_piece, img, offset, count, width, piece_rows)))
+    return pieces
+
+class PngRows:
+    """Sequential reader of a non-interlaced PNG, a batch of rows at a time.
+    
+    The IDAT stream is inflated only as far as the rows asked for. Each
+    batch is unfiltered by Pillow's PNG decoder, primed with the last row
+    of the batch before it (stored unfiltered) so that filters referring
+    to the row above see the right bytes.
+    """
+    
+    def __init__(self, img, bits, carrier):
+        self.img = img
+        self.carrier = carrier
+        self.bpp = max(1, bits // 8)
+        self.stride = (img.width * bits + 7) // 8
+        self.rawmode = img.tile[0][3]
+        self.blocks = self.idat_blocks()
+        self.inflate = zlib.decompressobj()
+        self.buffer = bytearray()
+        self.previous = b''
+    
+    def idat_blocks(self):
+        with open(self.img.filename, 'rb') as f:
+            f.seek(8)
+            while True:
+                header = f.read(8)
+                if len(header) < 8:
+                    return
+                length, kind = struct.unpack('>I4s', header)
+                if kind == b'IEND':
+                    return
+                if kind != b'IDAT':
+                    f.seek(length + 4, os.SEEK_CUR)
+                    continue
+                while length:
+                    block = f.read(min(length, 1024 * 1024))
+                    if not block:
+                        return
+                    length -= len(block)
+                    yield block
+                f.seek(4, os.SEEK_CUR)
+    
+    def read(self, rows):
+        size = rows * (self.stride + 1)
+        while len(self.buffer) < size:
+            # Inflate no further than this batch: a small IDAT can expand enormously
+            block = self.inflate.unconsumed_tail or next(self.blocks, None)
+            if block is None:
+                raise Exception("PNG image data ends before its last row")
+            self.buffer += self.inflate.decompress(block, size - len(self.buffer))
+        data = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        
+        lines = rows
+        if self.previous:
+            # Filter type 0 stores the row as is
+            data = b'\0' + self.previous + data
+            lines += 1
+        unfiltered = Image.frombytes(self.carrier, (self.stride // self.bpp, lines), zlib.compress(data, 1), 'zip', self.carrier)
+        raw = unfiltered.tobytes()[-rows * self.stride:]
+        self.previous = raw[-self.stride:]
+        return Image.frombytes(self.img.mode, (self.img.width, rows), raw, 'raw', self.rawmode)
+
+def png_pieces(img):
+    """(box, load) row strips of a PNG, read in order; None when interlaced or over 32 bits per pixel"""
+    with open(img.filename, 'rb') as f:
+        header = f.read(29)
+    if len(header) < 29 or header[12:16] != b'IHDR':
+        return None
+    depth, color_type, _, _, interlace = struct.unpack('>5B', header[24:29])
+    bits = PNG_CHANNELS.get(color_type, 0) * depth
+    carrier = PNG_CARRIER_MODES.get(max(1, bits // 8))
+    if interlace or not bits or carrier is None:
+        return None
+    
+    reader = PngRows(img, bits, carrier)
+    return [
+        ((0, top, img.width, min(top + BAND_ROWS, img.height)), partial(reader.read, min(BAND_ROWS, img.height - top)))
+        for top in range(0, img.height, BAND_ROWS)
+    ]
+
+def image_pieces(img):
+    """Row-ordered (box, load) pieces covering an image, or None when it cannot be read in parts"""
+    if not getattr(img, 'filename', None) or not img.tile:
+        return None
+    pieces = raw_pieces(img)
+    if pieces is None and img.format == 'TIFF':
+        pieces = tiff_pieces(img)
+    elif pieces is None and img.format == 'PNG':
+        pieces = png_pieces(img)
+    return pieces
+
+def decode_band(img, pieces, top, bottom):
+    """Decode rows [top, bottom) of an image from the pieces that cover them"""
+    band = Image.new(img.mode, (img.width, bottom - top))
+    for (x0, y0, _, _), load in pieces:
+        # Pieces reaching past the image edge (padded tiles) are clipped by paste
+        band.paste(load(), (x0, y0 - top))
+    if img.mode == 'P' and img.palette is not None:
+        band.putpalette(img.palette)
+    if 'transparency' in img.info:
+        band.info['transparency'] = img.info['transparency']
+    return band
+
+def reducible(band):
+    """A band in a mode reduce() supports"""
+    if band.mode == 'P':
+        return band.convert('RGBA' if 'transparency' in band.info else 'RGB')
+    if band.mode == '1':
+        return band.convert('L')
+    if band.mode.startswith('I;16'):
+        return band.convert('I')
+    return band
+
+def reduce_in_bands(img, size):
+    """Box-reduce an image too large to decode at once, a band of rows at a time.
+    
+    Rows are reduced in multiples of the factor (leftover rows carry over
+    to the next band), so the result is exactly img.reduce(factor). Only
+    the layouts in BANDED_LAYOUTS can be read in parts.
+    """
+    budget = memory_budget()
+    factor = max(1, min(img.width // size[0], img.height // size[1]))
+    limit = (
+        f"Image of {img.width}x{img.height} pixels does not fit the {budget // (1024 * 1024)} MB "
+        f"decode budget (IMAGE_MEMORY_MB)"
+    )
+    if decoded_bytes(img) // (factor * factor) > budget:
+        raise Exception(f"{limit}, even reduced {factor}x")
+    pieces = image_pieces(img)
+    if not pieces:
+        raise Exception(f"{limit} and {img.format} images of this kind cannot be decoded in parts "
+                        f"(supported: {BANDED_LAYOUTS})")
+    
+    # Bands of whole piece rows, each about a quarter of the budget
+    row_bytes = decoded_bytes(img) // img.height
+    piece_rows = [
+        (top, min(bottom, img.height), list(row))
+        for (top, bottom), row in groupby(sorted(pieces, key=lambda piece: (piece[0][1], piece[0][0])),
+                                          key=lambda piece: (piece[0][1], piece[0][3]))
+    ]
+    bands = []
+    for top, bottom, row in piece_rows:
+        if bands and (bottom - bands[-1][0]) * row_bytes <= budget // 4:
+            bands[-1] = (bands[-1][0], bottom, bands[-1][2] + row)
+        else:
+            bands.append((top, bottom, row))
+    
+    output = None
+    pending = None
+    output_row = 0
+    for top, bottom, band_pieces in bands:
+        band = reducible(decode_band(img, band_pieces, top, bottom))
+        if output is None:
+            output = Image.new(band.mode, (-(-img.width // factor), -(-img.height // factor)))
+        if pending is not None:
+            merged = Image.new(band.mode, (band.width, pending.height + band.height))
+            merged.paste(pending, (0, 0))
+            merged.paste(band, (0, pending.height))
+            band = merged
+        
+        usable = band.height - band.height % factor
+        if usable:
+            output.paste(band.crop((0, 0, band.width, usable)).reduce(factor), (0, output_row))
+            output_row += usable // factor
+        pending = band.crop((0, usable, band.width, band.height)) if usable < band.height else None
+    
+    if pending is not None:
+        output.paste(pending.reduce(factor), (0, output_row))
+    return output
+
+def save_options(img, format_type, quality, profile='smallest'):
+    """PIL format name and save parameters for an output format and encode profile"""
+    if profile not in ENCODE_PROFILES:
+        raise Exception(f"Unknown encode profile: {profile}. Use one of: {', '.join(ENCODE_PROFILES)}")
+    
+    pil_format = 'JPEG' if format_type in ['jpg', 'jpeg'] else format_type.upper()
+    save_kwargs = dict(ENCODE_PROFILES[profile].get(pil_format, {}))
+    if pil_format in ('JPEG', 'WEBP'):
+        save_kwargs['quality'] = quality
+    elif pil_format == 'PNG' and profile == 'smallest' and img.mode != 'RGBA':
+        save_kwargs['compress_level'] = 9  # Max compression for non-alpha
+    return pil_format, save_kwargs
+
+def encodable(img, format_type):
+    """Convert modes the output format cannot store"""
+    if format_type in ['jpg', 'jpeg'] and img.mode in ('RGBA', 'LA', 'P'):
+        return img.convert('RGB')
+    if format_type == 'png' and img.mode == 'P':
+        return img.convert('RGBA')
+    return img
+
+def save_image(img, output_path, format_type, quality, profile='smallest'):
+    """Encode an image to output_path, converting modes the format cannot store"""
+    img = encodable(img, format_type)
+    pil_format, save_kwargs = save_options(img, format_type, quality, profile)
+    
+    # Create output directory if needed
+    output_dir = os.path.dirname(output_path)
+    if output_dir and not os.path.exists(output_dir):
+        os.makedirs(output_dir, exist_ok=True)
+    
+    img.save(output_path, format=pil_format, **save_kwargs)
+
+def compare_profiles(img, format_type, quality):
+    """Output size and encode time of every encode profile, encoded in memory"""
+    img = encodable(img, format_type)
+    report = []
+    for profile in ENCODE_PROFILES:
+        pil_format, save_kwargs = save_options(img, format_type, quality, profile)
+        buffer = io.BytesIO()
+        started = time.perf_counter()
+        img.save(buffer, format=pil_format, **save_kwargs)
+        report.append({
+            'profile': profile,
+            'bytes': buffer.tell(),
+            'encode_seconds': round(time.perf_counter() - started, 4)
+        })
+    return report
+
+def convert_file(input_file, output_file, format_type='jpg', quality=80, width=None, height=None, cache=None, fit='stretch',
+                 profile='smallest', report=False, timer=None):
+    """Convert one image to <output_file>.<format_type>.
+
+    Returns (output path, cache hit, profile report); the report compares
+    every encode profile on the resized image and is None unless asked for.
+    Decode, resize and encode are timed as stages of ``timer`` if given.
+    """
+    if timer is None:
+        timer = StageTimer()
+    if not os.path.exists(input_file):
+        raise Exception(f"Input file does not exist: {input_file}")
+    if fit not in FIT_MODES:
+        raise Exception(f"Unknown fit mode: {fit}. Use one of: {', '.join(FIT_MODES)}")
+    
+    # Identical image + options: reuse the stored conversion
+    full_output_path = f"{output_file}.{format_type}"
+    if cache:
+        cache_key = cache.key(input_file, 'image-processor', PROCESSOR_VERSION, {
+            'format': format_type,
+            'quality': quality,
+            'width': int(width) if width else None,
+            'height': int(height) if height else None,
+            'fit': fit,
+            'profile': profile
+        })
+        # A report needs the decoded image, so it always does the work
+        if not report and cache.fetch(cache_key, full_output_path):
+            return full_output_path, True, None
+    
+    with open_image(input_file) as img:
+        with timer.stage('decode'):
+            # Only the header is read so far: decode at the smallest resolution the output needs
+            size = target_size(img.size, width, height, fit)
+            img = decode_for_size(img, size)
+            img.load()
+            
+            # Mode conversion optimization
+            if format_type in ['jpg', 'jpeg']:
+                if img.mode in ('RGBA', 'LA', 'P'):
+                    img = img.convert('RGB')
+            elif format_type == 'png':
+                if img.mode == 'P':
+                    img = img.convert('RGBA')
+        
+        with timer.stage('resize'):
+            img = resize_to(img, size)
+        with timer.stage('encode'):
+            save_image(img, full_output_path, format_type, quality, profile)
+        profiles = None
+        if report:
+            with timer.stage('compare_profiles'):
+                profiles = compare_profiles(img, format_type, quality)
+    
+    if cache:
+        cache.store(cache_key, full_output_path)
+    return full_output_path, False, profiles
+
 def convert_image():
     input_file = os.environ.get('INPUT_FILE')
     output_file = os.environ.get('OUTPUT_FILE')
@@ -93,6 +598,9 @@ def convert_image():
     quality = int(os.environ.get('QUALITY', 80))
     width = os.environ.get('WIDTH')
     height = os.environ.get('HEIGHT')
+    fit = os.environ.get('FIT', 'stretch').lower()
+    profile = os.environ.get('ENCODE_PROFILE', 'smallest').lower()
+    report = os.environ.get('ENCODE_REPORT', 'false').lower() == 'true'
     
     if not input_file or not output_file:
         print("Error: INPUT_FILE and OUTPUT_FILE must be specified")
@@ -102,70 +610,349 @@ def convert_image():
         if not os.path.exists(input_file):
             print(f"Error: Input file does not exist: {input_file}")
             sys.exit(1)
+        
+        timer = StageTimer(log=sys.stdout)
+        with profiled(output_file):
+            output_path, cached, profiles = convert_file(
+                input_file, output_file, format_type, quality, width, height, ResultCache.from_env(), fit, profile, report, timer
+            )
+        if cached:
+            print(f"Image conversion completed (cached): {output_path}")
+        else:
+            print(f"Image conversion completed: {output_path}")
+        print(f"Timings: {json.dumps(timer.report())}")
+        
+        if profiles:
+            report_path = f"{output_file}.profiles.json"
+            with open(report_path, 'w', encoding='utf-8') as f:
+                json.dump({'format': format_type, 'quality': quality, 'selected': profile, 'profiles': profiles,
+                           'timings': timer.report()}, f, indent=2)
+            for entry in profiles:
+                print(f"  {entry['profile']}: {entry['bytes']} bytes in {entry['encode_seconds']}s")
+            print(f"Encode profile report: {report_path}")
             
-        with Image.open(input_file) as img:
-            # Mode conversion optimization
-            if format_type in ['jpg', 'jpeg']:
-                if img.mode in ('RGBA', 'LA', 'P'):
-                    img = img.convert('RGB')
-            elif format_type == 'png':
-                if img.mode == 'P':
-                    img = img.convert('RGBA')
-            
-            # Resizing with early dimension validation
-            if width and height:
-                w, h = int(width), int(height)
-                if w > 0 and h > 0:
-                    img = img.resize((w, h), Image.Resampling.LANCZOS)
-            elif width:
-                w = int(width)
-                if w > 0:
-                    ratio = w / img.width
-                    new_height = int(img.height * ratio)
-                    img = img.resize((w, new_height), Image.Resampling.LANCZOS)
-            elif height:
-                h = int(height)
-                if h > 0:
-                    ratio = h / img.height
-                    new_width = int(img.width * ratio)
-                    img = img.resize((new_width, h), Image.Resampling.LANCZOS)
-            
-            # Optimized save parameters
-            save_kwargs = {}
-            pil_format = format_type.upper()
-            
-            if format_type in ['jpg', 'jpeg']:
-                pil_format = 'JPEG'
-                save_kwargs.update({
-                    'quality': quality,
-                    'optimize': True,
-                    'progressive': True  # Better compression for web
-                })
-            elif format_type == 'png':
-                pil_format = 'PNG'
-                save_kwargs['optimize'] = True
-                if img.mode != 'RGBA':
-                    save_kwargs['compress_level'] = 9  # Max compression for non-alpha
-            elif format_type == 'webp':
-                pil_format = 'WEBP'
-                save_kwargs.update({
-                    'quality': quality,
-                    'method': 6  # Better compression
-                })
-            
-            full_output_path = f"{output_file}.{format_type}"
+    except Exception as e:
+        print(f"Error processing image: {str(e)}")
+        sys.exit(1)
+
+def parse_renditions(renditions, output_file, quality=80, fit='stretch', profile='smallest'):
+    """Rendition specs from a list of {name, format, quality, width, height, fit, profile} objects"""
+    if isinstance(renditions, str):
+        try:
+            renditions = json.loads(renditions)
+        except json.JSONDecodeError as e:
+            raise Exception(f"Invalid RENDITIONS JSON: {str(e)}")
+    if not isinstance(renditions, list) or not renditions or not all(isinstance(r, dict) for r in renditions):
+        raise Exception("Renditions must be a non-empty list of objects")
+    
+    specs = []
+    for index, rendition in enumerate(renditions):
+        format_type = str(rendition.get('format', 'jpg')).lower()
+        name = str(rendition.get('name') or index)
+        if not RENDITION_NAME.match(name):
+            raise Exception(f"Invalid rendition name: {name!r}. Use letters, digits, '_' and '-'")
+        specs.append({
+            'name': name,
+            'format': format_type,
+            'quality': int(rendition.get('quality', quality)),
+            'width': rendition.get('width'),
+            'height': rendition.get('height'),
+            'fit': str(rendition.get('fit', fit)).lower(),
+            'profile': str(rendition.get('profile', profile)).lower(),
+            'output': f"{output_file}_{name}.{format_type}"
+        })
+        if specs[-1]['fit'] not in FIT_MODES:
+            raise Exception(f"Unknown fit mode: {specs[-1]['fit']}. Use one of: {', '.join(FIT_MODES)}")
+    return specs
+
+def convert_renditions(input_file, specs, cache=None, report=False, timer=None):
+    """Produce every rendition from one decode; returns a result per spec.
+
+    Sizes are resized in a cascade, largest first, each from the previous
+    (larger) rendition rather than from the full-resolution original, so
+    only the first step touches every source pixel. Encodes run together
+    on a thread pool (Pillow releases the GIL while encoding).
+    """
+    if timer is None:
+        timer = StageTimer()
+    if not os.path.exists(input_file):
+        raise Exception(f"Input file does not exist: {input_file}")
+    
+    results = [{'name': spec['name'], 'output': spec['output'], 'status': 'ok'} for spec in specs]
+    pending = []
+    for spec, result in zip(specs, results):
+        if cache:
+            spec['cache_key'] = cache.key(input_file, 'image-processor', PROCESSOR_VERSION, {
+                'format': spec['format'],
+                'quality': spec['quality'],
+                'width': int(spec['width']) if spec['width'] else None,
+                'height': int(spec['height']) if spec['height'] else None,
+                'fit': spec['fit'],
+                'profile': spec['profile'],
+                'cascade': True
+            })
+            if not report and cache.fetch(spec['cache_key'], spec['output']):
+                result['status'] = 'cached'
+                continue
+        pending.append((spec, result))
+    
+    if pending:
+        with open_image(input_file) as img:
+            # Sizes come from the header; the decode only needs to cover the largest
+            sized = [(target_size(img.size, spec['width'], spec['height'], spec['fit']), spec, result) for spec, result in pending]
+            sized.sort(key=lambda entry: entry[0][0] * entry[0][1], reverse=True)
+            largest = (max(size[0] for size, _, _ in sized), max(size[1] for size, _, _ in sized))
+            with timer.stage('decode'):
+                source = decode_for_size(img, largest)
+                source.load()
+                
+                # Palette images resample poorly (nearest only); expand them once
+                if source.mode == 'P':
+                    source = source.convert('RGBA')
             
-            # Create output directory if needed
-            output_dir = os.path.dirname(full_output_path)
-            if output_dir and not os.path.exists(output_dir):
-                os.makedirs(output_dir, exist_ok=True)
+            current = source
+            renditions = []
+            for size, spec, result in sized:
+                # Downscale from the smallest image produced so far that still covers this size
+                base = current if size[0] <= current.width and size[1] <= current.height else source
+                with timer.stage('resize', log=False):
+                    resized = resize_to(base, size)
+                if size[0] <= source.width and size[1] <= source.height:
+                    current = resized
+                renditions.append((resized, spec, result))
             
-            img.save(full_output_path, format=pil_format, **save_kwargs)
-            print(f"Image conversion completed: {full_output_path}")
+            def encode(rendition):
+                # A failed encode is reported on its rendition; the others still complete
+                resized, spec, result = rendition
+                started = time.perf_counter()
+                try:
+                    save_image(resized, spec['output'], spec['format'], spec['quality'], spec['profile'])
+                    result['encode_seconds'] = round(time.perf_counter() - started, 4)
+                    result['width'], result['height'] = resized.size
+                    if report:
+                        result['profiles'] = compare_profiles(resized, spec['format'], spec['quality'])
+                except Exception as e:
+                    result['status'] = 'error'
+                    result['error'] = str(e)
             
+            # Per-rendition encode_seconds overlap; the stage is the wall time of the pool
+            with timer.stage('encode'), ThreadPoolExecutor(max_workers=min(len(renditions), available_cpus())) as executor:
+                list(executor.map(encode, renditions))
+        
+        if cache:
+            for spec, result in pending:
+                if result['status'] == 'ok':
+                    cache.store(spec['cache_key'], spec['output'])
+    
+    for result in results:
+        if result['status'] != 'error':
+            result['bytes'] = os.path.getsize(result['output'])
+    return results
+
+def create_renditions():
+    """Write every rendition in RENDITIONS for INPUT_FILE; the list of outputs goes to <OUTPUT_FILE>.jsonl"""
+    input_file = os.environ.get('INPUT_FILE')
+    output_file = os.environ.get('OUTPUT_FILE')
+    quality = int(os.environ.get('QUALITY', 80))
+    
+    if not input_file or not output_file:
+        print("Error: INPUT_FILE and OUTPUT_FILE must be specified")
+        sys.exit(1)
+    
+    try:
+        started = time.perf_counter()
+        specs = parse_renditions(
+            os.environ.get('RENDITIONS'), output_file, quality,
+            os.environ.get('FIT', 'stretch').lower(), os.environ.get('ENCODE_PROFILE', 'smallest').lower()
+        )
+        report = os.environ.get('ENCODE_REPORT', 'false').lower() == 'true'
+        timer = StageTimer(log=sys.stdout)
+        with profiled(output_file):
+            results = convert_renditions(input_file, specs, ResultCache.from_env(), report, timer)
+        
+        results_path = f"{output_file}.jsonl"
+        with open(results_path, 'w', encoding='utf-8') as results_file:
+            for result in results:
+                if result['status'] == 'error':
+                    print(f"Error producing rendition {result['name']}: {result['error']}")
+                results_file.write(json.dumps(result) + '\n')
+        
+        failed = sum(result['status'] == 'error' for result in results)
+        if failed == len(results):
+            raise Exception(f"All {failed} renditions failed")
+        elapsed = time.perf_counter() - started
+        print(f"Renditions completed: {len(results) - failed} outputs, {failed} failed in {elapsed:.2f}s. Results: {results_path}")
+        print(f"Timings: {json.dumps(timer.report())}")
+        
     except Exception as e:
         print(f"Error processing image: {str(e)}")
         sys.exit(1)
 
+def read_manifest(manifest_file):
+    """Manifest entries from a JSON list or a JSONL file (one object per line)"""
+    with open(manifest_file, 'r', encoding='utf-8') as f:
+        content = f.read()
+    
+    try:
+        entries = json.loads(content)
+    except json.JSONDecodeError:
+        entries = [json.loads(line) for line in content.splitlines() if line.strip()]
+    
+    if isinstance(entries, dict):
+        entries = entries.get('items', [entries])
+    if not isinstance(entries, list) or not all(isinstance(entry, dict) for entry in entries):
+        raise Exception("Manifest must be a list of objects")
+    return entries
+
+def manifest_output(output, output_dir, format_type):
+    """Output path (without extension) for a manifest entry's relative ``output``, kept inside output_dir"""
+    if os.path.isabs(output):
+        raise Exception(f"Manifest output must be a relative path: {output}")
+    path = os.path.normpath(os.path.join(output_dir, output))
+    if os.path.commonpath([output_dir, path]) != output_dir or path == output_dir:
+        raise Exception(f"Manifest output escapes the output directory: {output}")
+    # The format's extension is appended on write
+    stem, extension = os.path.splitext(path)
+    if extension.lower() == f".{format_type}":
+        path = stem
+    return path
+
+def manifest_items(entries, manifest_file, output_file):
+    """Normalize manifest entries; FORMAT/QUALITY/WIDTH/HEIGHT env vars are the defaults"""
+    base_dir = os.path.dirname(os.path.abspath(manifest_file))
+    output_dir = os.path.dirname(os.path.abspath(output_file))
+    defaults = {
+        'format': os.environ.get('FORMAT', 'jpg'),
+        'quality': os.environ.get('QUALITY', 80),
+        'width': os.environ.get('WIDTH'),
+        'height': os.environ.get('HEIGHT'),
+        'fit': os.environ.get('FIT', 'stretch'),
+        'profile': os.environ.get('ENCODE_PROFILE', 'smallest'),
+        'report': os.environ.get('ENCODE_REPORT', 'false').lower() == 'true'
+    }
+    
+    items = []
+    for index, entry in enumerate(entries):
+        item = dict(defaults, **entry)
+        item['index'] = index
+        if item.get('input'):
+            # Relative inputs are relative to the manifest, relative outputs to OUTPUT_FILE
+            item['input'] = os.path.normpath(os.path.join(base_dir, item['input']))
+        item['format'] = str(item['format']).lower()
+        if item.get('output'):
+            try:
+                item['output'] = manifest_output(item['output'], output_dir, item['format'])
+            except Exception as e:
+                # Reported on this item alone; the rest of the batch still runs
+                item['output'] = None
+                item['error'] = str(e)
+        else:
+            item['output'] = f"{output_file}_{index}"
+        item['fit'] = str(item['fit']).lower()
+        item['profile'] = str(item['profile']).lower()
+        items.append(item)
+    return items
+
+def convert_item(item):
+    """Convert one manifest item; failures are reported in the result, never raised"""
+    started = time.perf_counter()
+    timer = StageTimer()
+    result = {'index': item['index'], 'input': item.get('input'), 'status': 'ok'}
+    try:
+        if item.get('error'):
+            raise Exception(item['error'])
+        if not item.get('input'):
+            raise Exception("Manifest entry has no input")
+        if item.get('renditions'):
+            # Several outputs from one decode of this input
+            specs = parse_renditions(item['renditions'], item['output'], int(item['quality']), item['fit'], item['profile'])
+            result['renditions'] = convert_renditions(item['input'], specs, ResultCache.from_env(), item['report'], timer)
+        else:
+            output_path, cached, profiles = convert_file(
+                item['input'], item['output'], item['format'], int(item['quality']),
+                item.get('width'), item.get('height'), ResultCache.from_env(), item['fit'], item['profile'], item['report'], timer
+            )
+            result['output'] = output_path
+            result['bytes'] = os.path.getsize(output_path)
+            if cached:
+                result['status'] = 'cached'
+            if profiles:
+                result['profiles'] = profiles
+    except Exception as e:
+        result['status'] = 'error'
+        result['error'] = str(e)
+    
+    result['seconds'] = round(time.perf_counter() - started, 4)
+    result['timings'] = timer.report()
+    return result
+
+def convert_batch():
+    """Convert every image in MANIFEST in one run; per-item results go to <OUTPUT_FILE>.jsonl"""
+    manifest_file = os.environ.get('MANIFEST')
+    output_file = os.environ.get('OUTPUT_FILE')
+    workers = int(os.environ.get('IMAGE_WORKERS') or 0) or available_cpus()
+    
+    if not output_file:
+        print("Error: OUTPUT_FILE must be specified")
+        sys.exit(1)
+    
+    try:
+        items = manifest_items(read_manifest(manifest_file), manifest_file, output_file)
+    except Exception as e:
+        print(f"Error reading manifest: {str(e)}")
+        sys.exit(1)
+    
+    started = time.perf_counter()
+    results_path = f"{output_file}.jsonl"
+    counts = {'ok': 0, 'cached': 0, 'error': 0}
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(results_path)), exist_ok=True)
+        with open(results_path, 'w', encoding='utf-8') as results_file:
+            if workers > 1 and len(items) > 1:
+                executor = ProcessPoolExecutor(max_workers=min(workers, len(items)))
+                # Small chunks keep every worker busy without one slow image holding back a large chunk
+                results = executor.map(convert_item, items, chunksize=max(1, len(items) // (workers * 4)))
+            else:
+                executor = None
+                results = map(convert_item, items)
+            
+            try:
+                for result in results:
+                    counts[result['status']] += 1
+                    if result['status'] == 'error':
+                        print(f"Error processing image {result['index']} ({result['input']}): {result['error']}")
+                    results_file.write(json.dumps(result) + '\n')
+                    results_file.flush()
+            finally:
+                if executor:
+                    executor.shutdown()
+    except Exception as e:
+        print(f"Error processing images: {str(e)}")
+        sys.exit(1)
+    
+    elapsed = time.perf_counter() - started
+    print(f"Batch conversion completed: {counts['ok']} converted, {counts['cached']} cached, "
+          f"{counts['error']} failed in {elapsed:.2f}s. Results: {results_path}")
+    # Per-item failures are in the results; a batch where nothing converted is a failed run
+    if items and counts['error'] == len(items):
+        print(f"Error: all {len(items)} images failed")
+        sys.exit(1)
+
+def convert_from_env():
+    """Run the conversion the environment asks for (also one warm worker job)"""
+    if os.environ.get('MANIFEST'):
+        convert_batch()
+    elif os.environ.get('RENDITIONS'):
+        create_renditions()
+    else:
+        convert_image()
+
+def main():
+    # Warm worker mode: spooled jobs run in this process, already imported
+    if os.environ.get('WORKER_SPOOL'):
+        SpoolWorker.from_env(convert_from_env, preload=WARM_MODULES).serve()
+    else:
+        convert_from_env()
+
 if __name__ == "__main__":
-    convert_image()
\ No newline at end of file
+    main()
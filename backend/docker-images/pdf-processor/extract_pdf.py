@@ -3,39 +3,354 @@ import sys
 import json
 import traceback
 import os
-from pathlib import Path
-import PyPDF2
-import pdfplumber
-import pytesseract
-from pdf2image import convert_from_path
 import base64
+import re
+import time
+from collections import deque
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+# Modules shared by the processor images (copied next to this script in the image)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+from result_cache import ResultCache
+from pdf_document import PDFDocument, open_document, pdf_buffer, source_path
+from stage_timer import StageTimer, peak_rss_mb, profiled
+from warm_worker import SpoolWorker
+from output_writers import NO_TEXT_MESSAGE, OUTPUT_EXTENSIONS, TABLE_FORMATS, format_page, open_table_writer, open_writer, page_report, table_records
+
+# Part of every result cache key; bump whenever the extraction output changes
+PROCESSOR_VERSION = '1.6'
+
+# Heavy dependencies are imported on the code paths that need them (OCR is a
+# last resort, and the stdin error path needs none); a warm worker imports
+# them before it forks, so no job pays for them
+WARM_MODULES = ['PyPDF2', 'pdfplumber', 'pytesseract', 'pdf2image']
+
+# OCR render resolution: 200 DPI for Letter/A4, lower for posters, higher for small pages
+OCR_DEFAULT_DPI = 200
+OCR_TARGET_PIXELS = 2200
+OCR_MIN_DPI = 100
+OCR_MAX_DPI = 300
+
+# Per-page triage: a page with almost no text layer that is mostly image is a scan
+TRIAGE_MIN_TEXT_CHARS = 20
+TRIAGE_MIN_IMAGE_COVERAGE = 0.3
+PAGE_STRATEGIES = ['auto', 'pypdf2', 'pdfplumber', 'ocr']
+
+# Table pre-filter: a ruled table needs at least a 2x2 grid of edges (a
+# rectangle operator draws four), so pages below this skip layout analysis
+TABLE_MIN_EDGES = 6
+RULING_PATTERN = re.compile(rb'\s(re|l)\s')
+LINE_STRATEGIES = ('lines', 'lines_strict')
+
+def available_cpus():
+    """CPUs this process may run on (respects container cpusets)"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+def pdfplumber_page(page, extract_tables=False, table_settings=None):
+    """Text and tables of one pdfplumber page"""
+    page_text = page.extract_text() or ''
+    tables = page.extract_tables(table_settings or {}) if extract_tables else []
+    
+    # Drop the page's cached layout objects before moving on
+    page.flush_cache()
+    return page_text, tables
+
+def plumber_result(document, page_num, extract_tables=False, table_settings=None):
+    """pdfplumber text and tables for a page, cached on the document"""
+    settings_key = json.dumps(table_settings, sort_keys=True) if table_settings else None
+    return document.page_result(
+        ('pdfplumber', page_num, extract_tables, settings_key),
+        lambda: pdfplumber_page(document.plumber.pages[page_num], extract_tables, table_settings)
+    )
+
+def ocr_dpi(page):
+    """Render DPI that gives the page's long side about OCR_TARGET_PIXELS pixels"""
+    try:
+        long_side = max(float(page.mediabox.width), float(page.mediabox.height)) / 72
+    except Exception:
+        return OCR_DEFAULT_DPI
+    if long_side <= 0:
+        return OCR_DEFAULT_DPI
+    return int(min(OCR_MAX_DPI, max(OCR_MIN_DPI, OCR_TARGET_PIXELS / long_side)))
+
+def ocr_page(document, page_num):
+    """OCR one page, rasterized on its own into the document's scratch folder (cached)"""
+    def recognize():
+        import pytesseract
+        
+        if document.pdf_path is None:
+            # No file for poppler to read: pdfium renders the page from memory
+            image = document.render_page(page_num, ocr_dpi(document.pages[page_num]))
+            return pytesseract.image_to_string(image, lang='eng')
+        
+        from pdf2image import convert_from_path
+        
+        # Rasterize just this page to disk (poppler reads the PDF by path);
+        # tesseract reads the image file directly
+        image_paths = convert_from_path(
+            document.pdf_path,
+            dpi=ocr_dpi(document.pages[page_num]),
+            first_page=page_num + 1,
+            last_page=page_num + 1,
+            output_folder=document.output_folder,
+            paths_only=True,
+            grayscale=True
+        )
+        page_text = ''
+        for image_path in image_paths:
+            page_text += pytesseract.image_to_string(image_path, lang='eng')
+            os.remove(image_path)
+        return page_text
+    
+    return document.page_result(('ocr', page_num), recognize)
+
+def image_coverage(page):
+    """Fraction of the page area painted by image XObjects"""
+    resources = page.get('/Resources')
+    xobjects = resources.get_object().get('/XObject') if resources else None
+    if not xobjects:
+        return 0.0
+    xobjects = xobjects.get_object()
+    images = {name for name in xobjects if xobjects[name].get_object().get('/Subtype') == '/Image'}
+    if not images:
+        return 0.0
+    
+    # An image fills the unit square mapped through the CTM, so its area is
+    # the absolute determinant of the CTM; only that scale factor is tracked
+    from PyPDF2.generic import ContentStream
+    
+    page_area = abs(float(page.mediabox.width) * float(page.mediabox.height)) or 1.0
+    scale = 1.0
+    stack = []
+    painted = 0.0
+    contents = page.get_contents()
+    if contents is None:
+        return 0.0
+    for operands, operator in ContentStream(contents, page.pdf).operations:
+        if operator == b'q':
+            stack.append(scale)
+        elif operator == b'Q':
+            scale = stack.pop() if stack else 1.0
+        elif operator == b'cm':
+            a, b, c, d = (float(value) for value in operands[:4])
+            scale *= a * d - b * c
+        elif operator == b'Do' and operands and operands[0] in images:
+            painted += abs(scale)
+    return min(1.0, painted / page_area)
+
+def ruling_edges(page):
+    """Edges drawn by a page's content stream (a rectangle counts as four)"""
+    contents = page.get_contents()
+    if contents is None:
+        return 0
+    return sum(4 if op == b're' else 1 for op in RULING_PATTERN.findall(contents.get_data()))
+
+def has_ruling_lines(page, min_edges=TABLE_MIN_EDGES):
+    """Cheap table hint: the content stream draws enough edges for a ruled table"""
+    return ruling_edges(page) >= min_edges
+
+def uses_ruling_lines(table_settings=None):
+    """Whether pdfplumber finds table cells from drawn lines only (its default)"""
+    settings = table_settings or {}
+    return all(
+        settings.get(key, 'lines') in LINE_STRATEGIES
+        for key in ('vertical_strategy', 'horizontal_strategy')
+    )
+
+def parse_table_settings(value):
+    """pdfplumber table settings from the TABLE_SETTINGS JSON or an options dict (None when unset)"""
+    if isinstance(value, dict):
+        settings = value
+    elif not value or not value.strip():
+        return None
+    else:
+        try:
+            settings = json.loads(value)
+        except json.JSONDecodeError as e:
+            raise Exception(f"Invalid TABLE_SETTINGS JSON: {str(e)}")
+    if not isinstance(settings, dict):
+        raise Exception("TABLE_SETTINGS must be a JSON object")
+    
+    # Reject unknown keys and bad strategies up front rather than failing every page
+    from pdfplumber.table import TableSettings
+    try:
+        TableSettings.resolve(settings)
+    except Exception as e:
+        raise Exception(f"Invalid TABLE_SETTINGS: {str(e)}")
+    return settings
+
+def may_have_tables(page, table_settings=None):
+    """Whether a page is worth pdfplumber's table finder (always, unless it only looks for drawn lines)"""
+    return not uses_ruling_lines(table_settings) or has_ruling_lines(page)
+
+def triage_page(page, text, extract_tables=False, table_settings=None):
+    """Pick the cheapest engine that will work for a page given its PyPDF2 text"""
+    if len(text.strip()) < TRIAGE_MIN_TEXT_CHARS and image_coverage(page) >= TRIAGE_MIN_IMAGE_COVERAGE:
+        return 'ocr'
+    if extract_tables and may_have_tables(page, table_settings):
+        return 'pdfplumber'
+    return 'pypdf2'
+
+def route_page(document, page_num, record, extract_tables=False, strategy='auto', table_settings=None):
+    """Fill a page record's text and tables with the engine the page needs"""
+    if strategy in ('auto', 'pypdf2'):
+        record['text'] = document.page_text(page_num)
+        if strategy == 'auto':
+            record['engine'] = triage_page(document.pages[page_num], record['text'], extract_tables, table_settings)
+    
+    if record['engine'] == 'pdfplumber':
+        if extract_tables and strategy == 'pdfplumber':
+            # Every page is laid out for its text, but the table finder still only runs where
+            # tables can be (under auto, triage already checked before picking pdfplumber)
+            extract_tables = may_have_tables(document.pages[page_num], table_settings)
+        # pdfplumber parses the document on first use; pages that never need layout analysis skip it
+        record['text'], record['tables'] = plumber_result(document, page_num, extract_tables, table_settings)
+    elif record['engine'] == 'ocr':
+        record['text'] = ocr_page(document, page_num)
+
+def iter_routed_pages(document, start, end, extract_tables=False, strategy='auto', table_settings=None):
+    """Yield a record per page of [start, end), each page routed to its own engine"""
+    for page_num in range(start, end):
+        started = time.perf_counter()
+        cpu_started = time.process_time()
+        record = {'page': page_num + 1, 'engine': strategy, 'text': '', 'tables': []}
+        try:
+            route_page(document, page_num, record, extract_tables, strategy, table_settings)
+        except Exception as e:
+            if strategy == 'auto' and record['engine'] in ('pdfplumber', 'ocr') and record['text'].strip():
+                # The engine triage picked failed; the PyPDF2 text triage read is still good
+                record['fallback'] = {'engine': record['engine'], 'error': str(e)}
+                record['engine'] = 'pypdf2'
+                record['tables'] = []
+            else:
+                record['text'], record['tables'] = '', []
+                record['error'] = str(e)
+        
+        record['seconds'] = round(time.perf_counter() - started, 4)
+        record['cpu_seconds'] = round(time.process_time() - cpu_started, 4)
+        # High-water mark of the process the page ran in (a worker when sharded)
+        record['peak_rss_mb'] = peak_rss_mb()
+        yield record
+
+def routed_pages(source, start, end, extract_tables=False, strategy='auto', table_settings=None, single_threaded=False):
+    """Page records for [start, end) (runs in a worker process)"""
+    if single_threaded:
+        # Pages already run in parallel processes; keep tesseract from oversubscribing cores
+        os.environ['OMP_THREAD_LIMIT'] = '1'
+    
+    with open_document(source) as document:
+        return list(iter_routed_pages(document, start, end, extract_tables, strategy, table_settings))
 
 class PDFProcessor:
-    def __init__(self):
+    def __init__(self, workers=None):
         self.max_file_size = 50 * 1024 * 1024
+        self.workers = workers or int(os.getenv('PDF_WORKERS') or 0) or available_cpus()
+        self.min_pages_per_shard = 8  # Smaller ranges are not worth a worker process
+        self.shards_per_worker = 4  # Extra shards even out pages of uneven cost
+    
+    def count_pages(self, pdf_path):
+        """Number of pages in the document"""
+        with open_document(pdf_path) as document:
+            return document.num_pages
+    
+    def page_range(self, total_pages, page_start=None, page_end=None):
+        """Turn 1-based PAGE_START/PAGE_END into a 0-based [start, end) range"""
+        start = (page_start - 1) if page_start else 0
+        end = page_end if page_end else total_pages
+        return max(0, start), min(total_pages, end)
+    
+    def shard_pages(self, start, end, min_pages=None):
+        """Split [start, end) into contiguous shards for the worker pool"""
+        min_pages = min_pages or self.min_pages_per_shard
+        pages = end - start
+        if self.workers <= 1 or pages < 2 * min_pages:
+            return [(start, end)]
         
+        shard_size = max(min_pages, -(-pages // (self.workers * self.shards_per_worker)))
+        return [(shard_start, min(end, shard_start + shard_size)) for shard_start in range(start, end, shard_size)]
+    
+    def iter_sharded(self, worker, pdf_path, start, end, *args, min_pages=None):
+        """Run worker over page shards in parallel, yielding results in page order"""
+        shards = self.shard_pages(start, end, min_pages)
+        if len(shards) == 1:
+            # In-process: reuse the caller's open document session if there is one
+            yield worker(pdf_path, start, end, *args)
+            return
+        
+        # Each worker process opens the PDF itself; nothing parsed is pickled across
+        if isinstance(pdf_path, PDFDocument):
+            pdf_path = pdf_path.pdf_path
+        workers = min(self.workers, len(shards))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # Only a few shards run ahead of the consumer, so finished results never pile up
+            remaining = iter(shards)
+            pending = deque(
+                pool.submit(worker, pdf_path, shard_start, shard_end, *args)
+                for shard_start, shard_end in islice(remaining, 2 * workers)
+            )
+            while pending:
+                result = pending.popleft().result()
+                for shard_start, shard_end in islice(remaining, 1):
+                    pending.append(pool.submit(worker, pdf_path, shard_start, shard_end, *args))
+                yield result
+    
+    def run_sharded(self, worker, pdf_path, start, end, *args, min_pages=None):
+        """Run worker over page shards in parallel; results come back in page order"""
+        return list(self.iter_sharded(worker, pdf_path, start, end, *args, min_pages=min_pages))
+    
+    def iter_pages(self, pdf_path, page_start=None, page_end=None, extract_tables=False, strategy='auto', table_settings=None):
+        """Yield one record per page, in page order, as soon as each is extracted"""
+        if strategy not in PAGE_STRATEGIES:
+            raise Exception(f"Unknown PDF strategy: {strategy}. Use one of: {', '.join(PAGE_STRATEGIES)}")
+        
+        start, end = self.page_range(self.count_pages(pdf_path), page_start, page_end)
+        pages = failed = 0
+        first_error = None
+        for record in self.iter_page_records(pdf_path, start, end, extract_tables, strategy, table_settings):
+            pages += 1
+            if 'error' in record:
+                failed += 1
+                first_error = first_error or record['error']
+            yield record
+        
+        # A page that fails is reported in place; a run where every page failed is an error
+        if pages and failed == pages:
+            raise Exception(f"Extraction failed on all {pages} pages: {first_error}")
+    
+    def iter_page_records(self, pdf_path, start, end, extract_tables=False, strategy='auto', table_settings=None):
+        """Yield the record of every page in [start, end), sharded across workers when worthwhile"""
+        # Scanned pages cost seconds each, so even short ranges are split
+        min_pages = 1 if strategy == 'ocr' else 2
+        # Worker processes open the file by path; an in-memory PDF stays in this process
+        if source_path(pdf_path) is None or len(self.shard_pages(start, end, min_pages)) == 1:
+            with open_document(pdf_path) as document:
+                yield from iter_routed_pages(document, start, end, extract_tables, strategy, table_settings)
+            return
+        
+        args = (extract_tables, strategy, table_settings, True)
+        for records in self.iter_sharded(routed_pages, pdf_path, start, end, *args, min_pages=min_pages):
+            yield from records
+    
+    def extract_pages(self, pdf_path, page_start=None, page_end=None, extract_tables=False, strategy='auto'):
+        """Extract text per page with the engine each page needs; returns text, tables and page reports"""
+        parts = []
+        tables_data = []
+        page_reports = []
+        for record in self.iter_pages(pdf_path, page_start, page_end, extract_tables, strategy):
+            parts.append(format_page(record))
+            tables_data.extend(table_records(record))
+            page_reports.append(page_report(record))
+        return ''.join(parts), tables_data, page_reports
+    
     def extract_text_pypdf2(self, pdf_path, page_start=None, page_end=None):
         """Extract text using PyPDF2"""
-        text = ""
         try:
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                total_pages = len(pdf_reader.pages)
-                
-                # Determine page range
-                start = (page_start - 1) if page_start else 0
-                end = page_end if page_end else total_pages
-                start = max(0, start)
-                end = min(total_pages, end)
-                
-                for page_num in range(start, end):
-                    try:
-                        page = pdf_reader.pages[page_num]
-                        page_text = page.extract_text()
-                        if page_text.strip():
-                            text += f"\n--- Page {page_num + 1} ---\n{page_text}\n"
-                    except Exception as e:
-                        text += f"\n--- Page {page_num + 1} (Error: {str(e)}) ---\n"
+            text, _, _ = self.extract_pages(pdf_path, page_start, page_end, False, 'pypdf2')
         except Exception as e:
             raise Exception(f"PyPDF2 extraction failed: {str(e)}")
         
@@ -43,46 +358,8 @@ class PDFProcessor:
     
     def extract_text_pdfplumber(self, pdf_path, page_start=None, page_end=None, extract_tables=False):
         """Extract text using pdfplumber (better for complex layouts)"""
-        text = ""
-        tables_data = []
-        
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                total_pages = len(pdf.pages)
-                
-                # Determine page range
-                start = (page_start - 1) if page_start else 0
-                end = page_end if page_end else total_pages
-                start = max(0, start)
-                end = min(total_pages, end)
-                
-                for page_num in range(start, end):
-                    try:
-                        page = pdf.pages[page_num]
-                        page_text = page.extract_text()
-                        if page_text and page_text.strip():
-                            text += f"\n--- Page {page_num + 1} ---\n{page_text}\n"
-                        
-                        # Extract tables if requested
-                        if extract_tables:
-                            tables = page.extract_tables()
-                            if tables:
-                                text += f"\n--- Tables on Page {page_num + 1} ---\n"
-                                for table_num, table in enumerate(tables):
-                                    text += f"Table {table_num + 1}:\n"
-                                    for row in table:
-                                        if row:
-                                            text += " | ".join([cell or "" for cell in row]) + "\n"
-                                    text += "\n"
-                                    
-                                    # Store table data for JSON output
-                                    tables_data.append({
-                                        'page': page_num + 1,
-                                        'table_index': table_num,
-                                        'data': table
-                                    })
-                    except Exception as e:
-                        text += f"\n--- Page {page_num + 1} (Error: {str(e)}) ---\n"
+            text, tables_data, _ = self.extract_pages(pdf_path, page_start, page_end, extract_tables, 'pdfplumber')
         except Exception as e:
             raise Exception(f"pdfplumber extraction failed: {str(e)}")
         
@@ -90,28 +367,8 @@ class PDFProcessor:
     
     def extract_text_ocr(self, pdf_path, page_start=None, page_end=None):
         """Extract text using OCR for scanned PDFs"""
-        text = ""
         try:
-            # Convert PDF to images
-            images = convert_from_path(pdf_path, dpi=200)
-            total_pages = len(images)
-            
-            # Determine page range
-            start = (page_start - 1) if page_start else 0
-            end = page_end if page_end else total_pages
-            start = max(0, start)
-            end = min(total_pages, end)
-            
-            for page_num in range(start, end):
-                try:
-                    image = images[page_num]
-                    # Use OCR to extract text from image
-                    page_text = pytesseract.image_to_string(image, lang='eng')
-                    if page_text.strip():
-                        text += f"\n--- Page {page_num + 1} (OCR) ---\n{page_text}\n"
-                except Exception as e:
-                    text += f"\n--- Page {page_num + 1} (OCR Error: {str(e)}) ---\n"
-                    
+            text, _, _ = self.extract_pages(pdf_path, page_start, page_end, False, 'ocr')
         except Exception as e:
             raise Exception(f"OCR extraction failed: {str(e)}")
         
@@ -119,29 +376,81 @@ class PDFProcessor:
     
     def get_pdf_metadata(self, pdf_path):
         """Extract PDF metadata"""
-        metadata = {}
         try:
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                
-                # Basic info
-                metadata['num_pages'] = len(pdf_reader.pages)
+            with open_document(pdf_path) as document:
+                metadata = document.metadata()
+        except Exception as e:
+            metadata = {'error': f"Failed to extract metadata: {str(e)}"}
+
+        return metadata
+
+    def process_pdf(self, pdf_data, options=None):
+        """Extract a PDF held in memory: bytes, a memoryview or a file-like object.
+        
+        Pages are routed exactly as in Docker mode, but every parser reads a
+        BytesIO over the caller's buffer, so the PDF is never written to disk.
+        Returns the layout of the JSON output (text, metadata, tables,
+        extraction_info) plus success and error.
+        """
+        if options is None:
+            options = {}
+        
+        result = {
+            'success': False,
+            'text': '',
+            'metadata': {},
+            'tables': [],
+            'extraction_info': {},
+            'error': ''
+        }
+        
+        timer = StageTimer(log=sys.stderr)
+        try:
+            buffer = pdf_buffer(pdf_data)
+            if len(buffer) > self.max_file_size:
+                raise Exception(f"File too large. Maximum size is {self.max_file_size // (1024*1024)}MB")
+            
+            extract_tables = bool(options.get('extract_tables', False))
+            strategy = (options.get('strategy') or 'auto').lower()
+            table_settings = parse_table_settings(options.get('table_settings'))
+            page_start = int(options['page_start']) if options.get('page_start') else None
+            page_end = int(options['page_end']) if options.get('page_end') else None
+            
+            with PDFDocument(buffer) as document:
+                with timer.stage('metadata'):
+                    result['metadata'] = self.get_pdf_metadata(document)
                 
-                # Document info
-                if pdf_reader.metadata:
-                    info = pdf_reader.metadata
-                    metadata['title'] = info.get('/Title', '')
-                    metadata['author'] = info.get('/Author', '')
-                    metadata['subject'] = info.get('/Subject', '')
-                    metadata['creator'] = info.get('/Creator', '')
-                    metadata['producer'] = info.get('/Producer', '')
-                    metadata['creation_date'] = str(info.get('/CreationDate', ''))
-                    metadata['modification_date'] = str(info.get('/ModDate', ''))
-                    
+                parts = []
+                engines = {}
+                page_reports = []
+                pages = self.iter_pages(document, page_start, page_end, extract_tables, strategy, table_settings)
+                for record in timer.iterate('pages', pages):
+                    timer.add(f"engine_{record['engine']}", record['seconds'], record['cpu_seconds'], record['peak_rss_mb'])
+                    parts.append(format_page(record))
+                    result['tables'].extend(table_records(record))
+                    page_reports.append(page_report(record))
+                    engines[record['engine']] = engines.get(record['engine'], 0) + 1
+            
+            text = ''.join(parts)
+            result['text'] = text if text.strip() else NO_TEXT_MESSAGE
+            result['extraction_info'] = {
+                'pages_processed': f"{page_start or 1}-{page_end or result['metadata'].get('num_pages', '?')}",
+                'extract_tables': extract_tables,
+                'extract_images': bool(options.get('extract_images', False)),
+                'strategy': strategy,
+                'engines': engines,
+                'pages': page_reports,
+                'timings': timer.report()
+            }
+            if table_settings:
+                result['extraction_info']['table_settings'] = table_settings
+            result['success'] = True
+        
         except Exception as e:
-            metadata['error'] = f"Failed to extract metadata: {str(e)}"
+            result['error'] = str(e)
+            result['traceback'] = traceback.format_exc()
         
-        return metadata
+        return result
 
 def process_from_env():
     """Process PDF using environment variables (Docker mode)"""
@@ -154,6 +463,9 @@ def process_from_env():
     output_format = os.getenv('OUTPUT_FORMAT', 'text').lower()
     page_start = os.getenv('PAGE_START')
     page_end = os.getenv('PAGE_END')
+    strategy = os.getenv('PDF_STRATEGY', 'auto').lower()
+    table_settings = parse_table_settings(os.getenv('TABLE_SETTINGS'))
+    table_format = os.getenv('TABLE_FORMAT', 'csv').strip().lower() or 'csv'
     
     print(f"Processing: {input_file}", file=sys.stderr)
     print(f"Output: {output_file}", file=sys.stderr)
@@ -166,130 +478,159 @@ def process_from_env():
     if not os.path.exists(input_file):
         raise Exception(f"Input file not found: {input_file}")
     
+    if extract_tables and table_format not in TABLE_FORMATS:
+        raise Exception(f"Unknown TABLE_FORMAT: {table_format}. Use one of: {', '.join(TABLE_FORMATS)}")
+    
     # Parse page range
     page_start_int = int(page_start) if page_start and page_start.strip() else None
     page_end_int = int(page_end) if page_end and page_end.strip() else None
     
-    # Process PDF
-    processor = PDFProcessor()
-    
-    # Get metadata
-    metadata = processor.get_pdf_metadata(input_file)
-    print(f"PDF has {metadata.get('num_pages', 'unknown')} pages", file=sys.stderr)
+    output_extension = OUTPUT_EXTENSIONS.get(output_format, 'txt')
+    output_path = f"{output_file}.{output_extension}"
+    # Tables also go to their own file next to the output, one row per cell
+    tables_path = f"{output_file}.tables.{table_format}" if extract_tables else None
     
-    # Extract text and tables
-    text, tables_data = processor.extract_text_pdfplumber(
-        input_file, 
-        page_start_int, 
-        page_end_int, 
-        extract_tables
-    )
+    # Identical file + options: reuse the stored extraction (and table file)
+    cache = ResultCache.from_env()
+    if cache:
+        options = {
+            'page_start': page_start_int,
+            'page_end': page_end_int,
+            'extract_tables': extract_tables,
+            'extract_images': extract_images,
+            'output_format': output_extension,
+            'strategy': strategy,
+            'table_settings': table_settings
+        }
+        cache_key = cache.key(input_file, 'pdf-processor', PROCESSOR_VERSION, options)
+        tables_key = cache.key(input_file, 'pdf-processor', PROCESSOR_VERSION, dict(options, table_format=table_format)) if tables_path else None
+        if cache.fetch(cache_key, output_path) and (not tables_path or cache.fetch(tables_key, tables_path)):
+            print(f"Cache hit. Output saved to: {output_path}", file=sys.stderr)
+            return output_path
     
-    if not text.strip():
-        # Fallback to PyPDF2
-        print("pdfplumber extracted no text, trying PyPDF2...", file=sys.stderr)
-        text = processor.extract_text_pypdf2(input_file, page_start_int, page_end_int)
+    # Process PDF
+    processor = PDFProcessor()
+    timer = StageTimer(log=sys.stderr)
     
-    if not text.strip():
-        # Last resort: OCR (if available)
-        print("PyPDF2 extracted no text, trying OCR...", file=sys.stderr)
-        try:
-            text = processor.extract_text_ocr(input_file, page_start_int, page_end_int)
-        except Exception as e:
-            print(f"OCR failed: {e}", file=sys.stderr)
-            text = "No text could be extracted from this PDF."
-    
-    # Prepare output data
-    result_data = {
-        'text': text,
-        'metadata': metadata,
-        'tables': tables_data if extract_tables else [],
-        'extraction_info': {
+    # One parse of the file serves metadata, triage and every extraction pass
+    with profiled(output_path), PDFDocument(input_file) as document:
+        # Get metadata
+        with timer.stage('metadata'):
+            metadata = processor.get_pdf_metadata(document)
+        print(f"PDF has {metadata.get('num_pages', 'unknown')} pages", file=sys.stderr)
+        
+        extraction_info = {
             'pages_processed': f"{page_start_int or 1}-{page_end_int or metadata.get('num_pages', '?')}",
             'extract_tables': extract_tables,
-            'extract_images': extract_images
+            'extract_images': extract_images,
+            'strategy': strategy
         }
-    }
+        if table_settings:
+            extraction_info['table_settings'] = table_settings
+        
+        # Route each page to PyPDF2, pdfplumber or OCR and write it out as soon as it is done
+        with open_writer(output_format, output_path, metadata, extraction_info) as writer, \
+                (open_table_writer(table_format, tables_path, metadata, extraction_info) if tables_path else nullcontext()) as table_writer:
+            pages = processor.iter_pages(document, page_start_int, page_end_int, extract_tables, strategy, table_settings)
+            # 'pages' is the wait for the next record; the per-engine stages sum
+            # the pages' own times, which overlap when shards run in parallel
+            for record in timer.iterate('pages', pages):
+                timer.add(f"engine_{record['engine']}", record['seconds'], record['cpu_seconds'], record['peak_rss_mb'])
+                with timer.stage('write', log=False):
+                    writer.write_page(record)
+                    if tables_path:
+                        table_writer.write_page(record)
+            writer.timings = timer.report()
     
-    # Write output based on format
-    if output_format == 'json':
-        output_path = f"{output_file}.json"
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(result_data, f, indent=2, ensure_ascii=False)
-    elif output_format == 'markdown':
-        output_path = f"{output_file}.md"
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(f"# PDF Extraction Results\n\n")
-            f.write(f"**Pages:** {result_data['extraction_info']['pages_processed']}\n")
-            f.write(f"**Total Pages:** {metadata.get('num_pages', 'Unknown')}\n\n")
-            f.write(f"## Text Content\n\n{text}\n")
-            
-            if tables_data:
-                f.write(f"\n## Tables\n\n")
-                for table in tables_data:
-                    f.write(f"### Table on Page {table['page']}\n\n")
-                    if table['data']:
-                        for row in table['data']:
-                            f.write('| ' + ' | '.join(str(cell) if cell else '' for cell in row) + ' |\n')
-                    f.write('\n')
-    else:
-        # Default to text format
-        output_path = f"{output_file}.txt"
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(text)
+    print(f"Pages per engine: {writer.engines}", file=sys.stderr)
+    print(f"Timings: {json.dumps(timer.report()['stages'])}", file=sys.stderr)
+    
+    if cache:
+        cache.store(cache_key, output_path)
+        if tables_path:
+            cache.store(tables_key, tables_path)
     
     print(f"Extraction completed successfully. Output saved to: {output_path}", file=sys.stderr)
-    print(f"Extracted {len(text)} characters of text", file=sys.stderr)
+    print(f"Extracted {writer.characters} characters of text", file=sys.stderr)
+    if tables_path:
+        print(f"Extracted {table_writer.table_count} tables. Tables saved to: {tables_path}", file=sys.stderr)
     
     return output_path
 
+def read_stdin_pdf(stream):
+    """(PDF source, options) from stdin in any of the accepted framings.
+    
+    - raw PDF bytes (no options)
+    - a JSON header line such as {"options": {...}}, then the raw PDF bytes
+    - a JSON document with the PDF base64-encoded in "pdf_data"
+    
+    Raw input is read straight into the buffer the extractors use; only
+    base64 input is decoded into a second copy.
+    """
+    first = stream.peek(1)[:1]
+    if not first:
+        return None, {}
+    if first != b'{':
+        return stream.read(), {}
+    
+    header_line = stream.readline()
+    try:
+        header = json.loads(header_line)
+    except json.JSONDecodeError:
+        # A multi-line JSON document: the PDF must be inside it
+        header = json.loads(header_line + stream.read())
+    if not isinstance(header, dict):
+        raise Exception("JSON input must be an object")
+    
+    options = header.get('options') or {}
+    if 'pdf_data' in header:
+        return base64.b64decode(header['pdf_data']), options
+    return stream.read(), options
+
 def process_from_stdin():
     """Process PDF from stdin (original mode)"""
-    # Read input from stdin
-    input_data = sys.stdin.buffer.read()
+    pdf_data, options = read_stdin_pdf(sys.stdin.buffer)
     
-    if not input_data:
+    if not pdf_data:
         return {'error': 'No input provided'}
     
-    # Parse input (expect base64 encoded PDF data and options)
-    try:
-        # First try to parse as JSON
-        text_input = input_data.decode('utf-8')
-        data = json.loads(text_input)
-        
-        pdf_data = base64.b64decode(data['pdf_data'])
-        options = data.get('options', {})
-        
-    except (json.JSONDecodeError, UnicodeDecodeError):
-        # Assume raw PDF data
-        pdf_data = input_data
-        options = {}
-    
-    # Process the PDF using the original method
     processor = PDFProcessor()
-    result = processor.process_pdf(pdf_data, options)
-    
-    return result
+    return processor.process_pdf(pdf_data, options)
+
+def exit_with_error(e):
+    """Print a JSON error for the failed run and exit with code 1"""
+    error_result = {
+        'success': False,
+        'error': f'Processing error: {str(e)}',
+        'traceback': traceback.format_exc()
+    }
+    print(json.dumps(error_result), file=sys.stderr)
+    sys.exit(1)
+
+def run_from_env():
+    """Docker mode (and each warm worker job)"""
+    try:
+        process_from_env()
+    except Exception as e:
+        exit_with_error(e)
 
 def main():
+    # Warm worker mode: spooled jobs run in this process, already imported
+    if os.getenv('WORKER_SPOOL'):
+        SpoolWorker.from_env(run_from_env, preload=WARM_MODULES).serve()
+        return
+    
+    # Check if running in Docker environment mode (with env vars)
+    if os.getenv('INPUT_FILE') and os.getenv('OUTPUT_FILE'):
+        run_from_env()
+        return
+    
     try:
-        # Check if running in Docker environment mode (with env vars)
-        if os.getenv('INPUT_FILE') and os.getenv('OUTPUT_FILE'):
-            # Docker environment mode
-            process_from_env()
-        else:
-            # Original stdin mode
-            result = process_from_stdin()
-            print(json.dumps(result, ensure_ascii=False, indent=2))
-        
+        # Original stdin mode
+        result = process_from_stdin()
+        print(json.dumps(result, ensure_ascii=False, indent=2))
     except Exception as e:
-        error_result = {
-            'success': False,
-            'error': f'Processing error: {str(e)}',
-            'traceback': traceback.format_exc()
-        }
-        print(json.dumps(error_result), file=sys.stderr)
-        sys.exit(1)
+        exit_with_error(e)
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,307 @@
+import abc
+import csv
+import json
+import shutil
+import tempfile
+
+OUTPUT_EXTENSIONS = {
+    'text': 'txt',
+    'markdown': 'md',
+    'json': 'json',
+    'jsonl': 'jsonl'
+}
+
+# Formats of the table file written next to the output, one row per cell
+TABLE_FORMATS = ('csv', 'parquet')
+TABLE_COLUMNS = ['page', 'table_index', 'row_index', 'column_index', 'value']
+
+NO_TEXT_MESSAGE = "No text could be extracted from this PDF."
+
+
+def format_page(record):
+    """Plain-text block for one page record (the layout of the text output)"""
+    page = record['page']
+    if 'error' in record:
+        label = 'OCR Error' if record['engine'] == 'ocr' else 'Error'
+        return f"\n--- Page {page} ({label}: {record['error']}) ---\n"
+
+    parts = []
+    if record['text'].strip():
+        suffix = ' (OCR)' if record['engine'] == 'ocr' else ''
+        parts.append(f"\n--- Page {page}{suffix} ---\n{record['text']}\n")
+
+    if record['tables']:
+        parts.append(f"\n--- Tables on Page {page} ---\n")
+        for table_num, table in enumerate(record['tables']):
+            parts.append(f"Table {table_num + 1}:\n")
+            for row in table:
+                if row:
+                    parts.append(" | ".join([cell or "" for cell in row]) + "\n")
+            parts.append("\n")
+    return ''.join(parts)
+
+
+def table_records(record):
+    """Table entries of a page record as stored in the JSON output"""
+    return [
+        {'page': record['page'], 'table_index': table_num, 'data': table}
+        for table_num, table in enumerate(record['tables'])
+    ]
+
+
+def table_cells(record):
+    """(page, table_index, row_index, column_index, value) for every cell of a page record"""
+    for table_num, table in enumerate(record['tables']):
+        for row_num, row in enumerate(table):
+            for column_num, value in enumerate(row or []):
+                yield record['page'], table_num, row_num, column_num, value
+
+
+def page_report(record):
+    """Engine and timing of a page record, without its content"""
+    keys = ('page', 'engine', 'seconds', 'cpu_seconds', 'peak_rss_mb', 'error', 'fallback')
+    return {key: record[key] for key in keys if key in record}
+
+
+class PageWriter(abc.ABC):
+    """Writes page records to the output file as they arrive.
+
+    Nothing but per-page reports is kept in memory; content that belongs
+    after the text in the output layout (tables) is spooled to a temporary
+    file. The file is flushed after every page so partial results can be
+    tailed while the job runs.
+    """
+
+    binary = False
+    newline = None
+
+    def __init__(self, path, metadata, info):
+        self.path = path
+        self.metadata = metadata
+        self.info = info
+        if self.binary:
+            self.file = open(path, 'wb')
+        else:
+            self.file = open(path, 'w', encoding='utf-8', newline=self.newline)
+        self.reports = []
+        self.engines = {}
+        self.timings = None
+        self.characters = 0
+        self.has_text = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        try:
+            if exc_type is None:
+                self.finish()
+        finally:
+            self.file.close()
+
+    def start(self):
+        pass
+
+    def write_page(self, record):
+        self.reports.append(page_report(record))
+        self.engines[record['engine']] = self.engines.get(record['engine'], 0) + 1
+        self.write_content(record)
+        self.file.flush()
+
+    @abc.abstractmethod
+    def write_content(self, record):
+        """Write one page record's content in this writer's format"""
+
+    def write_text(self, text):
+        """Write a block of text content, tracking whether any real text was seen"""
+        self.characters += len(text)
+        self.has_text = self.has_text or bool(text.strip())
+        self.file.write(text)
+
+    def summary(self):
+        if self.timings:
+            return {'engines': self.engines, 'timings': self.timings}
+        return {'engines': self.engines}
+
+    def finish(self):
+        pass
+
+
+class TextWriter(PageWriter):
+    def write_content(self, record):
+        self.write_text(format_page(record))
+
+    def finish(self):
+        if not self.has_text:
+            self.file.write(NO_TEXT_MESSAGE)
+
+
+class MarkdownWriter(PageWriter):
+    def start(self):
+        self.tables = tempfile.TemporaryFile('w+', encoding='utf-8')
+        self.table_count = 0
+        self.file.write("# PDF Extraction Results\n\n")
+        self.file.write(f"**Pages:** {self.info['pages_processed']}\n")
+        self.file.write(f"**Total Pages:** {self.metadata.get('num_pages', 'Unknown')}\n\n")
+        self.file.write("## Text Content\n\n")
+
+    def write_content(self, record):
+        self.write_text(format_page(record))
+        for table in record.get('tables', []):
+            self.table_count += 1
+            self.tables.write(f"### Table on Page {record['page']}\n\n")
+            for row in table:
+                self.tables.write('| ' + ' | '.join(str(cell) if cell else '' for cell in row) + ' |\n')
+            self.tables.write('\n')
+
+    def finish(self):
+        if not self.has_text:
+            self.file.write(NO_TEXT_MESSAGE)
+        self.file.write("\n")
+        if self.table_count:
+            self.file.write("\n## Tables\n\n")
+            self.tables.seek(0)
+            shutil.copyfileobj(self.tables, self.file)
+        self.tables.close()
+
+
+class JSONWriter(PageWriter):
+    """The single JSON document, written as a stream (text first, then tables)"""
+
+    def start(self):
+        self.tables = tempfile.TemporaryFile('w+', encoding='utf-8')
+        self.table_count = 0
+        self.file.write('{\n  "text": "')
+
+    def write_content(self, record):
+        text = format_page(record)
+        self.characters += len(text)
+        self.has_text = self.has_text or bool(text.strip())
+        # A JSON string can be written in pieces: encode, then drop the quotes
+        self.file.write(json.dumps(text, ensure_ascii=False)[1:-1])
+        for table in table_records(record):
+            self.tables.write(',\n' if self.table_count else '\n')
+            self.tables.write(self.nested(table, 2))
+            self.table_count += 1
+
+    def nested(self, value, level):
+        """Indented JSON for a value that sits ``level`` levels deep"""
+        return ' ' * (2 * level) + json.dumps(value, indent=2, ensure_ascii=False).replace('\n', '\n' + ' ' * (2 * level))
+
+    def finish(self):
+        if not self.has_text:
+            self.file.write(json.dumps(NO_TEXT_MESSAGE)[1:-1])
+        self.file.write('",\n  "metadata": ' + self.nested(self.metadata, 1).lstrip())
+        self.file.write(',\n  "tables": [')
+        self.tables.seek(0)
+        shutil.copyfileobj(self.tables, self.file)
+        self.tables.close()
+        self.file.write('\n  ]' if self.table_count else ']')
+        info = dict(self.info, **self.summary(), pages=self.reports)
+        self.file.write(',\n  "extraction_info": ' + self.nested(info, 1).lstrip() + '\n}')
+
+
+class JSONLWriter(PageWriter):
+    """One JSON record per line: a document header, one record per page, a summary"""
+
+    def start(self):
+        self.write_record({'type': 'document', 'metadata': self.metadata, 'extraction_info': self.info})
+
+    def write_record(self, record):
+        self.file.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    def write_content(self, record):
+        self.characters += len(record['text'])
+        self.has_text = self.has_text or bool(record['text'].strip())
+        self.write_record(dict({'type': 'page'}, **record))
+
+    def finish(self):
+        summary = dict({'type': 'summary'}, **self.summary(), characters=self.characters)
+        if not self.has_text:
+            summary['message'] = NO_TEXT_MESSAGE
+        self.write_record(summary)
+
+
+class CSVTableWriter(PageWriter):
+    """Tables only, in long format: a header, then one row per cell"""
+
+    newline = ''
+
+    def start(self):
+        self.table_count = 0
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(TABLE_COLUMNS)
+
+    def write_content(self, record):
+        self.table_count += len(record['tables'])
+        self.writer.writerows(table_cells(record))
+
+
+class ParquetTableWriter(PageWriter):
+    """Tables only, in long format, as Parquet row groups of up to ``row_group_size`` cells"""
+
+    binary = True
+    row_group_size = 64 * 1024
+
+    def start(self):
+        import pyarrow
+        import pyarrow.parquet
+
+        self.pyarrow = pyarrow
+        self.schema = pyarrow.schema([
+            ('page', pyarrow.int32()),
+            ('table_index', pyarrow.int32()),
+            ('row_index', pyarrow.int32()),
+            ('column_index', pyarrow.int32()),
+            ('value', pyarrow.string())
+        ])
+        self.writer = pyarrow.parquet.ParquetWriter(self.file, self.schema)
+        self.table_count = 0
+        self.rows = []
+
+    def write_content(self, record):
+        self.table_count += len(record['tables'])
+        self.rows.extend(table_cells(record))
+        if len(self.rows) >= self.row_group_size:
+            self.write_rows()
+
+    def write_rows(self):
+        if not self.rows:
+            return
+        columns = [
+            self.pyarrow.array(values, type=field.type)
+            for values, field in zip(zip(*self.rows), self.schema)
+        ]
+        self.writer.write_table(self.pyarrow.Table.from_arrays(columns, schema=self.schema))
+        self.rows = []
+
+    def finish(self):
+        # An empty file still gets the schema, so readers see the columns
+        self.write_rows()
+        self.writer.close()
+
+
+WRITERS = {
+    'text': TextWriter,
+    'markdown': MarkdownWriter,
+    'json': JSONWriter,
+    'jsonl': JSONLWriter
+}
+
+TABLE_WRITERS = {
+    'csv': CSVTableWriter,
+    'parquet': ParquetTableWriter
+}
+
+
+def open_writer(output_format, path, metadata, info):
+    """Page writer for an OUTPUT_FORMAT (unknown formats fall back to text)"""
+    return WRITERS.get(output_format, TextWriter)(path, metadata, info)
+
+
+def open_table_writer(table_format, path, metadata, info):
+    """Table file writer for a TABLE_FORMAT"""
+    if table_format not in TABLE_WRITERS:
+        raise Exception(f"Unknown table format: {table_format}. Use one of: {', '.join(TABLE_FORMATS)}")
+    return TABLE_WRITERS[table_format](path, metadata, info)
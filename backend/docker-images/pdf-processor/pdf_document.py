@@ -0,0 +1,191 @@
+import io
+import mmap
+import os
+import shutil
+import tempfile
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+def pdf_buffer(source):
+    """The bytes of an in-memory PDF (bytes, bytearray, memoryview or file-like), copied only when unavoidable"""
+    if isinstance(source, bytes):
+        return source
+    if isinstance(source, memoryview):
+        # A view of a whole bytes object can hand back the object itself
+        if isinstance(source.obj, bytes) and source.contiguous and source.nbytes == len(source.obj):
+            return source.obj
+        return source.tobytes()
+    if isinstance(source, bytearray):
+        return bytes(source)
+    if isinstance(source, io.BytesIO):
+        # Shares the buffer (copy-on-write) rather than copying it
+        return source.getvalue()
+    if hasattr(source, 'read'):
+        return source.read()
+    raise Exception(f"Unsupported PDF source: {type(source).__name__}")
+
+
+class PDFDocument:
+    """A PDF opened once and shared by the metadata, text, table and OCR passes.
+
+    The file is memory-mapped and each parser reads from its own mapping of
+    it, so the bytes live once in the page cache and the parsers never fight
+    over a file position. The PyPDF2 reader (xref, page tree) is built on
+    open; pdfplumber's parser is only built when a page first needs layout
+    analysis. Per-page results of the most recent ``cached_pages`` pages are
+    cached, so a page is not put through the same engine twice while memory
+    stays flat on long documents.
+
+    ``source`` is a path, or a PDF held in memory (see ``pdf_buffer``); an
+    in-memory document has no ``pdf_path`` and each parser gets its own
+    BytesIO over the one buffer, so nothing is written to disk.
+    """
+
+    def __init__(self, source, cached_pages=64):
+        if isinstance(source, (str, os.PathLike)):
+            self.pdf_path = source
+            self._file = open(source, 'rb')
+            self._data = None
+        else:
+            self.pdf_path = None
+            self._file = None
+            self._data = pdf_buffer(source)
+        self._maps = []
+        self._plumber = None
+        self._pdfium = None
+        self._output_folder = None
+        self.cached_pages = cached_pages
+        self._page_text = OrderedDict()
+        self.page_results = OrderedDict()
+        try:
+            import PyPDF2
+            self.reader = PyPDF2.PdfReader(self._map())
+        except Exception:
+            self.close()
+            raise
+
+    def _map(self):
+        if self._data is not None:
+            if not self._data:
+                raise Exception("PDF file is empty")
+            # BytesIO over bytes shares the buffer until written to
+            return io.BytesIO(self._data)
+        try:
+            view = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            raise Exception("PDF file is empty")
+        self._maps.append(view)
+        return view
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self._plumber is not None:
+            self._plumber.close()
+            self._plumber = None
+        if self._pdfium is not None:
+            self._pdfium.close()
+            self._pdfium = None
+        if self._output_folder:
+            shutil.rmtree(self._output_folder, ignore_errors=True)
+            self._output_folder = None
+        for view in self._maps:
+            view.close()
+        self._maps = []
+        if self._file:
+            self._file.close()
+
+    @property
+    def pages(self):
+        """PyPDF2 page objects"""
+        return self.reader.pages
+
+    @property
+    def num_pages(self):
+        return len(self.reader.pages)
+
+    @property
+    def size(self):
+        """Size of the PDF in bytes"""
+        return len(self._data) if self._data is not None else os.fstat(self._file.fileno()).st_size
+
+    @property
+    def plumber(self):
+        """pdfplumber document over the same file, parsed on first use"""
+        if self._plumber is None:
+            import pdfplumber
+            self._plumber = pdfplumber.open(self._map())
+        return self._plumber
+
+    def render_page(self, page_num, dpi):
+        """Grayscale PIL image of a page (0-based), rendered from memory by pdfium"""
+        if self._pdfium is None:
+            import pypdfium2
+            self._pdfium = pypdfium2.PdfDocument(self._data if self._data is not None else self.pdf_path)
+        page = self._pdfium[page_num]
+        try:
+            return page.render(scale=dpi / 72).to_pil().convert('L')
+        finally:
+            page.close()
+
+    @property
+    def output_folder(self):
+        """Scratch directory for rendered page images, removed on close"""
+        if self._output_folder is None:
+            self._output_folder = tempfile.mkdtemp(prefix='pdf-pages-')
+        return self._output_folder
+
+    def _cached(self, cache, key, compute):
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+        value = cache[key] = compute()
+        if len(cache) > self.cached_pages:
+            cache.popitem(last=False)
+        return value
+
+    def page_text(self, page_num):
+        """PyPDF2 text layer of a page (0-based), cached"""
+        return self._cached(self._page_text, page_num, lambda: self.pages[page_num].extract_text() or '')
+
+    def page_result(self, key, compute):
+        """Cached result of an engine pass over one page"""
+        return self._cached(self.page_results, key, compute)
+
+    def metadata(self):
+        """Page count and document info from the already-parsed reader"""
+        metadata = {'num_pages': self.num_pages}
+        info = self.reader.metadata
+        if info:
+            metadata['title'] = info.get('/Title', '')
+            metadata['author'] = info.get('/Author', '')
+            metadata['subject'] = info.get('/Subject', '')
+            metadata['creator'] = info.get('/Creator', '')
+            metadata['producer'] = info.get('/Producer', '')
+            metadata['creation_date'] = str(info.get('/CreationDate', ''))
+            metadata['modification_date'] = str(info.get('/ModDate', ''))
+        return metadata
+
+
+def source_path(source):
+    """File path behind a PDF source, or None when the PDF only exists in memory"""
+    if isinstance(source, PDFDocument):
+        return source.pdf_path
+    if isinstance(source, (str, os.PathLike)):
+        return source
+    return None
+
+
+@contextmanager
+def open_document(source):
+    """Use an open PDFDocument as-is, or open (and later close) one for a path or buffer"""
+    if isinstance(source, PDFDocument):
+        yield source
+        return
+    with PDFDocument(source) as document:
+        yield document
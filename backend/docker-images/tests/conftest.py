@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The processors are standalone scripts, not packages: put their directories
+# (and the modules they share) on the path as the images do
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+for directory in ('common', 'csv-analyzer', 'pdf-processor', 'image-processor', 'benchmarks'):
+    sys.path.insert(0, os.path.join(ROOT, directory))
@@ -0,0 +1,41 @@
+import json
+
+import pandas as pd
+import pytest
+
+import analyze_csv
+
+
+@pytest.fixture
+def env_csv(tmp_path, monkeypatch):
+    path = tmp_path / 'people.csv'
+    pd.DataFrame({'id': range(50), 'email': ['a@example.com', 'bad'] * 25}).to_csv(path, index=False)
+    monkeypatch.setenv('INPUT_FILE', str(path))
+    monkeypatch.setenv('OUTPUT_FILE', str(tmp_path / 'result'))
+    monkeypatch.setenv('RESULT_CACHE', 'false')
+    monkeypatch.delenv('ANALYSIS_TYPE', raising=False)
+    return tmp_path
+
+
+def run_env(env_csv):
+    with open(analyze_csv.process_from_env(), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_env_mode_defaults_to_the_full_analysis(env_csv):
+    result = run_env(env_csv)
+    assert result['metadata']['analysis_type'] == 'full'
+    assert result['quality']['validity']['email_email_format'] == 50.0
+    assert 'duplicate_rows' in result['analysis']
+
+
+@pytest.mark.parametrize('analysis_type', [None, ''])
+def test_every_entry_point_shares_the_default(analysis_type):
+    assert analyze_csv.CSVAnalyzer().resolve_analysis_type(analysis_type) == analyze_csv.DEFAULT_ANALYSIS_TYPE == 'full'
+
+
+def test_basic_tier_is_still_available(env_csv, monkeypatch):
+    monkeypatch.setenv('ANALYSIS_TYPE', 'basic')
+    result = run_env(env_csv)
+    assert result['metadata']['analysis_type'] == 'basic'
+    assert not result['quality']
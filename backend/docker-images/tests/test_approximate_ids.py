@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analyze_csv import CSVAnalyzer
+
+
+@pytest.fixture
+def duplicated_csv(tmp_path):
+    # 30,000 distinct rows plus 100 repeated ones: no column is an identifier
+    rows = 30000
+    df = pd.DataFrame({
+        'id': np.arange(rows),
+        'when': pd.date_range('2020-01-01', periods=rows, freq='min').astype(str),
+        'value': np.random.default_rng(0).random(rows)
+    })
+    path = tmp_path / 'dup.csv'
+    pd.concat([df, df.iloc[:100]]).to_csv(path, index=False)
+    return str(path)
+
+
+def id_recommendations(result):
+    return [text for text in result['insights']['recommendations'] if 'identifiers' in text]
+
+
+def test_exact_mode_reports_no_identifiers(duplicated_csv):
+    result = CSVAnalyzer().analyze_csv_file(duplicated_csv, {'analysis_type': 'full'})
+    assert result['success'], result['error']
+    assert id_recommendations(result) == []
+
+
+def test_approximate_mode_never_claims_certain_uniqueness(duplicated_csv):
+    result = CSVAnalyzer().analyze_csv_file(duplicated_csv, {'analysis_type': 'full', 'approximate': True})
+    assert result['success'], result['error']
+    for text in id_recommendations(result):
+        assert 'likely unique' in text
+        assert '±2.4%' in text
+
+
+def test_exact_mode_reports_unique_columns(tmp_path):
+    path = tmp_path / 'ids.csv'
+    pd.DataFrame({'id': range(1000), 'group': [i % 7 for i in range(1000)]}).to_csv(path, index=False)
+    result = CSVAnalyzer().analyze_csv_file(str(path), {'analysis_type': 'full'})
+    assert id_recommendations(result) == ['Columns id appear to be unique identifiers']
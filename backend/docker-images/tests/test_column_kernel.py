@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from bench_column_stats import count_scans, kernel_report, legacy_report, make_frame
+
+
+@pytest.fixture(scope='module', params=[(2000, 3, 3), (501, 1, 0), (300, 0, 2)], ids=['mixed', 'text-only', 'numeric-only'])
+def reports(request):
+    rows, text_cols, numeric_cols = request.param
+    df = make_frame(rows, text_cols, numeric_cols, seed=rows)
+    return df, legacy_report(df), kernel_report(df)
+
+
+def test_basic_analysis_matches_legacy_scans(reports):
+    _, (legacy, _, _), (kernel, _, _) = reports
+    assert kernel['null_counts'] == legacy['null_counts']
+    assert kernel['duplicate_rows'] == legacy['duplicate_rows']
+    assert kernel['string_summary'] == legacy['string_summary']
+
+
+def test_numeric_summary_matches_describe(reports):
+    _, (legacy, _, _), (kernel, _, _) = reports
+    assert kernel['numeric_summary'].keys() == legacy['numeric_summary'].keys()
+    for col, summary in legacy['numeric_summary'].items():
+        expected = [summary[key] for key in sorted(summary)]
+        actual = [kernel['numeric_summary'][col][key] for key in sorted(summary)]
+        assert np.allclose(expected, actual, equal_nan=True), col
+
+
+def test_quality_matches_legacy_scans(reports):
+    _, (_, legacy, _), (_, kernel, _) = reports
+    assert kernel['consistency'] == legacy['consistency']
+    assert kernel['validity'] == legacy['validity']
+    completeness = dict(kernel['completeness'])
+    overall = completeness.pop('overall_completeness')
+    assert completeness == pytest.approx(legacy['completeness'])
+    assert overall == pytest.approx(np.mean(list(legacy['completeness'].values())))
+
+
+def test_potential_ids_match_legacy_scans(reports):
+    _, (_, _, legacy), (_, _, kernel) = reports
+    assert kernel == legacy
+
+
+def test_kernel_scans_each_column_once():
+    df = make_frame(2000, 2, 2)
+    with count_scans(df) as (scans, _):
+        kernel_report(df)
+    assert max(scans.get(col, 0) for col in df.columns) <= 1
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+import process_image
+from process_image import decode_for_size, open_image, target_size
+
+WIDTH, HEIGHT = 803, 611
+
+
+@pytest.fixture
+def picture():
+    rng = np.random.default_rng(0)
+    pixels = rng.integers(0, 256, (HEIGHT, WIDTH, 3), dtype=np.uint8)
+    pixels[:, :, 0] = np.arange(WIDTH) % 256
+    return Image.fromarray(pixels)
+
+
+@pytest.fixture
+def small_budget(monkeypatch):
+    # 0.25 MB holds a tenth of the decoded picture
+    monkeypatch.setenv('IMAGE_MEMORY_MB', '0.25')
+
+
+def test_target_size_keeps_aspect_ratio():
+    assert target_size((1000, 500), width=200) == (200, 100)
+    assert target_size((1000, 500), height=100) == (200, 100)
+    assert target_size((1000, 500), width=300, height=300) == (300, 300)
+
+
+def test_target_size_contain_fits_inside_and_never_upscales():
+    assert target_size((1000, 500), 300, 300, fit='contain') == (300, 150)
+    assert target_size((100, 50), 300, 300, fit='contain') == (100, 50)
+
+
+def test_target_size_ignores_non_positive_dimensions():
+    assert target_size((1000, 500), width=0) == (1000, 500)
+
+
+@pytest.mark.parametrize('name, options', [
+    ('picture.png', {}),
+    ('picture.bmp', {}),
+    ('picture.tif', {}),
+    ('picture_lzw.tif', {'compression': 'tiff_lzw'}),
+    ('picture_deflate.tif', {'compression': 'tiff_adobe_deflate'}),
+    ('palette.png', {'palette': True})
+])
+def test_banded_decode_matches_a_full_reduce(tmp_path, picture, small_budget, name, options):
+    source = picture.quantize(64) if options.pop('palette', False) else picture
+    path = tmp_path / name
+    source.save(path, **options)
+    size = (WIDTH // 4, HEIGHT // 4)
+    with open_image(str(path)) as img:
+        decoded = decode_for_size(img, size)
+
+    expected = np.asarray(source.convert('RGB').reduce(4))
+    assert decoded.size == (-(-WIDTH // 4), -(-HEIGHT // 4))
+    assert np.array_equal(np.asarray(decoded.convert('RGB')), expected)
+
+
+def test_unsupported_layout_names_the_supported_ones(tmp_path, picture, small_budget):
+    path = tmp_path / 'picture.gif'
+    picture.save(path)
+    with open_image(str(path)) as img:
+        with pytest.raises(Exception, match='supported: .*PNG'):
+            decode_for_size(img, (WIDTH // 4, HEIGHT // 4))
+
+
+def test_within_budget_decodes_whole(tmp_path, picture, monkeypatch):
+    path = tmp_path / 'picture.png'
+    picture.save(path)
+    monkeypatch.setattr(process_image, 'reduce_in_bands', None)
+    with open_image(str(path)) as img:
+        assert decode_for_size(img, (WIDTH // 4, HEIGHT // 4)).size == (WIDTH, HEIGHT)
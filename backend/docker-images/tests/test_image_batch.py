@@ -0,0 +1,111 @@
+import json
+import os
+
+import pytest
+from PIL import Image
+
+import process_image
+from process_image import convert_item, convert_renditions, manifest_items, parse_renditions
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    monkeypatch.setenv('RESULT_CACHE', 'false')
+    (tmp_path / 'input').mkdir()
+    (tmp_path / 'output').mkdir()
+    Image.new('RGB', (64, 48), (200, 40, 40)).save(tmp_path / 'input' / 'a.png')
+    manifest = tmp_path / 'input' / 'manifest.json'
+    return tmp_path, str(manifest), str(tmp_path / 'output' / 'task_converted')
+
+
+def items_for(workspace, entries, monkeypatch):
+    monkeypatch.setenv('FORMAT', 'jpg')
+    _, manifest, output_file = workspace
+    with open(manifest, 'w', encoding='utf-8') as f:
+        json.dump(entries, f)
+    return manifest_items(entries, manifest, output_file)
+
+
+def test_manifest_outputs_resolve_inside_the_output_directory(workspace, monkeypatch):
+    root = workspace[0]
+    items = items_for(workspace, [{'input': 'a.png', 'output': 'nested/b1'}, {'input': 'a.png'}], monkeypatch)
+    assert items[0]['output'] == str(root / 'output' / 'nested' / 'b1')
+    assert items[1]['output'] == workspace[2] + '_1'
+
+
+def test_manifest_output_extension_is_not_doubled(workspace, monkeypatch):
+    root = workspace[0]
+    items = items_for(workspace, [{'input': 'a.png', 'output': 'b1.jpg'}, {'input': 'a.png', 'output': 'b2.png'}], monkeypatch)
+    assert items[0]['output'] == str(root / 'output' / 'b1')
+    # Only the target format's extension is dropped
+    assert items[1]['output'] == str(root / 'output' / 'b2.png')
+
+    (root / 'output').mkdir(exist_ok=True)
+    result = convert_item(items[0])
+    assert result['status'] == 'ok'
+    assert os.path.basename(result['output']) == 'b1.jpg'
+
+
+@pytest.mark.parametrize('output', ['../escaped', 'nested/../../escaped', '/tmp/escaped', '.'])
+def test_manifest_outputs_outside_the_output_directory_fail_alone(workspace, monkeypatch, output):
+    root = workspace[0]
+    items = items_for(workspace, [{'input': 'a.png', 'output': output}, {'input': 'a.png', 'output': 'fine'}], monkeypatch)
+
+    rejected = convert_item(items[0])
+    assert rejected['status'] == 'error'
+    assert 'Manifest output' in rejected['error']
+    assert not (root / 'escaped.jpg').exists()
+    assert convert_item(items[1])['status'] == 'ok'
+
+
+@pytest.mark.parametrize('name', ['../up', 'a/b', 'thumb.jpg', 'x y'])
+def test_rendition_names_are_restricted(name):
+    with pytest.raises(Exception, match='Invalid rendition name'):
+        parse_renditions([{'name': name}], '/output/task')
+
+
+def test_failed_rendition_encode_is_reported_alone(workspace, monkeypatch):
+    root, _, output_file = workspace
+    specs = parse_renditions([{'name': 'large', 'width': 32}, {'name': 'small', 'width': 16}], output_file)
+    save = process_image.save_image
+
+    def failing_save(img, path, *args):
+        if path.endswith('_small.jpg'):
+            raise OSError('disk full')
+        save(img, path, *args)
+
+    monkeypatch.setattr(process_image, 'save_image', failing_save)
+    results = {result['name']: result for result in convert_renditions(str(root / 'input' / 'a.png'), specs)}
+    assert results['large']['status'] == 'ok'
+    assert results['large']['bytes'] > 0
+    assert results['small'] == {'name': 'small', 'output': output_file + '_small.jpg', 'status': 'error', 'error': 'disk full'}
+
+
+def run_batch(workspace, entries, monkeypatch, output_file):
+    _, manifest, _ = workspace
+    with open(manifest, 'w', encoding='utf-8') as f:
+        json.dump(entries, f)
+    monkeypatch.setenv('MANIFEST', manifest)
+    monkeypatch.setenv('OUTPUT_FILE', output_file)
+    monkeypatch.setenv('IMAGE_WORKERS', '1')
+    process_image.convert_batch()
+    with open(f'{output_file}.jsonl', encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_batch_creates_the_results_directory(workspace, monkeypatch):
+    root = workspace[0]
+    output_file = str(root / 'missing' / 'dir' / 'task_converted')
+    results = run_batch(workspace, [{'input': 'a.png'}, {'input': 'absent.png'}], monkeypatch, output_file)
+    assert [result['status'] for result in results] == ['ok', 'error']
+
+
+def test_batch_where_every_item_failed_exits_with_an_error(workspace, monkeypatch, capsys):
+    output_file = workspace[2]
+    with pytest.raises(SystemExit) as exited:
+        run_batch(workspace, [{'input': 'absent.png'}, {'output': 'x'}], monkeypatch, output_file)
+    assert exited.value.code == 1
+    assert 'all 2 images failed' in capsys.readouterr().out
+    # The per-item results are still written
+    with open(f'{output_file}.jsonl', encoding='utf-8') as f:
+        assert len(f.readlines()) == 2
@@ -0,0 +1,129 @@
+import csv
+import json
+
+import pytest
+
+from output_writers import NO_TEXT_MESSAGE, TABLE_COLUMNS, TABLE_FORMATS, PageWriter, ParquetTableWriter, open_table_writer, open_writer
+
+METADATA = {'num_pages': 3, 'title': 'Quarterly report'}
+INFO = {'pages_processed': 3, 'strategy': 'auto'}
+
+RECORDS = [
+    {'page': 1, 'engine': 'pypdf2', 'seconds': 0.01, 'text': 'First page "quoted"\n', 'tables': []},
+    {'page': 2, 'engine': 'pdfplumber', 'seconds': 0.2, 'text': 'Second page',
+     'tables': [[['region', 'total'], ['north', '12'], [], ['south', None]]]},
+    {'page': 3, 'engine': 'ocr', 'error': 'tesseract missing', 'text': '', 'tables': [],
+     'fallback': {'engine': 'ocr', 'error': 'tesseract missing'}}
+]
+
+
+def write(tmp_path, output_format, records=RECORDS):
+    path = tmp_path / f'out.{output_format}'
+    opener = open_table_writer if output_format in TABLE_FORMATS else open_writer
+    with opener(output_format, str(path), METADATA, INFO) as writer:
+        for record in records:
+            writer.write_page(record)
+    return path, writer
+
+
+def test_page_writer_requires_write_content(tmp_path):
+    with pytest.raises(TypeError):
+        PageWriter(str(tmp_path / 'out'), METADATA, INFO)
+
+
+def test_text_writer_keeps_page_order(tmp_path):
+    path, writer = write(tmp_path, 'text')
+    content = path.read_text(encoding='utf-8')
+    assert content.index('--- Page 1 ---') < content.index('--- Page 2 ---') < content.index('--- Tables on Page 2 ---')
+    assert 'north | 12' in content
+    assert '--- Page 3 (OCR Error: tesseract missing) ---' in content
+    assert writer.engines == {'pypdf2': 1, 'pdfplumber': 1, 'ocr': 1}
+    assert writer.reports[2]['fallback'] == {'engine': 'ocr', 'error': 'tesseract missing'}
+    assert 'text' not in writer.reports[0]
+
+
+def test_unknown_format_falls_back_to_text(tmp_path):
+    path, _ = write(tmp_path, 'rtf')
+    assert '--- Page 1 ---' in path.read_text(encoding='utf-8')
+
+
+def test_unknown_table_format_is_rejected(tmp_path):
+    with pytest.raises(Exception, match='Unknown table format'):
+        open_table_writer('xlsx', str(tmp_path / 'out.xlsx'), METADATA, INFO)
+
+
+@pytest.mark.parametrize('output_format', ['text', 'markdown'])
+def test_no_text_message(tmp_path, output_format):
+    path, _ = write(tmp_path, output_format, [{'page': 1, 'engine': 'pypdf2', 'text': '  ', 'tables': []}])
+    assert NO_TEXT_MESSAGE in path.read_text(encoding='utf-8')
+
+
+def test_markdown_writer_puts_tables_after_text(tmp_path):
+    path, _ = write(tmp_path, 'markdown')
+    content = path.read_text(encoding='utf-8')
+    assert content.startswith('# PDF Extraction Results\n\n**Pages:** 3\n**Total Pages:** 3\n\n## Text Content\n\n')
+    assert content.index('Second page') < content.index('## Tables') < content.index('### Table on Page 2')
+    assert '| south |  |' in content
+
+
+def test_json_writer_streams_a_valid_document(tmp_path):
+    path, _ = write(tmp_path, 'json')
+    document = json.loads(path.read_text(encoding='utf-8'))
+    assert 'First page "quoted"' in document['text']
+    assert document['metadata'] == METADATA
+    assert document['tables'] == [{'page': 2, 'table_index': 0, 'data': RECORDS[1]['tables'][0]}]
+    info = document['extraction_info']
+    assert info['strategy'] == 'auto'
+    assert info['engines'] == {'pypdf2': 1, 'pdfplumber': 1, 'ocr': 1}
+    assert [report['page'] for report in info['pages']] == [1, 2, 3]
+
+
+def test_json_writer_without_tables(tmp_path):
+    path, _ = write(tmp_path, 'json', RECORDS[:1])
+    assert json.loads(path.read_text(encoding='utf-8'))['tables'] == []
+
+
+def test_jsonl_writer_records(tmp_path):
+    path, _ = write(tmp_path, 'jsonl')
+    lines = [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+    assert [line['type'] for line in lines] == ['document', 'page', 'page', 'page', 'summary']
+    assert lines[0]['metadata'] == METADATA
+    assert lines[2]['tables'] == RECORDS[1]['tables']
+    assert lines[-1]['characters'] == len(RECORDS[0]['text']) + len(RECORDS[1]['text'])
+    assert 'message' not in lines[-1]
+
+
+def expected_cells():
+    return [
+        [2, 0, 0, 0, 'region'], [2, 0, 0, 1, 'total'],
+        [2, 0, 1, 0, 'north'], [2, 0, 1, 1, '12'],
+        [2, 0, 3, 0, 'south'], [2, 0, 3, 1, None]
+    ]
+
+
+def test_csv_writer_one_row_per_cell(tmp_path):
+    path, writer = write(tmp_path, 'csv')
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == TABLE_COLUMNS
+    assert rows[1:] == [[str(value) if value is not None else '' for value in cell] for cell in expected_cells()]
+    assert writer.table_count == 1
+
+
+def test_parquet_writer_row_groups(tmp_path, monkeypatch):
+    parquet = pytest.importorskip('pyarrow.parquet')
+    monkeypatch.setattr(ParquetTableWriter, 'row_group_size', 4)
+    last = {'page': 4, 'engine': 'pdfplumber', 'text': '', 'tables': [[['east', '7']]]}
+    path, _ = write(tmp_path, 'parquet', RECORDS + [last])
+    table = parquet.read_table(str(path))
+    assert table.column_names == TABLE_COLUMNS
+    assert [list(row.values()) for row in table.to_pylist()] == expected_cells() + [[4, 0, 0, 0, 'east'], [4, 0, 0, 1, '7']]
+    assert parquet.ParquetFile(str(path)).num_row_groups == 2
+
+
+def test_parquet_writer_without_tables_keeps_schema(tmp_path):
+    parquet = pytest.importorskip('pyarrow.parquet')
+    path, _ = write(tmp_path, 'parquet', RECORDS[:1])
+    table = parquet.read_table(str(path))
+    assert table.column_names == TABLE_COLUMNS
+    assert table.num_rows == 0
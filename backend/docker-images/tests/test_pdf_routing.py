@@ -0,0 +1,115 @@
+import csv
+import random
+
+import pytest
+
+import extract_pdf
+from bench_processors import scanned_image, table_content, text_content, write_pdf
+from extract_pdf import PDFProcessor
+
+
+def broken_engine(*args, **kwargs):
+    raise RuntimeError('engine exploded')
+
+
+@pytest.fixture
+def table_pdf(tmp_path):
+    rng = random.Random(0)
+    path = tmp_path / 'tables.pdf'
+    write_pdf(path, [(table_content(rng), None), (text_content(rng), None)])
+    return path
+
+
+@pytest.fixture
+def scanned_pdf(tmp_path):
+    rng = random.Random(0)
+    path = tmp_path / 'scanned.pdf'
+    write_pdf(path, [(b'', scanned_image(rng)) for _ in range(2)])
+    return path
+
+
+def test_failed_layout_engine_falls_back_to_triage_text(table_pdf, monkeypatch):
+    monkeypatch.setattr(extract_pdf, 'plumber_result', broken_engine)
+    result = PDFProcessor(workers=1).process_pdf(table_pdf.read_bytes(), {'extract_tables': True})
+    assert result['success'], result['error']
+    first, second = result['extraction_info']['pages']
+    assert first['engine'] == 'pypdf2'
+    assert first['fallback'] == {'engine': 'pdfplumber', 'error': 'engine exploded'}
+    assert 'error' not in first
+    assert 'error' not in second
+    assert '--- Page 1 ---' in result['text']
+
+
+def test_run_fails_when_every_page_fails(scanned_pdf, monkeypatch):
+    monkeypatch.setattr(extract_pdf, 'ocr_page', broken_engine)
+    result = PDFProcessor(workers=1).process_pdf(scanned_pdf.read_bytes(), {'strategy': 'ocr'})
+    assert not result['success']
+    assert 'failed on all 2 pages' in result['error']
+
+
+def test_ocr_extraction_reports_failure(scanned_pdf, monkeypatch):
+    monkeypatch.setattr(extract_pdf, 'ocr_page', broken_engine)
+    with pytest.raises(Exception, match='OCR extraction failed'):
+        PDFProcessor(workers=1).extract_text_ocr(str(scanned_pdf))
+
+
+def test_a_single_failed_page_is_reported_in_place(table_pdf, monkeypatch):
+    plumber_result = extract_pdf.plumber_result
+
+    def fail_first(document, page_num, *args, **kwargs):
+        if page_num == 0:
+            raise RuntimeError('bad page')
+        return plumber_result(document, page_num, *args, **kwargs)
+
+    # An explicit engine has no triage text to fall back to
+    monkeypatch.setattr(extract_pdf, 'plumber_result', fail_first)
+    result = PDFProcessor(workers=1).process_pdf(table_pdf.read_bytes(), {'strategy': 'pdfplumber'})
+    assert result['success'], result['error']
+    first, second = result['extraction_info']['pages']
+    assert first['error'] == 'bad page'
+    assert 'error' not in second
+
+
+def test_pdfplumber_strategy_only_looks_for_tables_on_ruled_pages(table_pdf, monkeypatch):
+    plumber_result = extract_pdf.plumber_result
+    calls = {}
+
+    def spy(document, page_num, extract_tables=False, table_settings=None):
+        calls[page_num] = extract_tables
+        return plumber_result(document, page_num, extract_tables, table_settings)
+
+    monkeypatch.setattr(extract_pdf, 'plumber_result', spy)
+    result = PDFProcessor(workers=1).process_pdf(table_pdf.read_bytes(), {'strategy': 'pdfplumber', 'extract_tables': True})
+    assert result['success'], result['error']
+    assert calls == {0: True, 1: False}
+    assert result['tables'] and all(table['page'] == 1 for table in result['tables'])
+
+
+@pytest.mark.parametrize('table_format', ['csv', 'parquet'])
+def test_tables_are_written_next_to_the_output(table_pdf, tmp_path, monkeypatch, table_format):
+    output_file = tmp_path / 'task_extracted'
+    for name, value in {'INPUT_FILE': str(table_pdf), 'OUTPUT_FILE': str(output_file), 'OUTPUT_FORMAT': 'markdown',
+                        'EXTRACT_TABLES': 'true', 'TABLE_FORMAT': table_format, 'RESULT_CACHE': 'false',
+                        'PDF_WORKERS': '1'}.items():
+        monkeypatch.setenv(name, value)
+
+    assert extract_pdf.process_from_env() == f'{output_file}.md'
+    markdown = (tmp_path / 'task_extracted.md').read_text(encoding='utf-8')
+    assert '## Text Content' in markdown and '### Table on Page 1' in markdown
+
+    tables_path = tmp_path / f'task_extracted.tables.{table_format}'
+    if table_format == 'csv':
+        with open(tables_path, newline='', encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+    else:
+        rows = pytest.importorskip('pyarrow.parquet').read_table(str(tables_path)).to_pylist()
+    assert rows and {str(row['page']) for row in rows} == {'1'}
+
+
+def test_unknown_table_format_fails_before_extraction(table_pdf, tmp_path, monkeypatch):
+    for name, value in {'INPUT_FILE': str(table_pdf), 'OUTPUT_FILE': str(tmp_path / 'out'),
+                        'EXTRACT_TABLES': 'true', 'TABLE_FORMAT': 'xlsx', 'RESULT_CACHE': 'false'}.items():
+        monkeypatch.setenv(name, value)
+    with pytest.raises(Exception, match='Unknown TABLE_FORMAT'):
+        extract_pdf.process_from_env()
+    assert not (tmp_path / 'out.txt').exists()
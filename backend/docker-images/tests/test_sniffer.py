@@ -0,0 +1,84 @@
+import codecs
+
+import pandas as pd
+
+from analyze_csv import CSVAnalyzer
+from sniffer import CSVSniffer
+
+
+def test_quoted_delimiters_do_not_count():
+    sample = b'name;note\n"a, b";1\n"c, d";2\n"e, f";3\n'
+    detection = CSVSniffer().sniff(sample, truncated=False)
+    assert detection['delimiter'] == ';'
+    assert detection['encoding'] == 'utf-8'
+
+
+def test_tab_delimiter():
+    sample = b'a\tb\tc\n1\t2\t3\n4\t5\t6\n'
+    assert CSVSniffer().sniff(sample, truncated=False)['delimiter'] == '\t'
+
+
+def test_bom_is_detected():
+    sample = codecs.BOM_UTF16_LE + 'a,b\n1,2\n'.encode('utf-16-le')
+    detection = CSVSniffer().sniff(sample, truncated=False)
+    assert detection['encoding'] == 'utf-16'
+    assert detection['has_bom']
+    assert detection['encoding_confidence'] == 1.0
+
+
+def test_multibyte_character_cut_by_the_sample():
+    data = 'a,b\n' + 'é,1\n' * 10
+    sample = data.encode('utf-8')[:-3]
+    assert CSVSniffer().detect_encoding(sample, truncated=True)[0] == 'utf-8'
+
+
+def test_cp1252_sample():
+    sample = 'name,city\nJosé,Málaga\n'.encode('cp1252')
+    encoding, confidence, text = CSVSniffer().detect_encoding(sample, truncated=False)
+    assert encoding in ('cp1252', 'windows-1252', 'iso8859-1', 'latin-1')
+    assert 'José' in text
+    assert confidence < 1.0
+
+
+def test_truncated_ascii_sample_is_not_certain():
+    sniffer = CSVSniffer()
+    assert sniffer.detect_encoding(b'a,b\n1,2\n', truncated=False)[1] == 1.0
+    assert sniffer.detect_encoding(b'a,b\n1,2\n', truncated=True)[1] < 1.0
+
+
+def test_fallback_encodings_skip_the_failed_one():
+    sniffer = CSVSniffer()
+    assert sniffer.fallback_encodings('utf-8') == ['cp1252', 'latin-1']
+    assert sniffer.fallback_encodings('windows-1252') == ['latin-1']
+
+
+def late_cp1252_file(path):
+    # ASCII well past the 64KB sample, then one cp1252 byte
+    data = b'word,n\n' + b'plain,1\n' * 20000 + b'caf\xe9,2\n'
+    path.write_bytes(data)
+    return data
+
+
+def test_file_falls_back_when_a_byte_past_the_sample_fails(tmp_path):
+    path = tmp_path / 'late.csv'
+    late_cp1252_file(path)
+    result = CSVAnalyzer().analyze_csv_file(str(path))
+    assert result['success'], result['error']
+    assert result['metadata']['encoding_used'] == 'cp1252'
+    assert result['metadata']['detection']['rejected_encodings'] == ['utf-8']
+    assert result['analysis']['shape'][0] == 20001
+
+
+def test_in_memory_falls_back_when_a_byte_past_the_sample_fails(tmp_path):
+    data = late_cp1252_file(tmp_path / 'late.csv')
+    result = CSVAnalyzer().analyze_csv(data)
+    assert result['success'], result['error']
+    assert result['metadata']['encoding_used'] == 'cp1252'
+
+
+def test_semicolon_file_is_split_into_columns(tmp_path):
+    path = tmp_path / 'semi.csv'
+    pd.DataFrame({'a': range(50), 'b': ['x,y'] * 50}).to_csv(path, sep=';', index=False)
+    result = CSVAnalyzer().analyze_csv_file(str(path))
+    assert result['metadata']['delimiter_used'] == ';'
+    assert result['analysis']['columns'] == ['a', 'b']
@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import validators
+from analyze_csv import CSVAnalyzer
+from validators import DETECT_SAMPLE, VALIDATORS, Validator, register, select
+
+
+def selected(column, counts_by_value):
+    values = np.array(list(counts_by_value), dtype=object)
+    counts = np.array(list(counts_by_value.values()))
+    return {name: source for name, (_, source) in select(column, values, counts).items()}
+
+
+@pytest.mark.parametrize('name, good, bad', [
+    ('email', ['a.b+c@example.co.uk'], ['a@b', 'not-an-email']),
+    ('url', ['https://example.com/x?y=1', 'FTP://files.example.org'], ['example.com', 'http://']),
+    ('uuid', ['123e4567-e89b-12d3-a456-426614174000', '123E4567E89B12D3A456426614174000'], ['123e4567-e89b']),
+    ('ip', ['10.0.0.1', '2001:db8::1'], ['999.1.1.1', 'abc']),
+    ('date', ['2024-02-29', '2024-02-29T13:45:00Z', '29/02/2024', '2.9.24'], ['2024-13-01', 'yesterday']),
+    ('numeric', ['1,234.5', ' -12 ', '.5', '3e10'], ['1,23', '12 apples'])
+])
+def test_validator_matches(name, good, bad):
+    values = np.array(good + bad, dtype=object)
+    assert VALIDATORS[name].matches(values).tolist() == [True] * len(good) + [False] * len(bad)
+
+
+def test_named_columns_are_checked_whatever_their_content():
+    assert selected('Contact_EMAIL', {'n/a': 5}) == {'email': 'name'}
+    assert selected('home_phone', {'n/a': 5}) == {'phone': 'name'}
+
+
+@pytest.mark.parametrize('column, expected', [
+    ('start_date', {'date'}), ('StartDate', {'date'}), ('dates', {'date'}),
+    ('e-mail', {'email'}), ('clientIPAddress', {'ip'}), ('Telephone', {'phone'}),
+    ('updated_by', set()), ('candidate', set()), ('hotel', set()), ('mailbox', set())
+])
+def test_name_hints_match_whole_words(column, expected):
+    assert {name for name, validator in VALIDATORS.items() if validator.named_for(column)} == expected
+
+
+def test_columns_merely_containing_a_hint_are_not_checked_by_name():
+    for column in ('updated_by', 'candidate'):
+        assert selected(column, {'alice': 3, 'bob': 2}) == {}
+
+
+def test_content_detection():
+    assert selected('contact', {'a@example.com': 3, 'b@example.org': 2}) == {'email': 'content'}
+    assert selected('link', {'https://example.com': 1}) == {'url': 'content'}
+    assert selected('notes', {'hello': 3, 'world': 2}) == {}
+
+
+def test_phone_is_never_detected_from_content():
+    assert 'phone' not in selected('contact', {'+1 555 0100': 4, '555-0199': 4})
+
+
+def test_detection_weighs_values_by_their_rows():
+    # One distinct email out of two, but it covers 90% of the rows
+    assert selected('contact', {'a@example.com': 9, 'junk': 1}) == {'email': 'content'}
+    assert selected('contact', {'a@example.com': 1, 'junk': 9}) == {}
+
+
+def test_detection_samples_evenly_spaced_values():
+    # The first DETECT_SAMPLE values are all junk, but they are a fifth of the column
+    values = np.array([f'junk{i}' if i < DETECT_SAMPLE else f'user{i}@example.com' for i in range(DETECT_SAMPLE * 5)], dtype=object)
+    counts = np.ones(len(values), dtype=int)
+    assert 'email' in select('contact', values, counts)
+
+
+def test_register_replaces_by_name(monkeypatch):
+    monkeypatch.setattr(validators, 'VALIDATORS', dict(VALIDATORS))
+    original = validators.VALIDATORS['email']
+    replacement = register(Validator('email', r'^\S+@\S+$'))
+    assert validators.VALIDATORS['email'] is replacement is not original
+    assert VALIDATORS['email'] is original
+
+
+def test_registered_validator_reaches_the_quality_report(tmp_path, monkeypatch):
+    # Registered into the shared registry, removed again at teardown
+    monkeypatch.setitem(VALIDATORS, 'sku', None)
+    register(Validator('sku', r'^SKU-\d{4}$', name_hints=('product',)))
+    path = tmp_path / 'orders.csv'
+    pd.DataFrame({
+        'item': ['SKU-0001', 'SKU-0002', 'SKU-0003', 'SKU-0004', 'bad'] * 4,
+        'product_code': ['SKU-1', 'SKU-0002'] * 10,
+        'buyer': ['a@example.com', 'b@example.org'] * 10
+    }).to_csv(path, index=False)
+
+    result = CSVAnalyzer().analyze_csv_file(str(path), {'analysis_type': 'full'})
+    assert result['success'], result['error']
+    quality = result['quality']
+    assert quality['formats'] == {
+        'item': {'sku': 'content'},
+        'product_code': {'sku': 'name'},
+        'buyer': {'email': 'content'}
+    }
+    assert quality['validity']['item_sku_format'] == 80.0
+    assert quality['validity']['product_code_sku_format'] == 50.0
+    assert quality['validity']['buyer_email_format'] == 100.0
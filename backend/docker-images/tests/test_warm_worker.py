@@ -0,0 +1,82 @@
+import json
+import os
+import signal
+import threading
+import time
+
+import pytest
+
+from warm_worker import SpoolWorker
+
+
+def handler():
+    time.sleep(float(os.environ['SLEEP']))
+    print('slept')
+
+
+def submit(spool, job_id, env, deadline=None):
+    job = {'env': env}
+    if deadline is not None:
+        job['deadline'] = deadline
+    with open(os.path.join(spool, 'incoming', f'{job_id}.json'), 'w') as f:
+        json.dump(job, f)
+
+
+def wait_for(condition, timeout=10):
+    end = time.time() + timeout
+    while time.time() < end:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+@pytest.fixture
+def spool(tmp_path):
+    for directory in ('incoming', 'working', 'done'):
+        os.makedirs(tmp_path / directory)
+    return str(tmp_path)
+
+
+@pytest.fixture
+def serve(spool, monkeypatch):
+    """Start a supervisor on the spool in a thread; it is stopped after the test"""
+    # serve() installs signal handlers, which only the main thread may do
+    monkeypatch.setattr(signal, 'signal', lambda *args: None)
+    worker = SpoolWorker(spool, handler, processes=1, poll_interval=0.05, sweep_interval=0.1, abandon_grace=0)
+    thread = threading.Thread(target=worker.serve, daemon=True)
+    yield thread.start
+    worker.stop()
+    thread.join(10)
+
+
+def test_overdue_job_is_killed_and_the_worker_replaced(spool, serve):
+    # Claimed in name order: the slow job holds the only worker first
+    submit(spool, 'a-slow', {'SLEEP': '30'}, deadline=time.time() + 0.5)
+    submit(spool, 'b-fast', {'SLEEP': '0'}, deadline=time.time() + 30)
+    serve()
+    assert wait_for(lambda: os.path.exists(os.path.join(spool, 'done', 'b-fast.json')))
+    assert not os.path.exists(os.path.join(spool, 'done', 'a-slow.json'))
+    assert wait_for(lambda: os.listdir(os.path.join(spool, 'working')) == [])
+
+
+def test_requeue_leaves_jobs_of_live_owners(spool):
+    worker = SpoolWorker(spool, handler)
+    live = f'a@{worker.host}:{os.getpid()}.json'
+    other_host = 'b@elsewhere:1.json'
+    dead = f'c@{worker.host}:999999999.json'
+    for name in (live, other_host, dead):
+        with open(os.path.join(spool, 'working', name), 'w') as f:
+            json.dump({'env': {}, 'deadline': time.time() + 60}, f)
+    worker.requeue_abandoned()
+    assert sorted(os.listdir(os.path.join(spool, 'working'))) == sorted([live, other_host])
+    assert os.listdir(os.path.join(spool, 'incoming')) == ['c.json']
+
+
+def test_abandoned_results_are_swept(spool):
+    worker = SpoolWorker(spool, handler, abandon_grace=0)
+    for name, deadline in (('old', time.time() - 1), ('new', time.time() + 60), ('none', None)):
+        with open(os.path.join(spool, 'done', f'{name}.json'), 'w') as f:
+            json.dump({'id': name, 'deadline': deadline}, f)
+    worker.sweep_abandoned()
+    assert sorted(os.listdir(os.path.join(spool, 'done'))) == ['new.json', 'none.json']
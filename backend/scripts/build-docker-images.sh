@@ -14,7 +14,8 @@ images=(
 
 for image in "${images[@]}"; do
     echo "Building $image..."
-    docker build -t "task-platform/$image:latest" "./docker-images/$image/"
+    # Build from docker-images/ so images can copy the shared common/ modules
+    docker build -t "task-platform/$image:latest" -f "./docker-images/$image/Dockerfile" ./docker-images
     echo "✓ Built task-platform/$image:latest"
 done
 
@@ -71,7 +71,11 @@ const validateFileType = (req, res, next) => {
             'application/pdf'
         ],
         'csv-analyze': [
-            'text/csv', 'application/csv', 'text/plain'
+            'text/csv', 'application/csv', 'text/plain',
+            'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            'application/vnd.ms-excel',
+            'application/vnd.apache.parquet', 'application/x-parquet',
+            'application/vnd.apache.arrow.file', 'application/octet-stream'
         ]
     };
 
@@ -20,7 +20,18 @@ const imageConvertParams = Joi.object({
     format: Joi.string().valid('jpg', 'jpeg', 'png', 'gif', 'webp', 'bmp').default('jpg'),
     quality: Joi.number().min(1).max(100).default(80),
     width: Joi.number().min(1).max(10000).optional(),
-    height: Joi.number().min(1).max(10000).optional()
+    height: Joi.number().min(1).max(10000).optional(),
+    fit: Joi.string().valid('stretch', 'contain').default('stretch'),
+    encodeProfile: Joi.string().valid('fast', 'balanced', 'smallest').default('smallest'),
+    renditions: Joi.array().items(Joi.object({
+        name: Joi.string().pattern(/^[A-Za-z0-9_-]+$/).optional(),
+        format: Joi.string().valid('jpg', 'jpeg', 'png', 'gif', 'webp', 'bmp').default('jpg'),
+        quality: Joi.number().min(1).max(100).optional(),
+        width: Joi.number().min(1).max(10000).optional(),
+        height: Joi.number().min(1).max(10000).optional(),
+        fit: Joi.string().valid('stretch', 'contain').optional(),
+        profile: Joi.string().valid('fast', 'balanced', 'smallest').optional()
+    })).min(1).max(20).optional()
 });
 
 const videoTrimParams = Joi.object({
@@ -36,15 +47,27 @@ const pdfExtractParams = Joi.object({
         start: Joi.number().min(1).optional(),
         end: Joi.number().min(1).optional()
     }).optional(),
-    outputFormat: Joi.string().valid('text', 'json', 'markdown').default('text')
+    outputFormat: Joi.string().valid('text', 'json', 'jsonl', 'markdown').default('text'),
+    tableFormat: Joi.string().valid('csv', 'parquet').default('csv'),
+    tableSettings: Joi.object().optional()
 });
 
 const csvAnalyzeParams = Joi.object({
-    delimiter: Joi.string().length(1).default(','),
+    delimiter: Joi.string().length(1).optional(),
     hasHeader: Joi.boolean().default(true),
-    analysisType: Joi.string().valid('basic', 'detailed', 'statistical').default('basic'),
+    analysisType: Joi.string().valid('basic', 'quality', 'full', 'detailed', 'statistical').default('full'),
     columns: Joi.array().items(Joi.string()).optional(),
-    generateCharts: Joi.boolean().default(false)
+    generateCharts: Joi.boolean().default(false),
+    approximate: Joi.boolean().default(false),
+    inputFormat: Joi.string().valid('csv', 'xlsx', 'xls', 'parquet', 'arrow').optional(),
+    sheet: Joi.alternatives().try(Joi.string(), Joi.number().integer().min(0)).optional(),
+    filters: Joi.array().items(
+        Joi.array().ordered(
+            Joi.string().required(),
+            Joi.string().valid('=', '==', '!=', '<', '>', '<=', '>=', 'in', 'not in').required(),
+            Joi.any().required()
+        )
+    ).optional()
 });
 
 const githubDeployParams = Joi.object({
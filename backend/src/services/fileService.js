@@ -71,6 +71,11 @@ class FileService {
           const filePath = path.join(dir, file);
           const stats = await fs.stat(filePath);
           
+          // Subdirectories (e.g. the processors' result cache) manage their own eviction
+          if (stats.isDirectory()) {
+            continue;
+          }
+          
           if (stats.mtime.getTime() < cutoff) {
             await this.deleteFile(filePath);
           }
@@ -1,5 +1,6 @@
 const queueService = require('./queueService.js');
 const dockerService = require('./dockerService.js');
+const warmWorkerService = require('./warmWorkerService.js');
 const s3Service =require('./s3Service.js')
 const githubDeployService = require('./githubDeployService.js');
 const Task = require('../models/Task');
@@ -432,6 +433,14 @@ async processTask(task) {
         }
     }
 
+    // Hand the job to a warm worker when enabled for this task type, otherwise start a fresh container
+    async runProcessor(task, dockerConfig, timeout) {
+        if (warmWorkerService.isEnabled(task.type)) {
+            return warmWorkerService.runJob(task.type, task.id, dockerConfig.environment, timeout);
+        }
+        return dockerService.runContainer(dockerConfig, timeout);
+    }
+
     async processImageConversion(task) {
         const { inputFile, parameters } = task;
         
@@ -447,13 +456,23 @@ async processTask(task) {
                 `FORMAT=${parameters.format || 'jpg'}`,
                 `QUALITY=${parameters.quality || 80}`,
                 `WIDTH=${parameters.width || ''}`,
-                `HEIGHT=${parameters.height || ''}`
+                `HEIGHT=${parameters.height || ''}`,
+                `FIT=${parameters.fit || 'stretch'}`,
+                `ENCODE_PROFILE=${parameters.encodeProfile || 'smallest'}`,
+                `ENCODE_REPORT=${process.env.ENCODE_REPORT || 'false'}`,
+                `MAX_IMAGE_PIXELS=${process.env.MAX_IMAGE_PIXELS || ''}`,
+                `IMAGE_MEMORY_MB=${process.env.IMAGE_MEMORY_MB || ''}`,
+                `RENDITIONS=${parameters.renditions ? JSON.stringify(parameters.renditions) : ''}`,
+                `PROFILE=${process.env.PROCESSOR_PROFILE || ''}`
             ]
         };
 
         logger.info(`Volume mounts for image conversion: ${JSON.stringify(dockerConfig.volumes)}`);
-        await dockerService.runContainer(dockerConfig, PROCESSING_TIMEOUTS['image-convert']);
-        const outputFilename = `${task.id}_converted.${parameters.format || 'jpg'}`;
+        await this.runProcessor(task, dockerConfig, PROCESSING_TIMEOUTS['image-convert']);
+        // With renditions the task output is the list of rendition files
+        const outputFilename = parameters.renditions ?
+                               `${task.id}_converted.jsonl` :
+                               `${task.id}_converted.${parameters.format || 'jpg'}`;
         const outputPath = `${process.cwd()}/outputs/${outputFilename}`;
         try {
             await fs.access(outputPath);
@@ -519,14 +538,20 @@ async processTask(task) {
                 `EXTRACT_IMAGES=${parameters.extractImages || false}`,
                 `EXTRACT_TABLES=${parameters.extractTables || false}`,
                 `OUTPUT_FORMAT=${parameters.outputFormat || 'text'}`,
+                `TABLE_FORMAT=${parameters.tableFormat || 'csv'}`,
                 `PAGE_START=${parameters.pageRange?.start || ''}`,
-                `PAGE_END=${parameters.pageRange?.end || ''}`
+                `PAGE_END=${parameters.pageRange?.end || ''}`,
+                `PDF_WORKERS=${process.env.PDF_WORKERS || ''}`,
+                `PDF_STRATEGY=${process.env.PDF_STRATEGY || 'auto'}`,
+                `TABLE_SETTINGS=${parameters.tableSettings ? JSON.stringify(parameters.tableSettings) : ''}`,
+                `PROFILE=${process.env.PROCESSOR_PROFILE || ''}`
             ]
         };
 
-        await dockerService.runContainer(dockerConfig, PROCESSING_TIMEOUTS['pdf-extract']);
+        await this.runProcessor(task, dockerConfig, PROCESSING_TIMEOUTS['pdf-extract']);
 
         const outputExtension = parameters.outputFormat === 'json' ? '.json' : 
+                               parameters.outputFormat === 'jsonl' ? '.jsonl' :
                                parameters.outputFormat === 'markdown' ? '.md' : '.txt';
 
         const outputFilename = `${task.id}_extracted${outputExtension}`;
@@ -557,15 +582,20 @@ async processTask(task) {
             environment: [
                 `INPUT_FILE=/input/${inputFile.filename}`,
                 `OUTPUT_FILE=/output/${task.id}_analysis`,
-                `DELIMITER=${parameters.delimiter || ','}`,
-                `HAS_HEADER=${parameters.hasHeader || true}`,
-                `ANALYSIS_TYPE=${parameters.analysisType || 'basic'}`,
+                `DELIMITER=${parameters.delimiter || ''}`,
+                `HAS_HEADER=${parameters.hasHeader ?? true}`,
+                `ANALYSIS_TYPE=${parameters.analysisType || 'full'}`,
                 `COLUMNS=${parameters.columns ? parameters.columns.join(',') : ''}`,
-                `GENERATE_CHARTS=${parameters.generateCharts || false}`
+                `GENERATE_CHARTS=${parameters.generateCharts || false}`,
+                `APPROXIMATE=${parameters.approximate || false}`,
+                `INPUT_FORMAT=${parameters.inputFormat || ''}`,
+                `SHEET=${parameters.sheet ?? ''}`,
+                `ROW_FILTERS=${parameters.filters ? JSON.stringify(parameters.filters) : ''}`,
+                `PROFILE=${process.env.PROCESSOR_PROFILE || ''}`
             ]
         };
 
-        await dockerService.runContainer(dockerConfig, PROCESSING_TIMEOUTS['csv-analyze']);
+        await this.runProcessor(task, dockerConfig, PROCESSING_TIMEOUTS['csv-analyze']);
         const outputFilename = `${task.id}_analysis.json`;
         const outputPath = `${process.cwd()}/outputs/${outputFilename}`;
         try {
@@ -0,0 +1,75 @@
+const fs = require('fs').promises;
+const path = require('path');
+const logger = require('../utils/logger');
+
+// Task types served by long-running processor containers instead of one container per task,
+// e.g. WARM_WORKERS=csv-analyze,pdf-extract,image-convert
+const SPOOL_NAMES = {
+  'image-convert': 'image-processor',
+  'pdf-extract': 'pdf-processor',
+  'csv-analyze': 'csv-analyzer'
+};
+
+class WarmWorkerService {
+  constructor() {
+    this.enabledTypes = new Set(
+      (process.env.WARM_WORKERS || '').split(',').map((type) => type.trim()).filter(Boolean)
+    );
+    // The workers mount the outputs directory as /output and serve /output/.spool/<processor>
+    this.spoolRoot = path.join(process.cwd(), 'outputs', '.spool');
+    this.pollInterval = parseInt(process.env.WARM_WORKER_POLL_MS) || 200;
+  }
+
+  isEnabled(taskType) {
+    return this.enabledTypes.has(taskType) && Boolean(SPOOL_NAMES[taskType]);
+  }
+
+  // Same contract as dockerService.runContainer: resolves on exit code 0, throws otherwise
+  async runJob(taskType, jobId, environment, timeout = 300000) {
+    const spool = path.join(this.spoolRoot, SPOOL_NAMES[taskType]);
+    const incoming = path.join(spool, 'incoming');
+    const donePath = path.join(spool, 'done', `${jobId}.json`);
+    await fs.mkdir(incoming, { recursive: true });
+
+    const env = {};
+    for (const entry of environment) {
+      const separator = entry.indexOf('=');
+      env[entry.slice(0, separator)] = entry.slice(separator + 1);
+    }
+
+    // The worker kills a job still running at its deadline and drops results nobody collects
+    const deadline = Date.now() + timeout;
+
+    // Written under a dot name and renamed in, so a worker never reads a partial job
+    const tempPath = path.join(incoming, `.${jobId}.json`);
+    const jobPath = path.join(incoming, `${jobId}.json`);
+    await fs.writeFile(tempPath, JSON.stringify({ env, deadline: deadline / 1000 }));
+    await fs.rename(tempPath, jobPath);
+    logger.info(`Queued job ${jobId} for warm ${SPOOL_NAMES[taskType]} workers`);
+
+    while (Date.now() < deadline) {
+      let result;
+      try {
+        result = JSON.parse(await fs.readFile(donePath, 'utf8'));
+      } catch (error) {
+        await new Promise((resolve) => setTimeout(resolve, this.pollInterval));
+        continue;
+      }
+
+      await fs.unlink(donePath).catch(() => {});
+      logger.info(`Warm worker job ${jobId} logs:`, result.log);
+      logger.info(`Warm worker job ${jobId} completed with exit code: ${result.exit_code} in ${result.seconds}s`);
+      if (result.exit_code !== 0) {
+        throw new Error(`Worker job exited with code ${result.exit_code}: ${result.log}`);
+      }
+      return { success: true, logs: result.log, exitCode: result.exit_code };
+    }
+
+    // Withdraw the job if no worker has claimed it yet, and any result that just landed
+    await fs.unlink(jobPath).catch(() => {});
+    await fs.unlink(donePath).catch(() => {});
+    throw new Error(`Worker job ${jobId} timed out after ${timeout}ms`);
+  }
+}
+
+module.exports = new WarmWorkerService();
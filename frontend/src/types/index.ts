@@ -36,11 +36,24 @@ export interface TaskParameters {
   quality?: number;
   width?: number;
   height?: number;
+  fit?: 'stretch' | 'contain';
+  encodeProfile?: 'fast' | 'balanced' | 'smallest';
+  renditions?: Array<{
+    name?: string;
+    format?: string;
+    quality?: number;
+    width?: number;
+    height?: number;
+    fit?: 'stretch' | 'contain';
+    profile?: 'fast' | 'balanced' | 'smallest';
+  }>;
 
   // PDF extraction parameters
   extractImages?: boolean;
   extractTables?: boolean;
   outputFormat?: string;  // PDF uses 'outputFormat'
+  tableSettings?: Record<string, unknown>;  // pdfplumber table settings
+  tableFormat?: 'csv' | 'parquet';  // file the tables are also written to with extractTables
   pageRange?: {
     start?: number;
     end?: number;
@@ -56,9 +69,13 @@ export interface TaskParameters {
   // CSV analysis parameters
   delimiter?: string;
   hasHeader?: boolean;
-  analysisType?: string;
+  analysisType?: 'basic' | 'quality' | 'full' | 'detailed' | 'statistical';  // default 'full'; basic/quality omit sections
   columns?: string[];
   generateCharts?: boolean;
+  approximate?: boolean;
+  inputFormat?: 'csv' | 'xlsx' | 'xls' | 'parquet' | 'arrow';
+  sheet?: string | number;                   // Excel sheet name or 0-based index
+  filters?: [string, string, unknown][];     // Parquet/Arrow row filters, ANDed
   
   // Code execution parameters
   language?: string;
@@ -40,7 +40,7 @@ export const TASK_TYPES: { [key in TaskType]: {
     description: 'Analyze CSV data and generate insights (COMING)',
     icon: 'BarChart3',
     maxSize: 50 * 1024 * 1024, // 50MB
-    supportedFormats: ['csv']
+    supportedFormats: ['csv', 'xlsx', 'xls', 'parquet', 'arrow', 'feather']
   },
   'code-execute': {
     name: 'Code Execution',